@@ -1,11 +1,15 @@
 import streamlit as st
 from pathlib import Path
-from utils.common import ensure_session_keys
+from utils.common import ensure_session_keys, load_dataset
 from utils.ui import render_header, sidebar_brand
+from utils.ingest import start_drop_watch
+from utils.warmup import start_warmup
 
 st.set_page_config(page_title="Logan Tactical — Streamlit", page_icon="🛡️", layout="wide")
 
 ensure_session_keys()
+start_warmup()
+start_drop_watch()
 sidebar_brand()
 render_header("Logan Tactical Dashboard", "Login & Access Control")
 
@@ -18,7 +22,11 @@ with st.form("login_form", clear_on_submit=False):
     if submitted:
         if u == "admin" and p == "admin123":
             st.session_state["logged_in"] = True
+            st.session_state["username"] = u
             st.success("Login berhasil. Buka menu di sidebar (Dashboard / Data Penjualan / Prediksi).")
+            ds = load_dataset()
+            if ds is not None:
+                st.info(f"Dataset tersimpan dimuat otomatis ({len(ds):,} baris).")
         else:
             st.error("Username atau password salah.")
 
@@ -1,111 +1,48 @@
 import streamlit as st
-import re, unicodedata
 import altair as alt
 import pandas as pd
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+import matplotlib.ticker as ticker
 import json
+from functools import partial
 from pathlib import Path
-from utils.ui import export_chart_as_png
-from utils.common import guard_login, load_df
-from utils.model_infer import predict_with_lstm_for_product
-from utils.ui import render_header, sidebar_brand, render_kpi_cards
-
+from matplotlib.figure import Figure
+from utils.chart_export import lazy_png
+from utils.downsample import downsample_frame, for_chart, points_for_width
+from utils.common import guard_login, load_dataset
+from utils.cube import AggregateCube
+from utils import forecast_store
+from utils import jobs
+from utils.forecast_jobs import submit_dashboard_forecast
+from utils.model_infer import MODEL_PATH, SCALER_PATH
+from utils.timing import stage
+from utils.ui import render_header, sidebar_brand, render_kpi_cards, render_job_progress, render_job_status
+from utils.ui import begin_page_timing, end_page_timing, render_timing_panel
+
+begin_page_timing("Dashboard")
 sidebar_brand()
 render_header("Logan Tactical Dashboard", "Sales Forecasting & Insights Platform")
 
-st.cache_data.clear()
-
 guard_login()
 st.markdown("## 📊 Dashboard prediksi dalam satu tahun")
 
-df = load_df()
-if df is None:
+ds = load_dataset()
+if ds is None:
     st.info("Belum ada data. Silakan upload dataset di halaman **Data Penjualan**.")
     st.stop()
 
-df["Tanggal"] = pd.to_datetime(df["Tanggal"], errors="coerce")
-df = df.dropna(subset=["Tanggal"])
-df["Jumlah Terjual"] = pd.to_numeric(df["Jumlah Terjual"], errors="coerce").fillna(0).astype(int)
-
-def _coerce_money(series: pd.Series) -> pd.Series:
-    s = series.astype(str).str.replace(r"[^\d,.\-]", "", regex=True)
-    s = s.apply(lambda x: x.replace(".", "").replace(",", ".") if ("," in x and "." in x) else x)
-    s = s.str.replace(",", ".", regex=False)
-    return pd.to_numeric(s, errors="coerce")
-
-if "Harga" in df.columns:
-    df["Harga"] = _coerce_money(df["Harga"]).fillna(0.0)
-
-def _norm_name(s: str) -> str:
-    s = unicodedata.normalize("NFKD", str(s)).lower()
-    s = re.sub(r"[^\w]+", "", s)
-    s = (s
-         .replace("keuntungan", "untung")
-         .replace("profit", "untung")
-         .replace("laba", "untung")
-         .replace("pendapatan", "revenue"))
-    return s
-
-norm_cols = {orig: _norm_name(orig) for orig in df.columns}
-
-def _find_col(require_all: list[str], forbid_any: list[str] = None) -> str | None:
-    forbid_any = forbid_any or []
-    for orig, n in norm_cols.items():
-        if all(k in n for k in require_all) and all(k not in n for k in forbid_any):
-            return orig
-    return None
+# Semua cache di bawah dikunci versi dataset (hash isi, dihitung sekali saat upload);
+# frame dikirim sebagai argumen "_" sehingga Streamlit tidak meng-hash isinya.
+df = ds.df
+version = ds.version
+cube = ds.cube
+model_key = forecast_store.file_checksum(MODEL_PATH, SCALER_PATH)
+col_profit_unit, col_profit_total = ds.profit_unit_col, ds.profit_total_col
 
-col_profit_unit  = _find_col(["untung", "unit"], forbid_any=["total"])
-col_profit_total = _find_col(["untung", "total"])
-
-if col_profit_unit is None:
-    for name in ["Keuntungan/Unit", "Keuntungan Unit", "Profit/Unit", "Keuntungan per unit",
-                 "Keuntungan_per_unit", "Profit per unit", "Profit_per_unit"]:
-        if name in df.columns:
-            col_profit_unit = name
-            break
-
-if col_profit_total is None:
-    for name in ["KeuntunganTotal", "Keuntungan total", "Keuntungan_total",
-                 "Total Keuntungan", "Total_Keuntungan", "TotalProfit", "ProfitTotal"]:
-        if name in df.columns:
-            col_profit_total = name
-            break
-
-df["_profit_unit"]  = pd.NA
-df["_profit_total"] = pd.NA
-
-if col_profit_unit:
-    df["_profit_unit"] = _coerce_money(df[col_profit_unit])
-
-if col_profit_total:
-    df["_profit_total"] = _coerce_money(df[col_profit_total])
-
-if (df["_profit_unit"].isna().all() or df["_profit_unit"].fillna(0).eq(0).all()) and col_profit_total:
-    qty_col = None
-    for cand in ["Jumlah Terjual", "Jumlah", "Qty", "Quantity", "Kuantitas"]:
-        if cand in df.columns:
-            qty_col = cand
-            break
-    if qty_col:
-        qty = pd.to_numeric(df[qty_col], errors="coerce")
-        tot = pd.to_numeric(df["_profit_total"], errors="coerce")
-        df["_profit_unit"] = tot / qty.replace(0, pd.NA)
-
-if (df["_profit_unit"].isna().all() or df["_profit_unit"].fillna(0).eq(0).all()) and df["_profit_total"].notna().any():
-    tot_profit_hist = pd.to_numeric(df["_profit_total"], errors="coerce").fillna(0).sum()
-    tot_units_hist  = pd.to_numeric(df["Jumlah Terjual"], errors="coerce").fillna(0).sum()
-    df["_profit_unit"] = float(tot_profit_hist / tot_units_hist) if tot_units_hist > 0 else 0.0
-
-df["_profit_unit"]  = pd.to_numeric(df["_profit_unit"], errors="coerce")
-df["_profit_total"] = pd.to_numeric(df["_profit_total"], errors="coerce")
-
-produk_list = sorted(df["Nama Produk"].dropna().unique().tolist())
+produk_list = ds.products
 
 @st.cache_data(show_spinner=False)
-def read_metrics_json():
+def read_metrics_json(mtime: float | None = None):
+    # mtime hanya sebagai kunci cache: file ditulis ulang oleh scripts/backtest.py.
     p = Path("reports/metrics.json")
     if p.exists():
         try:
@@ -114,52 +51,44 @@ def read_metrics_json():
             return {}
     return {}
 
-@st.cache_data(show_spinner=True, ttl=300)
-def compute_kpi(df_in: pd.DataFrame, products, horizon: int = 12):
-    total_units_pred = 0
-    total_profit_pred = 0.0
-    for prod in products:
-        sub = df_in[df_in["Nama Produk"] == prod]
-        if sub.empty:
-            continue
-        try:
-            yhat = predict_with_lstm_for_product(df_in, prod, horizon)
-        except Exception:
-            continue
-        units_pred = int(sum(yhat))
-        total_units_pred += units_pred
-        avg_profit = pd.to_numeric(sub["_profit_unit"], errors="coerce")
-        avg_profit = float(avg_profit.dropna().median()) if avg_profit.notna().any() else None
-        if (avg_profit is None) or (avg_profit == 0):
-            tot_profit_hist = pd.to_numeric(sub["_profit_total"], errors="coerce").dropna().sum()
-            tot_units_hist  = pd.to_numeric(sub["Jumlah Terjual"], errors="coerce").dropna().sum()
-            if tot_units_hist > 0 and tot_profit_hist > 0:
-                avg_profit = float(tot_profit_hist / tot_units_hist)
-        if avg_profit is None or pd.isna(avg_profit):
-            avg_profit = 0.0
-        total_profit_pred += units_pred * avg_profit
-    return int(total_units_pred), int(round(total_profit_pred))
+# Ringkasan, tren harian & bulanan dijawab dari kubus agregat (utils/cube.py), bukan baris mentah.
+@st.cache_data(show_spinner=False, max_entries=8)
+def summary_last12(version: str, _cube: AggregateCube) -> pd.DataFrame:
+    cutoff = _cube.last_date - pd.DateOffset(months=12)
+    per_produk = _cube.by_product(["Jumlah Terjual", "Baris"], start=cutoff)
+    return (
+        pd.DataFrame({
+            "Total 12 Bulan": per_produk["Jumlah Terjual"],
+            "Rata-rata / Bulan": per_produk["Jumlah Terjual"] / per_produk["Baris"],
+        })
+        .sort_values("Total 12 Bulan", ascending=False)
+    )
 
-@st.cache_data(show_spinner=False)
-def build_monthly_agg(df_in: pd.DataFrame):
-    daily_sales = df_in.groupby("Tanggal", as_index=True)["Jumlah Terjual"].sum()
-    monthly_sales = daily_sales.resample("MS").sum()
-    if "Harga" in df_in.columns:
-        df_in["Harga"] = pd.to_numeric(df_in["Harga"], errors="coerce").fillna(0.0)
-        df_in["Revenue_item"] = df_in["Harga"] * df_in["Jumlah Terjual"]
-        daily_rev = df_in.groupby("Tanggal", as_index=True)["Revenue_item"].sum()
-        monthly_rev = daily_rev.resample("MS").sum()
-    else:
-        monthly_rev = pd.Series(dtype=float)
-    monthly = pd.DataFrame({"Jumlah Terjual": monthly_sales})
-    if not monthly_rev.empty:
-        monthly["Revenue"] = monthly_rev
+@st.cache_data(show_spinner=False, max_entries=8)
+def daily_sales_frame(version: str, _cube: AggregateCube) -> pd.DataFrame:
+    df_daily = _cube.series("day").reset_index()
+    df_daily.columns = ["Tanggal", "Jumlah Terjual"]
+    return df_daily
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_monthly_agg(version: str, _cube: AggregateCube):
+    monthly = pd.DataFrame({"Jumlah Terjual": _cube.series("month", fill=True)})
+    if _cube.has_revenue:
+        monthly["Revenue"] = _cube.series("month", "Revenue", fill=True)
     return monthly
 
-with st.spinner("Menghitung KPI dari model & data..."):
-    pred_units_12m, pred_profit_12m = compute_kpi(df, produk_list, horizon=12)
-
-metrics = read_metrics_json()
+# Prediksi semua produk + KPI dijalankan sebagai job latar belakang (utils/forecast_jobs.py),
+# dibagi semua sesi per versi dataset & model; job cepat (cache hit) ditunggu langsung.
+with stage("forecast_job", rows=len(produk_list)):
+    forecast_job = submit_dashboard_forecast(ds, model_key, produk_list, 12)
+    forecast_job.wait(jobs.INLINE_WAIT)
+if render_job_status(forecast_job, "🔁 Hitung ulang prediksi"):
+    submit_dashboard_forecast(ds, model_key, produk_list, 12, restart=True)
+    st.rerun()
+forecast = forecast_job.result if forecast_job.state == "done" else None
+
+_metrics_path = Path("reports/metrics.json")
+metrics = read_metrics_json(_metrics_path.stat().st_mtime if _metrics_path.exists() else None)
 mape = metrics.get("MAPE", None)
 smape = metrics.get("sMAPE", None)
 wape = metrics.get("WAPE", None)
@@ -180,56 +109,31 @@ try:
 except Exception:
     pass
 
+def _partial_units(job):
+    parts = [p for p in job.partial() if len(p)]
+    if parts:
+        units = int(sum(float(p.sum(axis=1).sum()) for p in parts))
+        st.caption(f"Sementara: {units:,} unit dari {sum(len(p) for p in parts)} produk.")
+
 c1, c2, c3 = st.columns(3)
-c1.metric("Prediksi Penjualan / Tahun", f"{pred_units_12m:,.0f}")
+c1.metric("Prediksi Penjualan / Tahun", f"{forecast['units']:,.0f}" if forecast else "⏳")
 c2.metric("Akurasi (estimatif)", acc_label, help=acc_help)
-c3.metric("Prediksi Keuntungan / Tahun", f"Rp {pred_profit_12m:,.0f}")
+c3.metric("Prediksi Keuntungan / Tahun", f"Rp {forecast['profit']:,.0f}" if forecast else "⏳")
+if forecast is None and not forecast_job.finished:
+    render_job_progress(forecast_job, "Menghitung KPI dari model & data", _partial_units)
 
 st.subheader("📦 Ringkasan Penjualan per Produk (12 Bulan Terakhir)")
 
-df_last12 = df.copy()
-df_last12["Tanggal"] = pd.to_datetime(df_last12["Tanggal"], errors="coerce")
-cutoff = df_last12["Tanggal"].max() - pd.DateOffset(months=12)
-df_last12 = df_last12[df_last12["Tanggal"] >= cutoff]
-
-summary = (
-    df_last12.groupby("Nama Produk")["Jumlah Terjual"]
-    .agg(["sum", "mean"])
-    .rename(columns={
-        "sum": "Total 12 Bulan",
-        "mean": "Rata-rata / Bulan"
-    })
-    .sort_values("Total 12 Bulan", ascending=False)
-)
+with stage("summary_12m", rows=len(cube)):
+    summary = summary_last12(version, cube)
 
 summary_view = summary.reset_index()
 summary_view.index = summary_view.index + 1
 
 st.dataframe(summary_view)
 
-monthly = build_monthly_agg(df) 
-
-def _aggregate_pred_monthly(df_in: pd.DataFrame, products, horizon: int = 12) -> pd.Series:
-    agg = {}
-    for prod in products:
-        sub = df_in[df_in["Nama Produk"] == prod].copy()
-        if sub.empty:
-            continue
-        sub["Tanggal"] = pd.to_datetime(sub["Tanggal"], errors="coerce")
-        sub = sub.dropna(subset=["Tanggal"]).sort_values("Tanggal")
-        if sub.empty:
-            continue
-        daily = sub.groupby("Tanggal")["Jumlah Terjual"].sum()
-        hist_m = daily.resample("MS").sum()
-        last_month = hist_m.index.max() if len(hist_m) else pd.Timestamp.today().normalize()
-        future_idx = pd.date_range(last_month + pd.offsets.MonthBegin(1), periods=horizon, freq="MS")
-        try:
-            yhat = predict_with_lstm_for_product(df_in, prod, horizon)
-        except Exception:
-            continue
-        for i, ts in enumerate(future_idx):
-            agg[ts] = agg.get(ts, 0) + int(yhat[i])
-    return pd.Series(agg).sort_index()
+with stage("monthly_agg", rows=len(cube)):
+    monthly = build_monthly_agg(version, cube)
 
 def _event_label(ts: pd.Timestamp) -> str | None:
     m = int(ts.month)
@@ -239,7 +143,7 @@ def _event_label(ts: pd.Timestamp) -> str | None:
     if m == 12: return "Natal"
     return None
 
-pred_series_all = _aggregate_pred_monthly(df, produk_list, horizon=12)
+pred_series_all = forecast["monthly"] if forecast else None
 hist_last12 = None
 if "Jumlah Terjual" in monthly.columns and not monthly.empty:
     hist_last12 = monthly["Jumlah Terjual"].tail(12)
@@ -271,105 +175,125 @@ st.subheader("📌 Catatan Prediksi")
 for line in summary_lines:
     st.markdown(f"- {line}")
 
-with st.expander("Lihat tabel prediksi bulanan (gabungan semua produk)"):
-    pred_df_view = pred_series_all.reset_index()
-    pred_df_view.columns = ["Periode", "Prediksi Total"]
-    pred_df_view["Label"] = pred_df_view["Periode"].dt.strftime("%Y-%m")
-    tmpv = pred_df_view[["Label", "Prediksi Total"]].copy()
-    tmpv = tmpv.reset_index(drop=True)
-    tmpv.index = tmpv.index + 1
-    st.dataframe(tmpv)
-    st.line_chart(pred_df_view.set_index("Label")["Prediksi Total"])
+if pred_series_all is not None:
+    with st.expander("Lihat tabel prediksi bulanan (gabungan semua produk)"):
+        pred_df_view = pred_series_all.reset_index()
+        pred_df_view.columns = ["Periode", "Prediksi Total"]
+        pred_df_view["Label"] = pred_df_view["Periode"].dt.strftime("%Y-%m")
+        tmpv = pred_df_view[["Label", "Prediksi Total"]].copy()
+        tmpv = tmpv.reset_index(drop=True)
+        tmpv.index = tmpv.index + 1
+        st.dataframe(tmpv)
+        st.line_chart(for_chart(pred_df_view.set_index("Label")["Prediksi Total"]))
 
 st.subheader("Tren Penjualan (Aktual)")
 if not monthly.empty and "Jumlah Terjual" in monthly.columns:
     tmp = monthly.copy()
     tmp.index = tmp.index.strftime("%Y-%m")
-    st.line_chart(tmp["Jumlah Terjual"])
+    st.line_chart(for_chart(tmp["Jumlah Terjual"]))
 else:
     st.write("Belum ada agregasi bulanan.")
 
-import matplotlib.ticker as ticker
-
-fig, ax = plt.subplots(figsize=(8, 3))
-idx = pd.to_datetime(monthly.index)
-ax.plot(idx, monthly["Jumlah Terjual"], marker="o", color="blue")
-labels = idx.strftime("%Y-%m")
-ax.set_xticks(idx)
-ax.set_xticklabels(labels, rotation=45, ha="right")
-
-ax.set_title("Tren Penjualan Bulanan")
-ax.set_xlabel("Periode (YYYY-MM)")
-ax.set_ylabel("Jumlah Terjual")
-ax.grid(True, alpha=0.3)
-
-buf = export_chart_as_png(fig)
+def sales_figure(monthly: pd.DataFrame) -> Figure:
+    fig = Figure(figsize=(8, 3))
+    ax = fig.subplots()
+    idx = pd.to_datetime(monthly.index)
+    ax.plot(idx, monthly["Jumlah Terjual"], marker="o", color="blue")
+    ax.set_xticks(idx)
+    ax.set_xticklabels(idx.strftime("%Y-%m"), rotation=45, ha="right")
+
+    ax.set_title("Tren Penjualan Bulanan")
+    ax.set_xlabel("Periode (YYYY-MM)")
+    ax.set_ylabel("Jumlah Terjual")
+    ax.grid(True, alpha=0.3)
+    return fig
+
+def revenue_figure(monthly: pd.DataFrame) -> Figure:
+    fig = Figure(figsize=(8, 3))
+    ax = fig.subplots()
+    idx = pd.to_datetime(monthly.index)
+    ax.plot(idx, monthly["Revenue"], marker="o", color="green")
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: f"{int(x):,}".replace(",", ".")))
+    ax.set_xticks(idx)
+    ax.set_xticklabels(idx.strftime("%Y-%m"), rotation=45, ha="right")
+
+    ax.set_title("Tren Pendapatan Bulanan")
+    ax.set_xlabel("Periode (YYYY-MM)")
+    ax.set_ylabel("Revenue (Rp)")
+    ax.grid(True, alpha=0.3)
+    return fig
+
+# PNG hanya dibuat saat tombol diklik, lalu di-cache per versi dataset (utils/chart_export.py).
 st.download_button(
     "⬇️ Download Grafik Penjualan (PNG)",
-    data=buf,
+    data=lazy_png(("dashboard_sales", version), partial(sales_figure, monthly)),
     file_name="tren_penjualan_bulanan.png",
     mime="image/png",
+    on_click="ignore",
 )
 
 st.subheader("Tren Pendapatan (Aktual)")
 if not monthly.empty and "Revenue" in monthly.columns:
     tmp2 = monthly.copy()
     tmp2.index = tmp2.index.strftime("%Y-%m")
-    st.line_chart(tmp2["Revenue"])
+    st.line_chart(for_chart(tmp2["Revenue"]))
 else:
     st.write("Belum ada kolom `Harga`, sehingga revenue belum bisa dihitung.")
 
 if not monthly.empty and "Revenue" in monthly.columns:
-    fig2, ax2 = plt.subplots(figsize=(8, 3))
-    idx = pd.to_datetime(monthly.index)
-    ax2.plot(idx, monthly["Revenue"], marker="o", color="green")
-    ax2.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: f"{int(x):,}".replace(",", ".")))
-    labels = idx.strftime("%Y-%m")
-    ax2.set_xticks(idx)
-    ax2.set_xticklabels(labels, rotation=45, ha="right")
-
-    ax2.set_title("Tren Pendapatan Bulanan")
-    ax2.set_xlabel("Periode (YYYY-MM)")
-    ax2.set_ylabel("Revenue (Rp)")
-    ax2.grid(True, alpha=0.3)
-
-    png_file2 = export_chart_as_png(fig2)
     st.download_button(
         label="⬇️ Download Grafik Revenue (PNG)",
-        data=png_file2,
+        data=lazy_png(("dashboard_revenue", version), partial(revenue_figure, monthly)),
         file_name="tren_revenue.png",
-        mime="image/png"
-)
-    
+        mime="image/png",
+        on_click="ignore",
+    )
+
 st.subheader("📅 Tren Penjualan Harian (Actual)")
 
-df_daily = df.groupby("Tanggal")["Jumlah Terjual"].sum().reset_index()
-df_daily.columns = ["Tanggal", "Jumlah Terjual"]
-
-last_date = df_daily["Tanggal"].max()
-cutoff_daily = last_date - pd.Timedelta(days=365)
-df_daily = df_daily[df_daily["Tanggal"] >= cutoff_daily]
-
-if not df_daily.empty:
-    chart = (
-        alt.Chart(df_daily)
-        .mark_line(point=True)
-        .encode(
-            x=alt.X('Tanggal:T', title='Tanggal', axis=alt.Axis(format='%Y-%m-%d')),
-            y=alt.Y('Jumlah Terjual:Q', title='Jumlah Terjual'),
-            tooltip=['Tanggal:T', 'Jumlah Terjual:Q']
-        )
-        .properties(
-            width=900,
-            height=350,
-            title="Tren Penjualan Harian (1 Tahun Terakhir)"
+with stage("altair_daily", rows=len(cube)):
+    df_daily = daily_sales_frame(version, cube)
+
+    if not df_daily.empty:
+        # Rentang default 1 tahun terakhir; mempersempit rentang = zoom di server, dan begitu
+        # titik di rentang itu muat di lebar chart, data dikirim dengan resolusi penuh.
+        first_date = df_daily["Tanggal"].min().date()
+        last_date = df_daily["Tanggal"].max().date()
+        default_start = max(first_date, last_date - pd.Timedelta(days=365))
+        if first_date < last_date:
+            start_d, end_d = st.slider("Rentang tanggal", min_value=first_date, max_value=last_date,
+                                       value=(default_start, last_date), format="YYYY-MM-DD",
+                                       key="daily_range")
+        else:
+            start_d, end_d = first_date, last_date
+        window = df_daily[(df_daily["Tanggal"] >= pd.Timestamp(start_d)) & (df_daily["Tanggal"] <= pd.Timestamp(end_d))]
+        df_plot = downsample_frame(window, "Tanggal", "Jumlah Terjual", n_out=points_for_width(900))
+    else:
+        window = df_plot = df_daily
+
+    if not df_plot.empty:
+        chart = (
+            alt.Chart(df_plot)
+            .mark_line(point=len(df_plot) == len(window))
+            .encode(
+                x=alt.X('Tanggal:T', title='Tanggal', axis=alt.Axis(format='%Y-%m-%d')),
+                y=alt.Y('Jumlah Terjual:Q', title='Jumlah Terjual'),
+                tooltip=['Tanggal:T', 'Jumlah Terjual:Q']
+            )
+            .properties(
+                width=900,
+                height=350,
+                title=f"Tren Penjualan Harian ({start_d:%Y-%m-%d} s/d {end_d:%Y-%m-%d})"
+            )
+            .interactive()  
         )
-        .interactive()  
-    )
 
-    st.altair_chart(chart, use_container_width=True)
-else:
-    st.write("Belum ada data harian yang mencukupi.")
+        st.altair_chart(chart, use_container_width=True)
+        if len(df_plot) < len(window):
+            st.caption(f"{len(df_plot):,} dari {len(window):,} titik ditampilkan (LTTB); "
+                       "persempit rentang untuk resolusi penuh.")
+    else:
+        st.write("Belum ada data harian yang mencukupi.")
 
 with st.expander("🔎 Debug Profit Columns"):
     st.write("Detected _profit_unit values:", df["_profit_unit"].notna().sum())
@@ -389,4 +313,5 @@ with st.expander("🔎 Debug Profit Columns"):
     st.write("Contoh 5 baris:")
     st.dataframe(df.head(5).reset_index(drop=True).assign(_idx=lambda d: d.index+1).set_index("_idx"))
 
-
+render_timing_panel()
+end_page_timing()
@@ -1,50 +1,20 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 from pathlib import Path
-from utils.common import guard_login, load_df, set_df, clear_data
-from utils.ui import render_header, sidebar_brand
-
+from utils.cleaning import AJ_LAYOUT, map_aj_columns
+from utils.common import guard_login, load_dataset, set_df, clear_data, append_df, reload_from_store
+from utils.export import FORMATS, export_filename, lazy_export
+from utils.ingest import (DROP_DIR, DROP_WATCH_SECONDS, STREAM_THRESHOLD_BYTES, ingest_csv,
+                          pending_drop_files, process_drop_folder)
+from utils.ui import render_header, sidebar_brand, begin_page_timing, end_page_timing
+
+begin_page_timing("Data Penjualan")
 sidebar_brand()
 render_header("Data Penjualan", "Upload, Mapping, dan Validasi")
 
 guard_login()
 st.markdown("## 📦 Data Penjualan") 
 
-REQUIRED = ["Tanggal", "ID Produk", "Nama Produk", "Brand", "Kategori", "Harga", "Jumlah Terjual", "Keuntungan per unit", "Keuntungan total"]
-
-def parse_tanggal(series: pd.Series) -> pd.Series:
-    if np.issubdtype(series.dtype, np.number):
-        return pd.to_datetime(series, errors="coerce", unit="D", origin="1899-12-30")
-    s = series.astype(str).str.strip().str.replace("/", "-", regex=False)
-    dt = pd.to_datetime(s, format="%d-%m-%y", errors="coerce")
-    if dt.isna().mean() > 0.2:
-        dt = pd.to_datetime(s, format="%d-%m-%Y", errors="coerce")
-    if dt.isna().mean() > 0.2:
-        dt = pd.to_datetime(s, dayfirst=True, errors="coerce")
-    return dt
-
-def to_int_series(s: pd.Series) -> pd.Series:
-    if s.dtype.kind in "biu":
-        return s.astype(int)
-    s2 = (
-        s.astype(str)
-         .str.replace(r"[^\d\-\.,]", "", regex=True)
-         .str.replace(".", "", regex=False)
-         .str.replace(",", ".", regex=False)
-    )
-    return pd.to_numeric(s2, errors="coerce").fillna(0).astype(int)
-
-def infer_kategori_from_nama(nm: str) -> str:
-    if not isinstance(nm, str):
-        return "Airsoft Gun"
-    nm_low = nm.lower()
-    if any(k in nm_low for k in ["bb", "peluru", "ammo", "magazine", "mag", "gas", "co2"]):
-        return "Aksesori"
-    if "operator" in nm_low:
-        return "Aksesori"
-    return "Airsoft Gun"
-
 def read_any(uploaded, sheet=None, header_row=0):
     name = (uploaded.name or "").lower()
     if name.endswith(".xlsx") or name.endswith(".xls"):
@@ -58,9 +28,26 @@ def read_any(uploaded, sheet=None, header_row=0):
 
 st.markdown("### Upload Dataset (CSV/Excel)")
 uploaded = st.file_uploader("Unggah file .csv / .xlsx / .xls", type=["csv", "xlsx", "xls"])
+upload_mode = st.radio("Mode upload", ["Ganti dataset", "Tambahkan ke dataset (append)"], horizontal=True,
+                       help="Append: baris yang sudah ada (isi identik) dilewati; hanya produk/bulan baru yang dihitung ulang.")
+append_mode = upload_mode.startswith("Tambahkan")
 
 df_preview = None
 sheet = None
+CLEANED_PATH = Path("data/cleaned.parquet")
+
+def _commit(clean: pd.DataFrame):
+    if append_mode:
+        s = append_df(clean)
+        msg = (f"{s['added']:,} baris baru ditambahkan, {s['duplicates']:,} duplikat dilewati "
+               f"({s['products']} produk, {s['months']} bulan tersentuh).")
+    else:
+        set_df(clean, persist=True)
+        msg = "Dataset real berhasil dimuat."
+    # File yang sama (mode & sheet sama) tidak di-ingest/commit ulang di rerun berikutnya.
+    st.session_state["upload_committed"] = upload_key
+    st.session_state["upload_message"] = msg
+    st.success(msg)
 
 if uploaded is not None:
     name = uploaded.name.lower()
@@ -76,64 +63,85 @@ if uploaded is not None:
             st.error(f"Gagal membaca sheet: {e}")
             uploaded.seek(0)
 
-    try:
-        df_raw = read_any(uploaded, sheet=sheet, header_row=0)
-    except Exception as e:
-        st.error(f"Gagal membaca file: {e}")
-        df_raw = None
-
-    if df_raw is not None and not df_raw.empty:
-        if df_raw.shape[1] < 10:
-            st.error("Jumlah kolom kurang dari 10. Dibutuhkan kolom A..J (A=Kode Barang, B=Nama, C=Harga, D, E, F=Jumlah, G=Tanggal dd-mm-yy, H=Brand, I=Promotion, J=Holiday).")
-        else:
-            col_A = df_raw.iloc[:, 0]
-            col_B = df_raw.iloc[:, 1]
-            col_C = df_raw.iloc[:, 2]
-            col_D = df_raw.iloc[:, 3]
-            col_E = df_raw.iloc[:, 4]
-            col_F = df_raw.iloc[:, 5]
-            col_G = df_raw.iloc[:, 6]
-            col_H = df_raw.iloc[:, 7]
-            col_I = df_raw.iloc[:, 8]
-            col_J = df_raw.iloc[:, 9]
-
-            out = pd.DataFrame({
-                "ID Produk": to_int_series(col_A),
-                "Nama Produk": col_B.astype(str).str.strip(),
-                "Harga": to_int_series(col_C),
-                "Keuntungan per unit": to_int_series(col_D),
-                "Keuntungan total": to_int_series(col_E),
-                "Jumlah Terjual": to_int_series(col_F),
-                "Brand": col_H.astype(str).str.strip(),
-                "Promotion": col_I.astype(str).str.strip(),
-                "Holiday": col_J
-            })
-
-            out["Tanggal"] = parse_tanggal(col_G)
-            out["Kategori"] = out["Nama Produk"].apply(infer_kategori_from_nama)
-
-            before = len(out)
-            out = out.dropna(subset=["Tanggal"])
-            if before - len(out) > 0:
-                st.warning(f"{before - len(out)} baris dibuang karena tanggal tidak valid (harus dd-mm-yy).")
-
-            out = out[REQUIRED + ["Promotion", "Holiday"]]
-            set_df(out)
+    stream = False
+    if not is_excel:
+        stream = st.toggle("Mode streaming (baca per chunk, untuk CSV besar)",
+                           value=(uploaded.size or 0) >= STREAM_THRESHOLD_BYTES)
+
+    upload_key = (uploaded.file_id, upload_mode, sheet)
+    if st.session_state.get("upload_committed") == upload_key:
+        st.success(st.session_state.get("upload_message", "File ini sudah diproses."))
+    elif stream:
+        bar = st.progress(0.0, text="Membaca CSV per chunk…")
+        total = max(1, uploaded.size or 1)
+
+        def _progress(nbytes, nrows):
+            bar.progress(min(1.0, nbytes / total), text=f"{nrows:,} baris dibaca…")
+
+        try:
             try:
-                Path("data").mkdir(exist_ok=True)
-                out.to_parquet("data/cleaned.parquet", index=False)
-            except Exception:
-                pass
-            st.success("Dataset real berhasil dimuat.")
-            df_preview = out
+                res = ingest_csv(uploaded, out_path=None if append_mode else CLEANED_PATH, progress=_progress)
+            except OSError:
+                uploaded.seek(0)
+                res = ingest_csv(uploaded, progress=_progress)
+        except Exception as e:
+            st.error(f"Gagal membaca file: {e}")
+            res = None
+        bar.empty()
+
+        if res is not None and not res.df.empty:
+            if res.rows_dropped > 0:
+                st.warning(f"{res.rows_dropped} baris dibuang karena tanggal tidak valid (harus dd-mm-yy).")
+            _commit(res.df)
+            st.caption(f"{res.rows_read:,} baris · {res.chunks} chunk · encoding {res.encoding} · "
+                       f"engine {res.engine} · {res.seconds:.2f} detik")
+            df_preview = res.df
+        elif res is not None:
+            st.warning("File tidak berisi baris data.")
+    else:
+        try:
+            df_raw = read_any(uploaded, sheet=sheet, header_row=0)
+        except Exception as e:
+            st.error(f"Gagal membaca file: {e}")
+            df_raw = None
+
+        if df_raw is not None and not df_raw.empty:
+            if df_raw.shape[1] < 10:
+                st.error(f"Jumlah kolom kurang dari 10. Dibutuhkan kolom A..J ({AJ_LAYOUT}).")
+            else:
+                out, dropped = map_aj_columns(df_raw)
+                if dropped > 0:
+                    st.warning(f"{dropped} baris dibuang karena tanggal tidak valid (harus dd-mm-yy).")
+
+                _commit(out)
+                if not append_mode:
+                    try:
+                        CLEANED_PATH.parent.mkdir(exist_ok=True)
+                        out.to_parquet(CLEANED_PATH, index=False)
+                    except Exception:
+                        pass
+                df_preview = out
+
+with st.expander("📂 Folder drop (append otomatis)"):
+    pending = pending_drop_files()
+    watch = f"dipantau tiap {DROP_WATCH_SECONDS:g} detik" if DROP_WATCH_SECONDS > 0 else "tidak dipantau otomatis (LOGAN_DROP_WATCH_SECONDS)"
+    st.caption(f"Folder: {DROP_DIR} · {len(pending)} file menunggu · {watch}")
+    if st.button("Proses folder drop sekarang", disabled=not pending):
+        with st.spinner("Memproses file di folder drop..."):
+            reports = process_drop_folder()
+        reload_from_store()
+        st.dataframe(pd.DataFrame(reports))
 
 st.markdown("### Data Penjualan Historis")
-df_session = load_df()
+ds = load_dataset()
+df_session = ds.df if ds is not None else None
 
 if df_session is None and df_preview is None:
     st.warning("Belum ada data. Unggah file real kamu di atas.")
 else:
     df_show = df_preview if df_preview is not None else df_session
+    # Kolom bantu dataset kanonik (_profit_unit, _profit_total) tidak ikut ditampilkan/diekspor.
+    df_show = df_show[[c for c in df_show.columns if not str(c).startswith("_")]]
     tmp = df_show.head(500).reset_index(drop=True)
     tmp.index = tmp.index + 1
     st.dataframe(tmp)
@@ -143,9 +151,21 @@ else:
             clear_data()
             st.success("Data dihapus dari sesi.")
     with c2:
-        st.download_button(
-            "⬇️ Export Data (CSV)",
-            data=df_show.to_csv(index=False).encode("utf-8"),
-            file_name="data_penjualan_clean.csv",
-            mime="text/csv"
-        )
+        if ds is not None:
+            with st.expander("⬇️ Export Data"):
+                fmt = st.radio("Format", list(FORMATS), horizontal=True,
+                               help="Parquet / Arrow IPC jauh lebih kecil & cepat dibaca pandas, pyarrow, DuckDB.")
+                produk_exp = st.multiselect("Produk (kosong = semua)", ds.products)
+                tmin, tmax = ds.frame["Tanggal"].min().date(), ds.frame["Tanggal"].max().date()
+                rentang = st.date_input("Rentang tanggal", value=(tmin, tmax), min_value=tmin, max_value=tmax)
+                start, end = rentang if len(rentang) == 2 else (rentang[0], rentang[0])
+                # File baru dibuat saat tombol diklik (utils/export.py), bukan di setiap rerun.
+                st.download_button(
+                    f"⬇️ Export Data ({fmt})",
+                    data=lazy_export(ds, fmt, produk_exp, start, end),
+                    file_name=export_filename(fmt),
+                    mime=FORMATS[fmt][1],
+                    on_click="ignore",
+                )
+
+end_page_timing()
@@ -1,21 +1,25 @@
 import streamlit as st
 import pandas as pd
-from utils.common import guard_login, load_df
-from utils.model_infer import predict_with_lstm_for_product
-from utils.ui import render_header, sidebar_brand
+import altair as alt
+from utils.common import guard_login, load_dataset
+from utils.downsample import for_chart
+from utils.model_infer import predict_with_lstm_for_product, predict_scenario_grid
+from utils.ui import render_header, sidebar_brand, begin_page_timing, end_page_timing
 
+begin_page_timing("Prediksi Penjualan")
 sidebar_brand()
 render_header("Prediksi Penjualan", "Baseline vs Scenario Simulation")
 
 guard_login()
 st.title("📈 Prediksi Penjualan Per Item")
 
-df = load_df()
-if df is None:
+ds = load_dataset()
+if ds is None:
     st.info("Belum ada data. Upload dataset di halaman **Data Penjualan** terlebih dahulu.")
     st.stop()
 
-produk_list = sorted(df["Nama Produk"].dropna().unique().tolist())
+df = ds.df
+produk_list = ds.products
 
 col1, col2 = st.columns([2,1])
 with col1:
@@ -51,19 +55,16 @@ with col_s2:
 
 if st.button("🚀 Generate Prediksi", type="primary"):
     try:
-        sub = df[df["Nama Produk"] == produk].copy()
-        sub["Tanggal"] = pd.to_datetime(sub["Tanggal"], errors="coerce")
-        sub = sub.dropna(subset=["Tanggal"]).sort_values("Tanggal")
-        daily = sub.groupby("Tanggal")["Jumlah Terjual"].sum()
-        monthly = daily.resample("MS").sum()
+        # Bulanan per produk dari kubus agregat (utils/cube.py), tanpa memindai baris transaksi.
+        monthly = ds.cube.series("month", products=[produk], fill=True).rename_axis("Tanggal")
 
         last_month = monthly.index.max() if len(monthly) else pd.Timestamp.today().normalize()
         future_index = pd.date_range((last_month + pd.offsets.MonthBegin(1)), periods=horizon, freq="MS")
 
-        yhat_base = predict_with_lstm_for_product(df, produk, horizon)
+        yhat_base = predict_with_lstm_for_product(ds.frame, produk, horizon)
         promo_param = promo_choice
         holi_param = int(holi_choice) if holi_choice is not None else None
-        yhat_scn = predict_with_lstm_for_product(df, produk, horizon, promo_code=promo_param, holi_code=holi_param)
+        yhat_scn = predict_with_lstm_for_product(ds.frame, produk, horizon, promo_code=promo_param, holi_code=holi_param)
 
         pred_df = pd.DataFrame({
             "Periode": future_index,
@@ -89,9 +90,61 @@ if st.button("🚀 Generate Prediksi", type="primary"):
                     "Periode": last12_df["Label"],
                     "Actual": last12_df["Jumlah Terjual"].astype(int)
                 })
-                st.line_chart(chart_a.set_index("Periode"))
+                st.line_chart(for_chart(chart_a.set_index("Periode")))
         with tab2:
             chart_f = pred_df.set_index("Label")[["Baseline","Skenario"]]
-            st.line_chart(chart_f)
+            st.line_chart(for_chart(chart_f))
     except Exception as e:
         st.error(f"Gagal membuat prediksi: {e}")
+
+st.divider()
+st.subheader("🧮 Grid Skenario Promo × Holiday")
+st.caption("Semua kombinasi promo (tanpa promo, A–D) × holiday (tanpa holiday, 1–4) "
+           "untuk produk dan horizon yang dipilih di atas.")
+
+if st.button("🧮 Hitung Grid Skenario"):
+    try:
+        grid = predict_scenario_grid(ds.frame, produk, horizon)
+        promo_label = {v: k for k, v in promo_options.items()}
+        holi_label = {(int(v) if v is not None else None): k for k, v in holiday_options.items()}
+        month_cols = [c for c in grid.columns if c not in ("Promo", "Holiday")]
+
+        cells = pd.DataFrame({
+            "Promo": [promo_label[c] for c in grid["Promo"]],
+            "Holiday": [holi_label[c] for c in grid["Holiday"]],
+            "Total": grid[month_cols].sum(axis=1).astype(int),
+        })
+        baseline_total = int(cells["Total"].iloc[0]) if len(cells) else 0
+        cells["Δ vs Baseline (%)"] = (
+            (cells["Total"] - baseline_total) / baseline_total * 100.0 if baseline_total else 0.0
+        )
+
+        st.success(f"Grid {len(cells)} skenario untuk {produk} — total {horizon} bulan")
+        heat = (
+            alt.Chart(cells)
+            .mark_rect()
+            .encode(
+                x=alt.X("Holiday:N", title="Skenario Holiday", sort=list(holiday_options.keys())),
+                y=alt.Y("Promo:N", title="Skenario Promo", sort=list(promo_options.keys())),
+                color=alt.Color("Total:Q", title=f"Total {horizon} bulan", scale=alt.Scale(scheme="blues")),
+                tooltip=["Promo:N", "Holiday:N", "Total:Q", alt.Tooltip("Δ vs Baseline (%):Q", format=".1f")],
+            )
+        )
+        labels = heat.mark_text(baseline="middle").encode(text="Total:Q", color=alt.value("#111827"))
+        st.altair_chart((heat + labels).properties(height=320), use_container_width=True)
+
+        tbl_grid = cells.pivot(index="Promo", columns="Holiday", values="Total")
+        tbl_grid = tbl_grid.reindex(index=list(promo_options.keys()), columns=list(holiday_options.keys()))
+        st.dataframe(tbl_grid)
+
+        with st.expander("Detail per bulan untuk semua skenario"):
+            detail = grid[month_cols].copy()
+            detail.columns = [pd.Timestamp(c).strftime("%Y-%m") for c in month_cols]
+            detail.insert(0, "Holiday", cells["Holiday"])
+            detail.insert(0, "Promo", cells["Promo"])
+            detail.index = detail.index + 1
+            st.dataframe(detail)
+    except Exception as e:
+        st.error(f"Gagal membuat grid skenario: {e}")
+
+end_page_timing()
@@ -1,8 +1,11 @@
 import streamlit as st
-from utils.common import guard_login
+from utils.common import guard_login, is_admin, load_df
 from pathlib import Path
 import pandas as pd
 import json
+from utils import dataset_store
+from utils import jobs
+from utils.dataset import shared_stats
 from utils.ui import render_header, sidebar_brand
 
 sidebar_brand()
@@ -45,17 +48,46 @@ with c3:
             a.metric("MAE", m.get("MAE", "-"))
             b.metric("RMSE", m.get("RMSE", "-"))
             c.metric("MAPE", f"{m.get('MAPE', '-') }%")
+            if "generated_at" in m:
+                st.caption(f"Backtest {m['generated_at']}: {m.get('n_products')} produk × "
+                           f"{m.get('n_origins')} origin, horizon {m.get('horizon')} bulan "
+                           f"({m.get('n_points')} titik).")
         except Exception as e:
             st.warning(f"Gagal membaca reports/metrics.json: {e}")
     else:
         st.info("reports/metrics.json belum tersedia.")
 
+    df_session = load_df()
+    if is_admin() and df_session is not None:
+        if st.button("🔁 Hitung ulang metrik (backtest rolling-origin)"):
+            from utils.backtest import run_backtest, write_metrics
+            with st.spinner("Menjalankan backtest semua produk..."):
+                try:
+                    write_metrics(run_backtest(df_session, horizon=3))
+                    st.success("reports/metrics.json diperbarui.")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Backtest gagal: {e}")
+
 with c4:
     st.subheader("Data")
     cleaned = Path("data/cleaned.parquet")
     sample_csv = Path("data/sample_sales.csv")
     st.write(f"Data dibersihkan: {'✅' if cleaned.exists() else '❌'} **data/cleaned.parquet**")
     st.write(f"Contoh CSV: {'✅' if sample_csv.exists() else '❌'} **data/sample_sales.csv**")
+    store_meta = dataset_store.manifest()
+    st.write(f"Dataset tersimpan: {'✅' if store_meta else '❌'} **{dataset_store.STORE_DIR}**")
+    if store_meta:
+        st.caption(f"{store_meta['rows']:,} baris · {len(store_meta['months'])} partisi bulan · "
+                   f"versi {store_meta['version']} · ditulis {store_meta['written_at']}")
+    shared = shared_stats()
+    st.caption(f"Dataset bersama di proses ini: {len(shared['versions'])}/{shared['max_versions']} versi · "
+               f"{shared['rows']:,} baris · {shared['bytes'] / 1e6:.1f} MB · kubus agregat "
+               f"{shared['cube_rows']:,} baris harian · {shared['cube_bytes'] / 1e6:.2f} MB")
+    job_rows = jobs.job_table()
+    if job_rows:
+        with st.expander(f"Job latar belakang ({len(job_rows)})"):
+            st.dataframe(pd.DataFrame(job_rows))
     if cleaned.exists():
         try:
             df_info = pd.read_parquet(cleaned)
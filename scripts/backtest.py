@@ -0,0 +1,49 @@
+"""Backtest rolling-origin model bulanan dan tulis hasilnya ke reports/metrics.json.
+
+Metrik agregat (MAE, RMSE, MAPE, sMAPE, WAPE) tetap di level teratas file sehingga
+Dashboard dan halaman About langsung membaca angka terbaru.
+
+    python scripts/backtest.py [--data data/cleaned.parquet] [--horizon 3] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+warnings.filterwarnings("ignore")
+
+from utils.backtest import METRICS_PATH, run_backtest, write_metrics  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="data/cleaned.parquet", help=".parquet atau .csv (skema internal)")
+    ap.add_argument("--horizon", type=int, default=3)
+    ap.add_argument("--max-origins", type=int, default=None, help="hanya N origin terakhir")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out", default=str(METRICS_PATH))
+    ap.add_argument("--dry-run", action="store_true", help="cetak metrik tanpa menulis file")
+    args = ap.parse_args()
+
+    data = Path(args.data)
+    df = pd.read_parquet(data) if data.suffix == ".parquet" else pd.read_csv(data, parse_dates=["Tanggal"])
+    metrics = run_backtest(df, horizon=args.horizon, max_origins=args.max_origins, max_workers=args.workers)
+
+    print(f"{metrics['n_products']} produk × {metrics['n_origins']} origin → {metrics['n_points']} titik "
+          f"({metrics['seconds']:.1f}s, {metrics['workers']} worker)")
+    for k in ["MAE", "RMSE", "MAPE", "sMAPE", "WAPE"]:
+        print(f"  {k:<6} {metrics[k]}")
+    if not args.dry_run:
+        write_metrics(metrics, Path(args.out))
+        print(f"→ {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Micro-benchmark pipeline forecasting pada data sintetis A..J (scripts/synth_sales.py).
+
+Mengukur parsing upload, agregasi bulanan, fitur, prediksi LSTM, dan jalur KPI Dashboard
+pada beberapa ukuran katalog. Hasil ditambahkan ke reports/bench_pipeline.jsonl; digest
+output tiap fungsi dibandingkan dengan reports/bench_golden.json supaya jalur yang lebih
+cepat terbukti menghasilkan angka yang sama.
+
+    python scripts/bench_pipeline.py [--sizes 10 100 1000] [--years 1] [--tx-per-day 1.0]
+    python scripts/bench_pipeline.py --update-golden     # simpan digest acuan dari tree ini
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+os.chdir(ROOT)
+# Forecast store sementara: setiap run harus menghitung ulang, bukan membaca cache.
+os.environ["LOGAN_FORECAST_STORE_DIR"] = tempfile.mkdtemp(prefix="bench_store_")
+warnings.filterwarnings("ignore")
+
+from synth_sales import generate_aj_sales  # noqa: E402
+from utils.cleaning import map_aj_columns, parse_tanggal, to_int_series  # noqa: E402
+from utils.common import compute_basic_metrics  # noqa: E402
+from utils.feature_store import MonthlyFeatureStore  # noqa: E402
+from utils.kpi import add_profit_columns, compute_kpi  # noqa: E402
+from utils import model_infer  # noqa: E402
+
+LOG_PATH = ROOT / "reports" / "bench_pipeline.jsonl"
+GOLDEN_PATH = ROOT / "reports" / "bench_golden.json"
+
+
+def digest(obj) -> str:
+    """Digest stabil untuk DataFrame/Series/array/skalar (float dibulatkan 6 desimal)."""
+    h = hashlib.sha1()
+
+    def feed(o):
+        if isinstance(o, pd.DataFrame):
+            h.update(json.dumps([str(c) for c in o.columns]).encode())
+            for c in o.columns:
+                feed(o[c])
+            feed(o.index)
+        elif isinstance(o, (pd.Series, pd.Index)):
+            v = o.to_numpy()
+            if v.dtype.kind == "f":
+                v = np.round(v, 6)
+            h.update(pd.util.hash_array(np.asarray(v, dtype=object) if v.dtype.kind == "M" else v).tobytes())
+        elif isinstance(o, np.ndarray):
+            feed(pd.Series(o.ravel()))
+        elif isinstance(o, dict):
+            for k in sorted(o):
+                h.update(str(k).encode())
+                feed(o[k])
+        elif isinstance(o, (list, tuple)):
+            for v in o:
+                feed(v)
+        elif isinstance(o, float):
+            h.update(f"{o:.6f}".encode())
+        else:
+            h.update(repr(o).encode())
+
+    feed(obj)
+    return h.hexdigest()[:16]
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def timed(fn, repeat: int):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def run_size(n_products: int, args) -> dict:
+    raw = generate_aj_sales(n_products, args.years, args.tx_per_day, seed=args.seed)
+    df, _ = map_aj_columns(raw)
+    products = sorted(df["Nama Produk"].unique())
+    sample = products[:args.predict_sample]
+    by_prod = {p: g for p, g in df.groupby("Nama Produk", sort=False)}
+    lags = model_infer._NSTEPS or 6
+    r = args.repeat
+    res = {}
+
+    def record(name, fn, repeat=r, **extra):
+        sec, out = timed(fn, repeat)
+        res[name] = {"seconds": sec, "digest": digest(out), **extra}
+        return out
+
+    record("parse_tanggal", lambda: parse_tanggal(raw["Tanggal"]), rows=len(raw))
+    record("to_int_series", lambda: [to_int_series(raw[c]) for c in ["Harga", "Keuntungan/Unit", "Jumlah"]])
+    record("map_aj_columns", lambda: map_aj_columns(raw)[0])
+    record("compute_basic_metrics", lambda: compute_basic_metrics(df))
+    monthly = record("_to_monthly", lambda: {p: model_infer._to_monthly(g) for p, g in by_prod.items()})
+    record("_build_features", lambda: {p: model_infer._build_features(*m, lags=lags) for p, m in monthly.items()})
+    record("feature_store_build", lambda: MonthlyFeatureStore.build(df).panel(lags))
+    # Prediksi: salinan df baru per pengulangan supaya memo feature store per-frame tidak dipakai ulang.
+    record("predict_with_lstm_for_product",
+           lambda: [model_infer.predict_with_lstm_for_product(df.copy(), p, args.horizon) for p in sample],
+           repeat=1, products=len(sample))
+
+    def kpi_path():
+        d = df.copy()
+        add_profit_columns(d)
+        mat = model_infer.predict_all_products(d, products, args.horizon)
+        return compute_kpi(d, mat)
+
+    record("dashboard_kpi", kpi_path, repeat=1, products=len(products))
+    return {"rows": len(raw), "products": len(products), "results": res}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--years", type=int, default=1)
+    ap.add_argument("--tx-per-day", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--horizon", type=int, default=12)
+    ap.add_argument("--predict-sample", type=int, default=5, help="jumlah produk untuk predict_with_lstm_for_product")
+    ap.add_argument("--update-golden", action="store_true")
+    ap.add_argument("--no-log", action="store_true")
+    args = ap.parse_args()
+
+    model_infer._load_artifacts()
+    golden = json.loads(GOLDEN_PATH.read_text(encoding="utf-8")) if GOLDEN_PATH.exists() else {}
+    gen_key = f"y{args.years}_t{args.tx_per_day}_s{args.seed}_h{args.horizon}_k{args.predict_sample}"
+    mismatches = 0
+    record = {
+        "git": _git_rev(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "backend": model_infer.INFER_BACKEND,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "generator": gen_key,
+        "sizes": {},
+    }
+
+    for n in args.sizes:
+        out = run_size(n, args)
+        record["sizes"][str(n)] = out
+        print(f"== {n} produk, {out['rows']:,} baris")
+        ref = golden.get(gen_key, {}).get(str(n), {})
+        for name, r in out["results"].items():
+            status = ""
+            if name in ref:
+                ok = ref[name] == r["digest"]
+                mismatches += not ok
+                status = "ok" if ok else f"BEDA (golden {ref[name]})"
+            print(f"  {name:<32} {r['seconds']:>9.4f}s  {r['digest']}  {status}")
+        if args.update_golden:
+            golden.setdefault(gen_key, {})[str(n)] = {k: v["digest"] for k, v in out["results"].items()}
+
+    if args.update_golden:
+        GOLDEN_PATH.parent.mkdir(parents=True, exist_ok=True)
+        GOLDEN_PATH.write_text(json.dumps(golden, indent=1, sort_keys=True), encoding="utf-8")
+        print(f"golden disimpan ke {GOLDEN_PATH}")
+    if not args.no_log:
+        LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with LOG_PATH.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    if mismatches:
+        print(f"{mismatches} output berbeda dari golden.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
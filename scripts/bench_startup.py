@@ -0,0 +1,114 @@
+"""Benchmark cold-start: waktu import, load artefak, dan forecast pertama.
+
+Setiap pengukuran berjalan di interpreter baru (cold) dengan forecast store sementara,
+lalu hasilnya ditambahkan ke reports/bench_startup.jsonl agar regresi terlihat.
+
+    python scripts/bench_startup.py [--backend numpy keras] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+LOG_PATH = ROOT / "reports" / "bench_startup.jsonl"
+
+_CHILD = r"""
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+import pandas as pd
+from utils import model_infer
+t_import = time.perf_counter() - t0
+t1 = time.perf_counter()
+model_infer._load_artifacts()
+t_load = time.perf_counter() - t1
+df = pd.read_parquet(sys.argv[1])
+product = sorted(df["Nama Produk"].dropna().unique())[0]
+t2 = time.perf_counter()
+model_infer.predict_with_lstm_for_product(df, product, 12)
+t_first = time.perf_counter() - t2
+print(json.dumps({
+    "import_s": t_import,
+    "load_artifacts_s": t_load,
+    "first_forecast_s": t_first,
+    "total_s": time.perf_counter() - t0,
+    "tensorflow_loaded": "tensorflow" in sys.modules,
+}))
+"""
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def _measure(backend: str, data_path: Path) -> dict:
+    with tempfile.TemporaryDirectory() as store_dir:
+        env = dict(os.environ, LOGAN_INFER_BACKEND=backend, LOGAN_FORECAST_STORE_DIR=store_dir,
+                   TF_CPP_MIN_LOG_LEVEL="3")
+        out = subprocess.run([sys.executable, "-c", _CHILD, str(data_path)], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _previous(backend: str) -> dict | None:
+    if not LOG_PATH.exists():
+        return None
+    last = None
+    for line in LOG_PATH.read_text(encoding="utf-8").splitlines():
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        if rec.get("backend") == backend:
+            last = rec
+    return last
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", nargs="+", default=["numpy", "keras"])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--data", default=str(ROOT / "data" / "cleaned.parquet"))
+    ap.add_argument("--no-log", action="store_true")
+    args = ap.parse_args()
+
+    for backend in args.backend:
+        try:
+            runs = [_measure(backend, Path(args.data)) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            print(f"{backend}: gagal\n{e.stderr.strip()[-400:]}")
+            continue
+        # Median per metrik supaya satu run yang lambat tidak mendominasi.
+        rec = {k: sorted(r[k] for r in runs)[len(runs) // 2] for k in runs[0] if k.endswith("_s")}
+        rec.update({
+            "backend": backend,
+            "tensorflow_loaded": runs[0]["tensorflow_loaded"],
+            "repeat": args.repeat,
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        prev = _previous(backend)
+        print(f"[{backend}] " + "  ".join(f"{k}={rec[k]:.3f}" for k in rec if k.endswith("_s")))
+        if prev:
+            delta = rec["total_s"] - prev["total_s"]
+            print(f"  vs {prev['git']}: total {delta:+.3f}s")
+        if not args.no_log:
+            LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with LOG_PATH.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Cek paritas output mesin NumPy (utils/lstm_numpy.py) terhadap Keras.
+
+Jalankan dari root repo:
+    python scripts/check_lstm_parity.py [--atol 1e-4] [--batch 64]
+
+Keluar dengan kode 1 bila ada model yang selisihnya melebihi toleransi.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils.lstm_numpy import load_h5  # noqa: E402
+
+
+def _model_paths():
+    yield ROOT / "models" / "best_model_fixed.h5"
+    yield from sorted((ROOT / "weekly_models").glob("model_*.h5"))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--atol", type=float, default=1e-4)
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    rng = np.random.default_rng(args.seed)
+    failed = 0
+    for path in _model_paths():
+        if not path.exists():
+            continue
+        np_model = load_h5(path)
+        keras_model = load_model(str(path), compile=False)
+        steps, feats = np_model.input_shape
+        x = rng.normal(size=(args.batch, steps, feats)).astype(np.float32)
+        y_np = np_model.predict(x)
+        y_keras = np.asarray(keras_model.predict(x, verbose=0))
+        diff = float(np.max(np.abs(y_np - y_keras)))
+        ok = y_np.shape == y_keras.shape and diff <= args.atol
+        failed += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {path.relative_to(ROOT)}  max|diff|={diff:.2e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
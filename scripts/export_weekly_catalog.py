@@ -0,0 +1,131 @@
+"""Ekspor weekly_models/*.h5 + scaler .pkl ke katalog flat memory-mapped.
+
+Hasil: weekly_models/catalog.bin (semua bobot & scaler) dan weekly_models/catalog.json
+(indeks offset, konfigurasi layer, mtime & ukuran artefak sumber, dan selisih akurasi).
+Registry model mingguan otomatis memakai katalog bila mtime & ukuran sumber masih cocok.
+
+    python scripts/export_weekly_catalog.py [--float16] [--samples 256]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+from utils.lstm_numpy import NumpyLSTMModel, build_layers, read_h5_config  # noqa: E402
+from utils.weekly_catalog import (  # noqa: E402
+    CATALOG_BIN, CATALOG_DIR, CATALOG_INDEX, FORMAT_VERSION, CatalogWriter, scaler_arrays, source_stat,
+)
+
+
+def _read_h5(path: Path):
+    import h5py
+
+    with h5py.File(str(path), "r") as h5:
+        config = read_h5_config(h5)
+        mw = h5["model_weights"] if "model_weights" in h5 else h5
+        layer_configs = config["config"]["layers"]
+        weights = {}
+        for spec in layer_configs:
+            name = spec["config"]["name"]
+            if name not in mw:
+                continue
+            g = mw[name]
+            names = [n.decode() if isinstance(n, bytes) else n for n in g.attrs.get("weight_names", [])]
+            weights[name] = [(n, np.asarray(g[n])) for n in names]
+    first = layer_configs[0]["config"] if layer_configs else {}
+    shape = first.get("batch_shape") or first.get("batch_input_shape")
+    return layer_configs, weights, (list(shape[1:]) if shape else None)
+
+
+def _model(layer_configs, weights, input_shape, dtype):
+    def weights_for(name):
+        pairs = weights.get(name, [])
+        return [n for n, _ in pairs], [w.astype(dtype).astype(np.float32) for _, w in pairs]
+    return NumpyLSTMModel(build_layers(layer_configs, weights_for), input_shape=input_shape)
+
+
+def main() -> int:
+    import joblib
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--float16", action="store_true", help="simpan bobot sebagai float16")
+    ap.add_argument("--samples", type=int, default=256, help="jumlah window acak untuk cek akurasi")
+    args = ap.parse_args()
+    weight_dtype = np.float16 if args.float16 else np.float32
+
+    models = sorted(CATALOG_DIR.glob("model_*.h5"))
+    bin_path, idx_path = CATALOG_DIR / CATALOG_BIN, CATALOG_DIR / CATALOG_INDEX
+    tmp_bin, tmp_idx = bin_path.with_suffix(".bin.tmp"), idx_path.with_suffix(".json.tmp")
+    rng = np.random.default_rng(0)
+    products = {}
+
+    with tmp_bin.open("wb") as f:
+        writer = CatalogWriter(f, weight_dtype)
+        for model_path in models:
+            clean_name = model_path.stem[len("model_"):]
+            scaler_path = CATALOG_DIR / f"scaler_{clean_name}.pkl"
+            if not scaler_path.exists():
+                print(f"[skip] {clean_name}: scaler tidak ada")
+                continue
+            try:
+                kind, sc_arrays = scaler_arrays(joblib.load(str(scaler_path)))
+                layer_configs, weights, input_shape = _read_h5(model_path)
+                ref = _model(layer_configs, weights, input_shape, np.float32)
+                cat = _model(layer_configs, weights, input_shape, weight_dtype)
+            except (ValueError, NotImplementedError, KeyError) as e:
+                print(f"[skip] {clean_name}: {e}")
+                continue
+
+            # Selisih akurasi pada window acak di rentang fitur ter-scale [0, 1].
+            x = rng.random((args.samples, *(input_shape or [12, 12])), dtype=np.float32)
+            delta = np.abs(ref.predict(x).ravel() - cat.predict(x).ravel())
+            y_scale = float(sc_arrays["scale_"][0])
+
+            products[clean_name] = {
+                "source_stat": source_stat(model_path, scaler_path),
+                "layers": layer_configs,
+                "input_shape": input_shape,
+                "weights": {
+                    layer: [{"name": n, **writer.add(w)} for n, w in pairs]
+                    for layer, pairs in weights.items()
+                },
+                "scaler": {
+                    "kind": kind,
+                    "arrays": {n: writer.add(a, dtype=np.float64) for n, a in sc_arrays.items()},
+                },
+                "accuracy": {
+                    "samples": args.samples,
+                    "max_abs_delta_scaled": float(delta.max()),
+                    "mean_abs_delta_scaled": float(delta.mean()),
+                    "max_abs_delta_units": float(delta.max() / y_scale) if kind == "minmax" else None,
+                },
+            }
+            acc = products[clean_name]["accuracy"]
+            print(f"[ok] {clean_name}: max |delta| {acc['max_abs_delta_scaled']:.2e} (scaled)")
+        total = writer.offset
+
+    index = {
+        "format": FORMAT_VERSION,
+        "weight_dtype": np.dtype(weight_dtype).name,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "bytes": total,
+        "products": products,
+    }
+    tmp_idx.write_text(json.dumps(index, indent=1), encoding="utf-8")
+    os.replace(tmp_bin, bin_path)
+    os.replace(tmp_idx, idx_path)
+    src = sum(p.stat().st_size for p in models)
+    print(f"{len(products)} produk → {bin_path} ({total / 1024:.0f} KB; sumber h5 {src / 1024:.0f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Generator data penjualan sintetis dengan layout upload A..J halaman Data Penjualan.
+
+A=Kode Barang, B=Nama, C=Harga, D=Keuntungan/Unit, E=Keuntungan Total, F=Jumlah,
+G=Tanggal (dd-mm-yy), H=Brand, I=Promotion, J=Holiday. Hasil deterministik untuk seed yang sama.
+
+    python scripts/synth_sales.py --products 100 --years 2 --tx-per-day 1.5 --out data/synth_100.csv
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+AJ_COLUMNS = ["Kode Barang", "Nama Barang", "Harga", "Keuntungan/Unit", "Keuntungan Total",
+              "Jumlah", "Tanggal", "Brand", "Promotion", "Holiday"]
+
+_PREFIXES = ["Airsoft Gun", "Airsoft Gun", "Airsoft Gun", "BB Peluru", "Magazine", "Gas Green", "Operator Vest"]
+_MODELS = ["AK47", "M4A1", "MP5", "Glock 17", "UMP45", "SCAR-L", "P90", "Desert Eagle", "0.25g", "0.28g"]
+_BRANDS = ["Logan Tactical", "Cyma", "Tokyo Marui", "G&G", "Specna Arms"]
+# Bulan → kode holiday (mengikuti event di Dashboard: Tahun Baru, Idul Fitri, HUT RI, Natal).
+_HOLIDAY_MONTHS = {1: 1, 4: 2, 8: 3, 12: 4}
+
+
+def _rupiah(values: np.ndarray) -> np.ndarray:
+    return np.array([f"Rp {v:,}".replace(",", ".") for v in values.tolist()], dtype=object)
+
+
+def product_catalog(n_products: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = np.arange(n_products)
+    names = [f"{_PREFIXES[i % len(_PREFIXES)]} {_MODELS[(i // len(_PREFIXES)) % len(_MODELS)]} {i + 1:04d}"
+             for i in idx]
+    harga = rng.integers(50, 8000, size=n_products) * 1000
+    margin = rng.uniform(0.08, 0.35, size=n_products)
+    return pd.DataFrame({
+        "Kode Barang": idx + 1,
+        "Nama Barang": names,
+        "Harga": harga,
+        "Keuntungan/Unit": np.round(harga * margin, -2).astype(np.int64),
+        "Brand": [_BRANDS[i % len(_BRANDS)] for i in idx],
+        "base_rate": rng.gamma(2.0, 0.5, size=n_products),
+    })
+
+
+def generate_aj_sales(n_products: int = 10, years: int = 1, tx_per_day: float = 1.0,
+                      start: str = "2021-01-01", seed: int = 0, formatted: bool = True) -> pd.DataFrame:
+    """Transaksi sintetis: tiap produk-hari punya Poisson(tx_per_day × laju produk × musiman) baris."""
+    rng = np.random.default_rng(seed)
+    cat = product_catalog(n_products, seed)
+    days = pd.date_range(start, periods=int(round(365.25 * years)), freq="D")
+
+    season = 1.0 + 0.35 * np.sin(2 * np.pi * (days.month.values - 3) / 12)
+    season = season * np.where(np.isin(days.month.values, list(_HOLIDAY_MONTHS)), 1.4, 1.0)
+    lam = tx_per_day * np.outer(cat["base_rate"].values, season)
+    counts = rng.poisson(lam).ravel()
+
+    p_idx = np.repeat(np.repeat(np.arange(n_products), len(days)), counts)
+    d_idx = np.repeat(np.tile(np.arange(len(days)), n_products), counts)
+    order = np.argsort(d_idx, kind="stable")  # urut per tanggal, seperti ekspor kasir
+    p_idx, d_idx = p_idx[order], d_idx[order]
+    n = len(p_idx)
+    qty = rng.integers(1, 6, size=n)
+    dates = days[d_idx]
+
+    promo = np.full(n, "nan", dtype=object)
+    has_promo = rng.random(n) < 0.06
+    promo[has_promo] = rng.choice(["A", "B", "C", "D"], size=int(has_promo.sum()))
+    holi_code = pd.Series(dates.month).map(_HOLIDAY_MONTHS).to_numpy(dtype=float)
+    holiday = np.where(rng.random(n) < 0.5, holi_code, np.nan)
+
+    harga = cat["Harga"].values
+    untung = cat["Keuntungan/Unit"].values
+    if formatted:
+        # Format per produk (dan per qty untuk total), lalu diindeks: jauh lebih cepat dari per baris.
+        total_tab = _rupiah((untung[:, None] * np.arange(6)[None, :]).ravel()).reshape(n_products, 6)
+        harga_col, untung_col = _rupiah(harga)[p_idx], _rupiah(untung)[p_idx]
+        total_col = total_tab[p_idx, qty]
+    else:
+        harga_col, untung_col, total_col = harga[p_idx], untung[p_idx], untung[p_idx] * qty
+    out = pd.DataFrame({
+        "Kode Barang": cat["Kode Barang"].values[p_idx],
+        "Nama Barang": cat["Nama Barang"].values[p_idx],
+        "Harga": harga_col,
+        "Keuntungan/Unit": untung_col,
+        "Keuntungan Total": total_col,
+        "Jumlah": qty,
+        "Tanggal": days.strftime("%d-%m-%y").values[d_idx],
+        "Brand": cat["Brand"].values[p_idx],
+        "Promotion": promo,
+        "Holiday": holiday,
+    })
+    return out[AJ_COLUMNS]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--products", type=int, default=10)
+    ap.add_argument("--years", type=int, default=1)
+    ap.add_argument("--tx-per-day", type=float, default=1.0)
+    ap.add_argument("--start", default="2021-01-01")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", required=True, help=".csv atau .xlsx")
+    args = ap.parse_args()
+
+    df = generate_aj_sales(args.products, args.years, args.tx_per_day, args.start, args.seed)
+    if args.out.lower().endswith((".xlsx", ".xls")):
+        df.to_excel(args.out, index=False)
+    else:
+        df.to_csv(args.out, index=False)
+    print(f"{len(df):,} baris, {args.products} produk → {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import forecast_store, model_infer
+from utils.feature_store import HOLI_KEYS, PROMO_KEYS, MonthlyFeatureStore
+
+# Backtest rolling-origin model bulanan: untuk setiap bulan origin, semua produk yang punya
+# fitur valid diprediksi bersama (satu predict per langkah horizon), lalu dibandingkan dengan
+# penjualan aktual bulan-bulan berikutnya. Origin dibagi ke process pool.
+
+METRICS_PATH = Path("reports/metrics.json")
+_MA = 3
+
+# State worker (diisi initializer; pada fork juga dipakai langsung oleh proses induk).
+_W: dict = {}
+
+
+def default_workers() -> int:
+    env = os.environ.get("LOGAN_BACKTEST_WORKERS")
+    if env:
+        return max(1, int(env))
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def _init_worker(store: MonthlyFeatureStore, horizon: int) -> None:
+    model_infer._load_artifacts()
+    _W["store"] = store
+    _W["horizon"] = horizon
+    _W["panel"] = store.panel(model_infer._NSTEPS, _MA)
+
+
+def _origin_inputs(store: MonthlyFeatureStore, pnl: dict, m: int):
+    """Fitur mentah (n, F), ekor histori y, panjang histori, dan indeks produk yang valid di origin m."""
+    n_steps = model_infer._NSTEPS
+    idx = np.flatnonzero(pnl["valid"][:, m])
+    cols = model_infer._feature_cols()
+    X = np.zeros((len(idx), len(cols)), dtype=float)
+    for j, c in enumerate(cols):
+        if c == "month_sin":
+            X[:, j] = pnl["month_sin"][m]
+        elif c == "month_cos":
+            X[:, j] = pnl["month_cos"][m]
+        elif c.startswith("lag") and c[3:].isdigit() and int(c[3:]) <= n_steps:
+            X[:, j] = pnl["lags"][idx, m, int(c[3:]) - 1]
+        elif c == f"ma{_MA}":
+            X[:, j] = pnl["ma"][idx, m]
+        elif c.startswith("promo") and c[5:] in PROMO_KEYS:
+            X[:, j] = pnl["promo"][idx, m, PROMO_KEYS.index(c[5:])]
+        elif c.startswith("holi") and c[4:].isdigit() and int(c[4:]) in HOLI_KEYS:
+            X[:, j] = pnl["holi"][idx, m, HOLI_KEYS.index(int(c[4:]))]
+    start = store.first[idx] + max(n_steps, _MA - 1)
+    L = max(n_steps, _MA)
+    tails = [store.y[p, max(int(s), m - L + 1):m + 1].tolist() for p, s in zip(idx, start)]
+    counts = (m - start + 1).tolist()
+    return idx, X, tails, counts
+
+
+def _run_origin(m: int):
+    store, pnl, horizon = _W["store"], _W["panel"], _W["horizon"]
+    idx, X, tails, counts = _origin_inputs(store, pnl, m)
+    if not len(idx):
+        return m, idx, np.zeros((0, horizon), dtype=int)
+    X0 = model_infer._SCALER.transform(X)
+    ordm = store.month0 + m + 1
+    next_month = pd.Timestamp(year=ordm // 12, month=ordm % 12 + 1, day=1)
+    preds = model_infer._rollout(X0, tails, [next_month] * len(idx), horizon,
+                                 [None] * len(idx), [None] * len(idx), counts=counts)
+    return m, idx, preds
+
+
+def eligible_origins(store: MonthlyFeatureStore, max_origins: Optional[int] = None) -> List[int]:
+    """Origin = bulan dengan minimal satu produk valid dan minimal satu bulan aktual sesudahnya."""
+    model_infer._load_artifacts()
+    pnl = store.panel(model_infer._NSTEPS, _MA)
+    M = store.y.shape[1]
+    has_target = np.arange(M)[None, :] < store.last[:, None]
+    ok = np.flatnonzero((pnl["valid"] & has_target).any(axis=0))
+    origins = ok.tolist()
+    return origins[-max_origins:] if max_origins else origins
+
+
+def _errors(actual: np.ndarray, pred: np.ndarray) -> Dict[str, Optional[float]]:
+    if not len(actual):
+        return {"MAE": None, "RMSE": None, "MAPE": None, "sMAPE": None, "WAPE": None, "n": 0}
+    err = pred - actual
+    abs_err = np.abs(err)
+    nz = actual != 0
+    denom = np.abs(actual) + np.abs(pred)
+    sm = denom != 0
+    return {
+        "MAE": round(float(abs_err.mean()), 3),
+        "RMSE": round(float(np.sqrt((err ** 2).mean())), 3),
+        "MAPE": round(float((abs_err[nz] / np.abs(actual[nz])).mean() * 100), 2) if nz.any() else None,
+        "sMAPE": round(float((2 * abs_err[sm] / denom[sm]).mean() * 100), 2) if sm.any() else None,
+        "WAPE": round(float(abs_err.sum() / np.abs(actual).sum() * 100), 2) if np.abs(actual).sum() else None,
+        "n": int(len(actual)),
+    }
+
+
+def run_backtest(df: pd.DataFrame, horizon: int = 3, max_origins: Optional[int] = None,
+                 max_workers: Optional[int] = None) -> dict:
+    """Backtest semua produk; return dict metrik (agregat, per horizon, per produk)."""
+    t0 = time.perf_counter()
+    store = MonthlyFeatureStore.build(df)
+    origins = eligible_origins(store, max_origins)
+    workers = min(max_workers or default_workers(), max(1, len(origins)))
+
+    if workers <= 1:
+        _init_worker(store, horizon)
+        results = [_run_origin(m) for m in origins]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(store, horizon)) as pool:
+            results = list(pool.map(_run_origin, origins, chunksize=max(1, len(origins) // (workers * 4))))
+
+    # Pasangan (produk, origin, langkah) yang bulan targetnya masih di dalam data produk.
+    P_idx, steps, preds, actual = [], [], [], []
+    for m, idx, pr in results:
+        if not len(idx):
+            continue
+        for k in range(horizon):
+            target = m + 1 + k
+            ok = target <= store.last[idx]
+            if not ok.any():
+                break
+            P_idx.append(idx[ok])
+            steps.append(np.full(int(ok.sum()), k + 1))
+            preds.append(pr[ok, k])
+            actual.append(store.y[idx[ok], target])
+    P_idx = np.concatenate(P_idx) if P_idx else np.zeros(0, dtype=int)
+    steps = np.concatenate(steps) if steps else np.zeros(0, dtype=int)
+    preds = np.concatenate(preds).astype(float) if preds else np.zeros(0)
+    actual = np.concatenate(actual).astype(float) if actual else np.zeros(0)
+
+    out = _errors(actual, preds)
+    n_points = out.pop("n")
+    out.update({
+        "n_points": n_points,
+        "n_products": int(len(np.unique(P_idx))),
+        "n_origins": len(origins),
+        "horizon": int(horizon),
+        "by_horizon": {str(k): _errors(actual[steps == k], preds[steps == k]) for k in range(1, horizon + 1)},
+        "per_product": {store.products[p]: _errors(actual[P_idx == p], preds[P_idx == p])
+                        for p in np.unique(P_idx)},
+        "data_fingerprint": forecast_store.data_fingerprint(df),
+        "model": forecast_store.file_checksum(model_infer.MODEL_PATH, model_infer.SCALER_PATH),
+        "backend": model_infer.INFER_BACKEND,
+        "workers": workers,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    return out
+
+
+def write_metrics(metrics: dict, path: Path = METRICS_PATH) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(metrics, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
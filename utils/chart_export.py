@@ -0,0 +1,63 @@
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable
+
+from matplotlib.figure import Figure
+
+from utils.timing import timed
+
+# Ekspor grafik PNG sesuai permintaan: figure baru dibangun & dirasterisasi hanya saat tombol
+# download diklik (data callable st.download_button), lalu hasilnya di-cache per
+# (grafik, versi dataset, parameter, dpi). Figure dibuat tanpa pyplot dan selalu ditutup,
+# jadi tidak ada figure yang tertinggal di antara rerun.
+
+PNG_CACHE_MAX = int(os.environ.get("LOGAN_PNG_CACHE_MAX", "32"))
+
+_PNG: "OrderedDict[tuple, bytes]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def close_figure(fig) -> None:
+    import matplotlib.pyplot as plt
+
+    plt.close(fig)   # no-op untuk Figure yang tidak terdaftar di pyplot
+
+
+@timed("png_export")
+def figure_png(fig, dpi: int = 200) -> bytes:
+    """Rasterisasi `fig` ke PNG lalu tutup figure-nya."""
+    buf = BytesIO()
+    try:
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    finally:
+        close_figure(fig)
+    return buf.getvalue()
+
+
+def cached_png(key: tuple, build: Callable[[], Figure], dpi: int = 200) -> bytes:
+    """PNG untuk `key` (mis. ("sales", versi dataset, ...)); `build()` hanya dipanggil saat cache miss."""
+    key = (*key, dpi)
+    with _LOCK:
+        png = _PNG.get(key)
+        if png is not None:
+            _PNG.move_to_end(key)
+            return png
+    png = figure_png(build(), dpi)
+    with _LOCK:
+        _PNG[key] = png
+        _PNG.move_to_end(key)
+        while len(_PNG) > max(1, PNG_CACHE_MAX):
+            _PNG.popitem(last=False)
+    return png
+
+
+def lazy_png(key: tuple, build: Callable[[], Figure], dpi: int = 200) -> Callable[[], bytes]:
+    """Callable untuk `data=` st.download_button: PNG baru dibuat saat diklik."""
+    return lambda: cached_png(key, build, dpi)
+
+
+def png_cache_stats() -> dict:
+    with _LOCK:
+        return {"entries": len(_PNG), "bytes": sum(len(v) for v in _PNG.values()), "max_entries": PNG_CACHE_MAX}
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from utils.timing import timed
+
+# Parsing & pemetaan kolom upload A..J (dipakai halaman Data Penjualan, Dashboard, benchmark).
+
+REQUIRED = ["Tanggal", "ID Produk", "Nama Produk", "Brand", "Kategori", "Harga", "Jumlah Terjual", "Keuntungan per unit", "Keuntungan total"]
+
+AJ_LAYOUT = "A=Kode Barang, B=Nama, C=Harga, D, E, F=Jumlah, G=Tanggal dd-mm-yy, H=Brand, I=Promotion, J=Holiday"
+
+
+def by_unique(series: pd.Series, fn) -> pd.Series:
+    """Terapkan `fn` (Series -> Series) hanya pada nilai unik lalu petakan balik dengan take integer.
+
+    Data transaksi punya sedikit tanggal/harga unik dibanding jumlah baris, jadi biaya parsing
+    mengikuti kardinalitas. Kolom object diubah ke str dulu agar 1 dan 1.0 tidak tergabung.
+    """
+    if series.dtype == object:
+        series = series.astype(str)
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    parsed = fn(pd.Series(uniques, dtype=series.dtype, name=series.name))
+    out = parsed.take(codes)
+    out.index = series.index
+    return out
+
+
+def parse_tanggal(series: pd.Series) -> pd.Series:
+    # is_numeric_dtype juga aman untuk dtype string pandas 3 (issubdtype gagal di sana).
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return pd.to_datetime(series, errors="coerce", unit="D", origin="1899-12-30")
+    if series.dtype == object:
+        series = series.astype(str)
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    # Ambang fallback tetap dihitung per baris: bobot tiap nilai unik = jumlah kemunculannya.
+    counts = np.bincount(codes, minlength=len(uniques))
+    n = max(int(counts.sum()), 1)
+
+    def _bad(dt):
+        return counts[dt.isna().to_numpy()].sum() / n
+
+    s = pd.Series(uniques, dtype=series.dtype).astype(str).str.strip().str.replace("/", "-", regex=False)
+    dt = pd.to_datetime(s, format="%d-%m-%y", errors="coerce")
+    if _bad(dt) > 0.2:
+        dt = pd.to_datetime(s, format="%d-%m-%Y", errors="coerce")
+    if _bad(dt) > 0.2:
+        dt = pd.to_datetime(s, dayfirst=True, errors="coerce")
+    out = dt.take(codes)
+    out.index = series.index
+    out.name = series.name
+    return out
+
+
+def _to_int_unique(s: pd.Series) -> pd.Series:
+    s2 = (
+        s.astype(str)
+         .str.replace(r"[^\d\-\.,]", "", regex=True)
+         .str.replace(".", "", regex=False)
+         .str.replace(",", ".", regex=False)
+    )
+    return pd.to_numeric(s2, errors="coerce").fillna(0).astype(int)
+
+
+def to_int_series(s: pd.Series) -> pd.Series:
+    if s.dtype.kind in "biu":
+        return s.astype(int)
+    return by_unique(s, _to_int_unique)
+
+
+def _money_unique(series: pd.Series) -> pd.Series:
+    s = series.astype(str).str.replace(r"[^\d,.\-]", "", regex=True)
+    both = s.str.contains(",", regex=False) & s.str.contains(".", regex=False)
+    s = s.where(~both.fillna(False), s.str.replace(".", "", regex=False))
+    s = s.str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
+def coerce_money(series: pd.Series) -> pd.Series:
+    return by_unique(series, _money_unique)
+
+
+def infer_kategori_from_nama(nm: str) -> str:
+    if not isinstance(nm, str):
+        return "Airsoft Gun"
+    nm_low = nm.lower()
+    if any(k in nm_low for k in ["bb", "peluru", "ammo", "magazine", "mag", "gas", "co2"]):
+        return "Aksesori"
+    if "operator" in nm_low:
+        return "Aksesori"
+    return "Airsoft Gun"
+
+
+@timed("map_aj_columns")
+def map_aj_columns(df_raw: pd.DataFrame):
+    """Petakan kolom posisi A..J ke skema internal. Return (df, jumlah baris tanggal tidak valid)."""
+    if df_raw.shape[1] < 10:
+        raise ValueError(f"Jumlah kolom kurang dari 10. Dibutuhkan kolom A..J ({AJ_LAYOUT}).")
+    col = [df_raw.iloc[:, i] for i in range(10)]
+
+    out = pd.DataFrame({
+        "ID Produk": to_int_series(col[0]),
+        "Nama Produk": col[1].astype(str).str.strip(),
+        "Harga": to_int_series(col[2]),
+        "Keuntungan per unit": to_int_series(col[3]),
+        "Keuntungan total": to_int_series(col[4]),
+        "Jumlah Terjual": to_int_series(col[5]),
+        "Brand": col[7].astype(str).str.strip(),
+        "Promotion": col[8].astype(str).str.strip(),
+        "Holiday": col[9]
+    })
+
+    out["Tanggal"] = parse_tanggal(col[6])
+    out["Kategori"] = by_unique(out["Nama Produk"], lambda s: s.map(infer_kategori_from_nama))
+
+    before = len(out)
+    out = out.dropna(subset=["Tanggal"])
+    return out[REQUIRED + ["Promotion", "Holiday"]], before - len(out)
@@ -1,10 +1,16 @@
-
 import streamlit as st
 import pandas as pd
 
+from utils import dataset_store
+from utils.dataset import Dataset, build_dataset, get_shared, share
+
 SESSION_KEYS = {
     "logged_in": False,
+    "username": None,
     "df": None,
+    "dataset_ref": None,
+    "dataset_autoload": False,
+    "dataset_from_store": False,
     "metrics": {},
 }
 
@@ -19,14 +25,89 @@ def guard_login():
         st.warning("Silakan login terlebih dahulu di halaman utama.")
         st.stop()
 
+def is_admin() -> bool:
+    return bool(st.session_state.get("logged_in")) and st.session_state.get("username") == "admin"
+
+def _remember(ds: Dataset | None, from_store: bool) -> Dataset | None:
+    # Sesi menyimpan id versi; datanya satu instance bersama per proses (utils/dataset.share).
+    # "dataset_ref" menunjuk instance yang sama (bukan salinan) sebagai cadangan bila versinya
+    # tergusur dari registry bersama.
+    if ds is not None:
+        ds = share(ds)
+    st.session_state["df"] = ds.version if ds is not None else None
+    st.session_state["dataset_ref"] = ds
+    st.session_state["dataset_from_store"] = from_store and ds is not None
+    return ds
+
+def load_dataset() -> Dataset | None:
+    # Sesi baru yang sudah login memuat dataset tersimpan (data/store) satu kali, dan dataset
+    # dari store ikut diperbarui bila store berubah (append / folder drop).
+    obj = st.session_state.get("df")
+    if isinstance(obj, pd.DataFrame):
+        return _remember(build_dataset(obj), False)
+    if isinstance(obj, Dataset):
+        return _remember(obj, st.session_state.get("dataset_from_store", False))
+    if obj is None:
+        if st.session_state.get("logged_in") and not st.session_state.get("dataset_autoload"):
+            st.session_state["dataset_autoload"] = True
+            return _remember(dataset_store.load(), True)
+        return None
+
+    from_store = st.session_state.get("dataset_from_store", False)
+    meta = dataset_store.manifest() if from_store else None
+    if meta is not None and meta.get("version") != obj:
+        ds = dataset_store.load()
+        if ds is not None:
+            return _remember(ds, True)
+    ds = get_shared(obj)
+    if ds is None and meta is not None and meta.get("version") == obj:
+        # Versi tergusur dari registry proses tapi masih ada di store.
+        ds = dataset_store.load()
+    if ds is None:
+        ref = st.session_state.get("dataset_ref")
+        if isinstance(ref, Dataset) and ref.version == obj:
+            return _remember(ref, from_store)
+        st.session_state["df"] = None
+        st.session_state["dataset_ref"] = None
+        st.warning("Dataset sesi ini sudah tidak tersedia di server. Silakan unggah ulang data.")
+    return ds
+
 def load_df() -> pd.DataFrame | None:
-    return st.session_state.get("df")
+    ds = load_dataset()
+    return ds.df if ds is not None else None
+
+def set_df(df: pd.DataFrame | Dataset | None, persist: bool = False) -> Dataset | None:
+    ds = build_dataset(df) if isinstance(df, pd.DataFrame) else df
+    saved = False
+    if persist and ds is not None:
+        try:
+            dataset_store.save(ds)
+            saved = True
+        except Exception:
+            pass
+    return _remember(ds, saved)
+
+def append_df(df_new: pd.DataFrame):
+    """Append baris baru ke dataset sesi (dedup) dan simpan ke store. Return ringkasan."""
+    from utils.ingest import APPEND_LOCK, append_to_dataset
+
+    with APPEND_LOCK:
+        ds, summary = append_to_dataset(load_dataset(), df_new, persist=True)
+        _remember(ds, True)
+    return summary
 
-def set_df(df: pd.DataFrame | None):
-    st.session_state["df"] = df
+def reload_from_store() -> Dataset | None:
+    ds = dataset_store.load()
+    if ds is not None:
+        _remember(ds, True)
+    return ds
 
 def clear_data():
     st.session_state["df"] = None
+    st.session_state["dataset_ref"] = None
+    st.session_state.pop("upload_committed", None)
+    st.session_state["dataset_autoload"] = True
+    st.session_state["dataset_from_store"] = False
     st.session_state["metrics"] = {}
 
 def compute_basic_metrics(df: pd.DataFrame):
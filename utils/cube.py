@@ -0,0 +1,126 @@
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.kpi import product_profit_stats
+from utils.timing import timed
+
+# Kubus agregat: produk x brand x kategori x {hari, minggu ISO (mulai Senin), bulan} dengan
+# jumlah unit, revenue, profit, dan jumlah baris transaksi. Dibangun sekali per versi dataset
+# (Dataset.cube) sehingga grafik & KPI halaman dihitung dari ribuan baris agregat, bukan dari
+# seluruh transaksi. Median profit/unit tidak bisa dijumlahkan, jadi disimpan per produk
+# (utils/kpi.product_profit_stats) untuk KPI Dashboard.
+
+DIMS = ["Nama Produk", "Brand", "Kategori"]
+MEASURES = ["Jumlah Terjual", "Revenue", "Profit", "Baris"]
+GRAINS = ("day", "week", "month")
+FREQ = {"day": "D", "week": "W-MON", "month": "MS"}
+
+
+def _period(tanggal: pd.Series, grain: str) -> pd.Series:
+    if grain == "day":
+        return tanggal
+    if grain == "week":
+        return tanggal - pd.to_timedelta(tanggal.dt.weekday, unit="D")
+    return tanggal.dt.to_period("M").dt.to_timestamp()
+
+
+def _compact(level: pd.DataFrame) -> pd.DataFrame:
+    i32 = np.iinfo(np.int32)
+    units = level["Jumlah Terjual"]
+    if units.empty or (units.min() >= i32.min and units.max() <= i32.max):
+        level["Jumlah Terjual"] = units.astype(np.int32)
+    level["Baris"] = level["Baris"].astype(np.int32)
+    return level
+
+
+def _check_totals(levels: dict, base: pd.DataFrame) -> None:
+    """Total unit & revenue tiap level kubus harus sama dengan total baris sumber."""
+    for measure in ("Jumlah Terjual", "Revenue"):
+        expected = base[measure].sum()
+        for grain, lv in levels.items():
+            got = lv[measure].sum()
+            if not np.isclose(got, expected, rtol=1e-9, atol=1e-6):
+                raise ValueError(f"Total {measure} kubus ({grain}) {got} != data {expected}")
+
+
+class AggregateCube:
+    def __init__(self, levels: dict, product_stats: pd.DataFrame, rows: int, has_revenue: bool = True):
+        self.levels = levels
+        self.product_stats = product_stats
+        self.rows = rows
+        self.has_revenue = has_revenue
+
+    @classmethod
+    @timed("cube_build")
+    def build(cls, df: pd.DataFrame) -> "AggregateCube":
+        dims = [c for c in DIMS if c in df.columns]
+        base = pd.DataFrame({c: df[c] for c in dims})
+        base["Periode"] = df["Tanggal"].dt.normalize()
+        base["Jumlah Terjual"] = df["Jumlah Terjual"].astype(np.int64)
+        base["Revenue"] = (df["Harga"].astype(np.float64) * df["Jumlah Terjual"]
+                           if "Harga" in df.columns else 0.0)
+        base["Profit"] = (pd.to_numeric(df["_profit_total"], errors="coerce").fillna(0.0).astype(np.float64)
+                          if "_profit_total" in df.columns else 0.0)
+        base["Baris"] = 1
+        base = base.dropna(subset=["Periode"])
+
+        # dropna=False: baris dengan Brand/Kategori kosong tetap ikut dijumlahkan.
+        levels = {}
+        day = base.groupby(dims + ["Periode"], observed=True, sort=True, dropna=False)[MEASURES].sum().reset_index()
+        levels["day"] = day
+        for grain in ("week", "month"):
+            keyed = day.assign(Periode=_period(day["Periode"], grain))
+            levels[grain] = keyed.groupby(dims + ["Periode"], observed=True, sort=True,
+                                          dropna=False)[MEASURES].sum().reset_index()
+        for grain in GRAINS:
+            levels[grain] = _compact(levels[grain])
+        _check_totals(levels, base)
+        return cls(levels, product_profit_stats(df), len(df), has_revenue="Harga" in df.columns)
+
+    def __len__(self) -> int:
+        return len(self.levels["day"])
+
+    @property
+    def last_date(self) -> Optional[pd.Timestamp]:
+        day = self.levels["day"]
+        return day["Periode"].max() if len(day) else None
+
+    def nbytes(self) -> int:
+        return int(sum(lv.memory_usage(deep=True).sum() for lv in self.levels.values()))
+
+    def select(self, grain: str = "day", products: Optional[Iterable[str]] = None,
+               start=None, end=None) -> pd.DataFrame:
+        """Baris kubus pada `grain`, difilter produk & rentang Periode (inklusif)."""
+        lv = self.levels[grain]
+        mask = np.ones(len(lv), dtype=bool)
+        if products is not None:
+            mask &= lv["Nama Produk"].isin([str(p) for p in products]).to_numpy()
+        if start is not None:
+            mask &= (lv["Periode"] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (lv["Periode"] <= pd.Timestamp(end)).to_numpy()
+        return lv if mask.all() else lv[mask]
+
+    def series(self, grain: str = "day", measure: str = "Jumlah Terjual",
+               products: Optional[Iterable[str]] = None, start=None, end=None,
+               fill: bool = False) -> pd.Series:
+        """Total `measure` per Periode. `fill=True`: periode kosong di antara awal/akhir diisi 0."""
+        s = self.select(grain, products, start, end).groupby("Periode")[measure].sum()
+        if fill and len(s):
+            s = s.resample(FREQ[grain]).sum()
+        return s
+
+    def by_product(self, measures: Optional[list] = None, start=None, end=None,
+                   grain: str = "day") -> pd.DataFrame:
+        """Total per produk (urut nama produk) pada rentang Periode."""
+        measures = measures or MEASURES
+        lv = self.select(grain, start=start, end=end)
+        return lv.groupby("Nama Produk", observed=True, sort=True, dropna=False)[measures].sum()
+
+    def product_daily(self, products: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Frame harian (Nama Produk, Tanggal, Jumlah Terjual) pengganti baris mentah untuk pipeline mingguan."""
+        lv = self.select("day", products)
+        out = lv.groupby(["Nama Produk", "Periode"], observed=True, sort=True, dropna=False)["Jumlah Terjual"].sum().reset_index()
+        return out.rename(columns={"Periode": "Tanggal"})
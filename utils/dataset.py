@@ -0,0 +1,207 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import feature_store
+from utils.cleaning import coerce_money
+from utils.kpi import add_profit_columns
+from utils.timing import timed
+
+# Dataset kanonik: dinormalisasi sekali saat upload (tanggal, angka, uang, kolom profit),
+# lalu hanya dibaca oleh semua halaman. `df` mengembalikan salinan dangkal (copy-on-write),
+# jadi perubahan di halaman tidak pernah sampai ke data bersama. Satu instance per versi
+# dibagi semua sesi dalam proses (sesi hanya menyimpan id versi), dengan dtype ringkas;
+# kubus agregatnya (utils/cube.py) dibangun saat versi didaftarkan.
+
+SCHEMA_VERSION = 1
+
+STRING_COLS = ["Nama Produk", "Brand", "Kategori", "Promotion"]
+INT_COLS = ["Jumlah Terjual"]
+MONEY_COLS = ["Harga"]
+DERIVED_COLS = ["_profit_unit", "_profit_total"]
+# Bilangan bulat diturunkan ke int32 bila rentangnya muat; uang (Harga, profit) tetap float64/int64
+# karena Harga x Jumlah bisa melewati batas int32 / presisi float32.
+INT32_COLS = ["ID Produk", "Jumlah Terjual"]
+FLOAT32_COLS = ["Holiday"]
+# Kolom isi transaksi untuk deduplikasi append (tanpa kolom turunan).
+DEDUP_COLS = ["Tanggal", "ID Produk", "Nama Produk", "Brand", "Kategori", "Harga", "Jumlah Terjual",
+              "Keuntungan per unit", "Keuntungan total", "Promotion", "Holiday"]
+
+
+@dataclass(frozen=True)
+class Dataset:
+    frame: pd.DataFrame
+    version: str
+    profit_unit_col: Optional[str] = None
+    profit_total_col: Optional[str] = None
+    schema_version: int = SCHEMA_VERSION
+    rows_dropped: int = 0
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.frame.copy(deep=False)
+
+    @cached_property
+    def products(self) -> list:
+        return sorted(self.frame["Nama Produk"].dropna().unique().tolist())
+
+    @cached_property
+    def cube(self):
+        """Kubus agregat (utils/cube.py), dibangun sekali per instance."""
+        from utils.cube import AggregateCube
+
+        return AggregateCube.build(self.frame)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+
+def content_version(df: pd.DataFrame) -> str:
+    """Hash isi seluruh frame (nama kolom + nilai), dihitung sekali per dataset."""
+    h = hashlib.sha1(f"v{SCHEMA_VERSION}:".encode("utf-8"))
+    h.update(",".join(map(str, df.columns)).encode("utf-8"))
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def _normalize(df_raw: pd.DataFrame):
+    df = df_raw.copy()
+    df.columns = df.columns.astype(str).str.replace(r"\s+", " ", regex=True).str.strip()
+    df = df.drop(columns=[c for c in DERIVED_COLS if c in df.columns])
+
+    df["Tanggal"] = pd.to_datetime(df["Tanggal"], errors="coerce")
+    before = len(df)
+    df = df.dropna(subset=["Tanggal"]).reset_index(drop=True)
+
+    for c in INT_COLS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype("int64")
+    for c in MONEY_COLS:
+        if c in df.columns:
+            df[c] = coerce_money(df[c]).fillna(0.0).astype("float64")
+    for c in STRING_COLS:
+        if c in df.columns:
+            # Hanya nilai non-null yang diubah ke teks: di pandas 2 astype(str) membuat NaN jadi "nan".
+            df[c] = df[c].where(df[c].isna(), df[c].astype(str))
+    return df, before - len(df)
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Dtype ringkas: kategori untuk kolom teks, int32/float32 untuk kolom numerik kecil (in-place)."""
+    for c in STRING_COLS:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    i32 = np.iinfo(np.int32)
+    for c in INT32_COLS:
+        if c in df.columns and df[c].dtype.kind in "iu" and df[c].dtype != np.int32 and (
+                df.empty or (df[c].min() >= i32.min and df[c].max() <= i32.max)):
+            df[c] = df[c].astype(np.int32)
+    for c in FLOAT32_COLS:
+        if c in df.columns and df[c].dtype == np.float64:
+            df[c] = df[c].astype(np.float32)
+    return df
+
+
+@timed("build_dataset")
+def build_dataset(df_raw: pd.DataFrame) -> Dataset:
+    """Normalisasi frame hasil upload/parquet ke skema kanonik dan bungkus sebagai Dataset."""
+    df, dropped = _normalize(df_raw)
+    col_unit, col_total = add_profit_columns(df)
+    compact(df)
+    return Dataset(frame=df, version=content_version(df), profit_unit_col=col_unit,
+                   profit_total_col=col_total, rows_dropped=dropped)
+
+
+def row_hashes(df: pd.DataFrame, cols: list) -> np.ndarray:
+    return pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+
+
+@timed("append_dataset")
+def append_rows(ds: Dataset, new_raw: pd.DataFrame):
+    """Gabungkan baris baru ke dataset. Baris yang sudah ada (hash isi sama) dibuang secara
+    multiset: bila hash muncul k kali di dataset lama, k kemunculan pertama di file baru dilewati.
+
+    Return (Dataset baru, baris yang benar-benar ditambahkan, jumlah duplikat).
+    """
+    new, _ = _normalize(new_raw)
+    base = ds.frame.drop(columns=[c for c in DERIVED_COLS if c in ds.frame.columns])
+    new = new.reindex(columns=base.columns)
+    for c in base.columns:
+        if new[c].dtype != base[c].dtype and not isinstance(base[c].dtype, pd.CategoricalDtype):
+            try:
+                new[c] = new[c].astype(base[c].dtype)
+            except (TypeError, ValueError):
+                pass
+
+    cols = [c for c in base.columns if c in DEDUP_COLS] or list(base.columns)
+    old_h = pd.Series(row_hashes(base, cols)).value_counts()
+    new_h = pd.Series(row_hashes(new, cols))
+    seen = new_h.map(old_h).fillna(0).to_numpy()
+    nth = new_h.groupby(new_h.to_numpy()).cumcount().to_numpy()
+    added = new[nth >= seen].reset_index(drop=True)
+    duplicates = len(new) - len(added)
+    if added.empty:
+        return ds, added, duplicates
+
+    frame = pd.concat([base, added], ignore_index=True)
+    col_unit, col_total = add_profit_columns(frame)
+    compact(frame)
+    # Versi berantai: hash versi lama + isi baris tambahan (tanpa hash ulang seluruh frame).
+    h = hashlib.sha1(ds.version.encode("ascii"))
+    h.update(row_hashes(added, list(added.columns)).tobytes())
+    out = Dataset(frame=frame, version=h.hexdigest()[:16], profit_unit_col=col_unit,
+                  profit_total_col=col_total)
+    return out, frame.iloc[len(base):].reset_index(drop=True), duplicates
+
+
+# ================== DATASET BERSAMA (PER PROSES) ==================
+
+SHARED_MAX = int(os.environ.get("LOGAN_DATASET_SHARED_MAX", "4"))
+_SHARED: "OrderedDict[str, Dataset]" = OrderedDict()
+_SHARED_LOCK = threading.Lock()
+
+
+def share(ds: Dataset) -> Dataset:
+    """Instance bersama untuk versi `ds` (yang sudah terdaftar dipakai ulang)."""
+    with _SHARED_LOCK:
+        existing = _SHARED.get(ds.version)
+        if existing is not None:
+            _SHARED.move_to_end(ds.version)
+            return existing
+        _SHARED[ds.version] = ds
+        # Versi = hash isi; dipakai juga sebagai fingerprint feature store untuk frame ini,
+        # jadi get_feature_store(ds.frame) tidak perlu meng-hash ulang seluruh baris.
+        feature_store.bind_fingerprint(ds.frame, f"dataset:{ds.version}")
+        while len(_SHARED) > max(1, SHARED_MAX):
+            _SHARED.popitem(last=False)
+    ds.cube
+    return ds
+
+
+def get_shared(version: Optional[str]) -> Optional[Dataset]:
+    with _SHARED_LOCK:
+        ds = _SHARED.get(version)
+        if ds is not None:
+            _SHARED.move_to_end(version)
+        return ds
+
+
+def shared_stats() -> dict:
+    with _SHARED_LOCK:
+        items = list(_SHARED.values())
+    return {
+        "versions": [d.version for d in items],
+        "rows": sum(len(d) for d in items),
+        "bytes": int(sum(d.frame.memory_usage(deep=True).sum() for d in items)),
+        "cube_rows": sum(len(d.cube) for d in items),
+        "cube_bytes": sum(d.cube.nbytes() for d in items),
+        "max_versions": SHARED_MAX,
+    }
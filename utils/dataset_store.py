@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from utils.dataset import SCHEMA_VERSION, Dataset, compact, get_shared, share
+from utils.timing import timed
+
+# Penyimpanan dataset kanonik sebagai Parquet terpartisi (hive): ym=YYYY-MM[/pk=<hash produk>].
+# Dibaca ulang otomatis setelah login; filter produk & rentang tanggal di-push down ke
+# pyarrow.dataset sehingga hanya partisi/row group yang relevan yang dipindai. Pembaca
+# terfilter saat ini adalah ekspor (utils/export.py lewat read_for); halaman prediksi 3 & 4
+# mengambil deret per produk dari kubus agregat di memori (Dataset.cube), bukan dari store.
+
+STORE_DIR = Path(os.environ.get("LOGAN_DATASET_DIR", "data/store"))
+BY_PRODUCT = os.environ.get("LOGAN_DATASET_PARTITION_PRODUCT", "0").strip() in ("1", "true", "yes")
+MANIFEST = "_manifest.json"   # awalan "_" diabaikan pyarrow.dataset saat discovery
+LEGACY_MANIFEST = "manifest.json"   # nama lama (store sebelum ada append); dibaca sebagai fallback
+
+_LOCK = threading.RLock()   # save_append() memegangnya sambil memanggil save()
+
+
+def product_key(produk: str) -> str:
+    return hashlib.sha1(str(produk).encode("utf-8")).hexdigest()[:8]
+
+
+def manifest(store_dir: Path = STORE_DIR) -> Optional[dict]:
+    for name in (MANIFEST, LEGACY_MANIFEST):
+        try:
+            m = json.loads((Path(store_dir) / name).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        return m if m.get("schema_version") == SCHEMA_VERSION else None
+    return None
+
+
+def _partitioning(by_product: bool):
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+
+    fields = [("ym", pa.string())] + ([("pk", pa.string())] if by_product else [])
+    return pads.partitioning(pa.schema(fields), flavor="hive")
+
+
+@timed("dataset_store_save")
+def save(ds: Dataset, store_dir: Path = STORE_DIR, by_product: Optional[bool] = None) -> dict:
+    """Tulis Dataset ke store (ganti isi lama secara atomik). Return manifest."""
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+
+    by_product = BY_PRODUCT if by_product is None else by_product
+    store_dir = Path(store_dir)
+    frame = ds.frame.assign(
+        ym=ds.frame["Tanggal"].dt.strftime("%Y-%m"),
+        _row=range(len(ds.frame)),
+    )
+    if by_product:
+        keys = {p: product_key(p) for p in pd.unique(frame["Nama Produk"])}
+        frame["pk"] = frame["Nama Produk"].map(keys)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "version": ds.version,
+        "rows": int(len(ds.frame)),
+        "columns": list(ds.frame.columns),
+        "profit_unit_col": ds.profit_unit_col,
+        "profit_total_col": ds.profit_total_col,
+        "by_product": bool(by_product),
+        "months": sorted(frame["ym"].unique().tolist()),
+        "written_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with _LOCK:
+        tmp = store_dir.with_name(f"{store_dir.name}.tmp-{os.getpid()}")
+        old = store_dir.with_name(f"{store_dir.name}.old-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        pads.write_dataset(table, tmp, format="parquet", partitioning=_partitioning(by_product),
+                           existing_data_behavior="overwrite_or_ignore")
+        _write_manifest(tmp, meta)
+        if store_dir.exists():
+            store_dir.rename(old)
+        tmp.rename(store_dir)
+        shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+def _write_manifest(store_dir: Path, meta: dict) -> None:
+    tmp = store_dir / f"{MANIFEST}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(meta, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, store_dir / MANIFEST)
+
+
+@timed("dataset_store_append")
+def save_append(prev: Dataset, ds: Dataset, added: pd.DataFrame, store_dir: Path = STORE_DIR) -> dict:
+    """Simpan hasil append: hanya partisi bulan (dan produk) yang tersentuh `added` yang ditulis ulang.
+
+    Jatuh ke save() penuh bila store bukan versi `prev` atau kolom profit baris lama ikut berubah
+    (fallback profit rata-rata global di utils/kpi.py).
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+
+    store_dir = Path(store_dir)
+    # Versi store dicek ulang di dalam lock: append lain yang selesai lebih dulu membuat
+    # `prev` basi dan hasilnya ditulis penuh, bukan menimpa partisi baris orang lain.
+    with _LOCK:
+        meta = manifest(store_dir)
+        n_old = len(prev.frame)
+        stale = meta is None or meta.get("version") != prev.version or list(prev.frame.columns) != list(ds.frame.columns)
+        if not stale:
+            for c in ("_profit_unit", "_profit_total"):
+                if c in ds.frame.columns and not ds.frame[c].iloc[:n_old].reset_index(drop=True).equals(
+                        prev.frame[c].reset_index(drop=True)):
+                    stale = True
+        if stale:
+            return save(ds, store_dir, by_product=None if meta is None else meta.get("by_product"))
+
+        by_product = bool(meta.get("by_product"))
+        ym = ds.frame["Tanggal"].dt.strftime("%Y-%m")
+        touched = added["Tanggal"].dt.strftime("%Y-%m")
+        if by_product:
+            pk = ds.frame["Nama Produk"].map(product_key)
+            pairs = set(touched + "/" + added["Nama Produk"].map(product_key))
+            mask = (ym + "/" + pk).isin(pairs)
+        else:
+            mask = ym.isin(set(touched))
+        frame = ds.frame[mask].assign(ym=ym[mask], _row=ds.frame.index[mask])
+        if by_product:
+            frame["pk"] = pk[mask]
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+
+        pads.write_dataset(table, store_dir, format="parquet", partitioning=_partitioning(by_product),
+                           existing_data_behavior="delete_matching",
+                           basename_template=f"part-{ds.version}-{{i}}.parquet")
+        meta = dict(meta)
+        meta.update({
+            "version": ds.version,
+            "rows": int(len(ds.frame)),
+            "profit_unit_col": ds.profit_unit_col,
+            "profit_total_col": ds.profit_total_col,
+            "months": sorted(set(meta.get("months", [])) | set(touched)),
+            "written_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        _write_manifest(store_dir, meta)
+    return meta
+
+
+def _month(ts) -> str:
+    return pd.Timestamp(ts).strftime("%Y-%m")
+
+
+@timed("dataset_store_read")
+def read(products: Optional[Iterable[str]] = None, start=None, end=None,
+         store_dir: Path = STORE_DIR) -> Optional[pd.DataFrame]:
+    """Baca baris store dengan filter produk / tanggal (inklusif); None bila store belum ada."""
+    import pyarrow.compute as pc
+    import pyarrow.dataset as pads
+
+    meta = manifest(store_dir)
+    if meta is None:
+        return None
+    dset = pads.dataset(Path(store_dir), format="parquet",
+                        partitioning=_partitioning(meta.get("by_product", False)),
+                        ignore_prefixes=[".", "_", LEGACY_MANIFEST])
+    flt = None
+
+    def _and(e):
+        return e if flt is None else flt & e
+
+    if products is not None:
+        products = [str(p) for p in products]
+        if meta.get("by_product"):
+            flt = _and(pc.field("pk").isin([product_key(p) for p in products]))
+        flt = _and(pc.field("Nama Produk").isin(products))
+    if start is not None:
+        flt = _and(pc.field("ym") >= _month(start))
+        flt = _and(pc.field("Tanggal") >= pd.Timestamp(start).to_datetime64())
+    if end is not None:
+        flt = _and(pc.field("ym") <= _month(end))
+        flt = _and(pc.field("Tanggal") <= pd.Timestamp(end).to_datetime64())
+
+    df = dset.to_table(filter=flt).to_pandas()
+    df = df.sort_values("_row", kind="stable").reset_index(drop=True)
+    return df[[c for c in meta["columns"] if c in df.columns]]
+
+
+def load() -> Optional[Dataset]:
+    """Dataset lengkap dari store (tanpa normalisasi ulang); None bila belum ada.
+
+    Versi yang sudah ada di registry proses dipakai langsung tanpa membaca Parquet.
+    """
+    meta = manifest()
+    if meta is None:
+        return None
+    ds = get_shared(meta["version"])
+    if ds is not None:
+        return ds
+    try:
+        frame = read()
+    except Exception:
+        return None
+    if frame is None:
+        return None
+    return share(Dataset(frame=compact(frame), version=meta["version"],
+                         profit_unit_col=meta.get("profit_unit_col"),
+                         profit_total_col=meta.get("profit_total_col")))
+
+
+def read_for(ds: Dataset, products: Optional[Iterable[str]] = None, start=None, end=None) -> pd.DataFrame:
+    """Baris dataset sesi yang difilter; lewat store (pushdown) bila versinya sama, selain itu di memori."""
+    meta = manifest()
+    if meta is not None and meta.get("version") == ds.version:
+        try:
+            out = read(products, start, end)
+            if out is not None:
+                return out
+        except Exception:
+            pass
+    df = ds.df
+    mask = pd.Series(True, index=df.index)
+    if products is not None:
+        mask &= df["Nama Produk"].isin([str(p) for p in products])
+    if start is not None:
+        mask &= df["Tanggal"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df["Tanggal"] <= pd.Timestamp(end)
+    return df[mask].reset_index(drop=True)
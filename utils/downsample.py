@@ -0,0 +1,96 @@
+import os
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Downsampling deret waktu di server sebelum dikirim ke chart: jumlah titik mengikuti lebar
+# chart dalam piksel, bukan panjang data. LTTB (Largest-Triangle-Three-Buckets) untuk satu
+# deret, min/max per bucket untuk banyak kolom; keduanya mempertahankan puncak (mis. lonjakan
+# hari libur). Deret yang sudah cukup pendek dikembalikan apa adanya (resolusi penuh).
+
+CHART_WIDTH_PX = int(os.environ.get("LOGAN_CHART_WIDTH_PX", "900"))
+PX_PER_POINT = 2
+MIN_POINTS = 50
+
+
+def points_for_width(width_px: Optional[int] = None) -> int:
+    width_px = CHART_WIDTH_PX if width_px is None else int(width_px)
+    return max(MIN_POINTS, width_px // PX_PER_POINT)
+
+
+def _as_float(x) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    return np.nan_to_num(x.astype(np.float64))
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """Posisi titik terpilih LTTB (selalu memuat titik pertama & terakhir, urut naik)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+    # n_out - 2 bucket di antara titik pertama dan terakhir.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nx, ny = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            nx, ny = x[-1], y[-1]
+        area = np.abs((x[a] - nx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ny - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(values: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Posisi min & max tiap bucket untuk setiap kolom `values` (1D/2D), digabung dan diurutkan."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    n = len(values)
+    if n_buckets < 1 or 2 * n_buckets >= n:
+        return np.arange(n)
+    values = np.where(np.isnan(values), 0.0, values)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    keep = [np.array([0, n - 1])]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        block = values[lo:hi]
+        keep.append(lo + block.argmin(axis=0))
+        keep.append(lo + block.argmax(axis=0))
+    return np.unique(np.concatenate(keep))
+
+
+def downsample_frame(df: pd.DataFrame, x: str, y: Union[str, list], n_out: Optional[int] = None,
+                     method: str = "lttb") -> pd.DataFrame:
+    """Kurangi `df` (urut menurut `x`) menjadi ~`n_out` baris. `method`: "lttb" atau "minmax"."""
+    n_out = points_for_width() if n_out is None else int(n_out)
+    if len(df) <= n_out:
+        return df
+    cols = [y] if isinstance(y, str) else list(y)
+    if method == "lttb" and len(cols) == 1:
+        idx = lttb_indices(df[x].to_numpy(), df[cols[0]].to_numpy(), n_out)
+    else:
+        idx = minmax_indices(df[cols].to_numpy(dtype=np.float64, na_value=np.nan), n_out // 2)
+    return df.iloc[idx]
+
+
+def for_chart(data: Union[pd.Series, pd.DataFrame], n_out: Optional[int] = None,
+              method: str = "lttb") -> Union[pd.Series, pd.DataFrame]:
+    """Data untuk st.line_chart (sumbu x = index). Index bukan tanggal dipakai menurut posisi."""
+    n_out = points_for_width() if n_out is None else int(n_out)
+    if len(data) <= n_out:
+        return data
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    x = frame.index if isinstance(frame.index, pd.DatetimeIndex) else np.arange(len(frame))
+    if method == "lttb" and frame.shape[1] == 1:
+        idx = lttb_indices(x, frame.iloc[:, 0].to_numpy(), n_out)
+    else:
+        idx = minmax_indices(frame.to_numpy(dtype=np.float64, na_value=np.nan), n_out // 2)
+    return data.iloc[idx]
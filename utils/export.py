@@ -0,0 +1,79 @@
+from io import BytesIO
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from utils.dataset import Dataset
+from utils.dataset_store import read_for
+from utils.timing import timed
+
+# Ekspor dataset sesi: CSV (ditulis per chunk), Parquet, atau Arrow IPC (zstd), dengan filter
+# produk & rentang tanggal (di-push down ke data/store bila versinya sama). Dipanggil lewat
+# callable st.download_button, jadi file baru diserialisasi saat tombol diklik. Hasilnya
+# ditulis langsung ke buffer bytes (CSV per chunk, tanpa string utuh + salinan encode).
+
+FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": (".arrow", "application/vnd.apache.arrow.file"),
+}
+CHUNK_ROWS = 100_000
+
+
+def export_frame(ds: Dataset, products: Optional[Iterable[str]] = None, start=None, end=None) -> pd.DataFrame:
+    """Baris yang diekspor: filter produk/tanggal, tanpa kolom bantu (awalan "_")."""
+    products = list(products) if products else None
+    df = read_for(ds, products=products, start=start, end=end)
+    return df[[c for c in df.columns if not str(c).startswith("_")]]
+
+
+def iter_csv(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """CSV utf-8 per potongan `chunk_rows` baris (header hanya di potongan pertama)."""
+    if df.empty:
+        yield df.to_csv(index=False).encode("utf-8")
+        return
+    for i in range(0, len(df), chunk_rows):
+        yield df.iloc[i:i + chunk_rows].to_csv(index=False, header=i == 0).encode("utf-8")
+
+
+def write_export(df: pd.DataFrame, fmt: str, f: BinaryIO) -> None:
+    if fmt == "CSV":
+        for chunk in iter_csv(df):
+            f.write(chunk)
+        return
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "Parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, f, compression="zstd")
+    elif fmt == "Arrow IPC":
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.ipc.new_file(f, table.schema, options=options) as writer:
+            for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+                writer.write_batch(batch)
+    else:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+
+
+@timed("export")
+def open_export(ds: Dataset, fmt: str, products: Optional[Iterable[str]] = None,
+                start=None, end=None) -> BytesIO:
+    """File hasil ekspor (posisi di awal), siap dipakai sebagai `data` st.download_button."""
+    df = export_frame(ds, products, start, end)
+    f = BytesIO()
+    write_export(df, fmt, f)
+    f.seek(0)
+    return f
+
+
+def lazy_export(ds: Dataset, fmt: str, products: Optional[Iterable[str]] = None, start=None, end=None):
+    """Callable untuk `data=` st.download_button: ekspor baru dijalankan saat diklik."""
+    products = list(products) if products else None
+    return lambda: open_export(ds, fmt, products, start, end)
+
+
+def export_filename(fmt: str, base: str = "data_penjualan_clean") -> str:
+    return base + FORMATS[fmt][0]
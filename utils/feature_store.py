@@ -0,0 +1,306 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import forecast_store
+from utils.timing import timed
+
+# Panel fitur bulanan produk x bulan yang dibangun sekali per versi dataset.
+# Semantik sama dengan _to_monthly + _build_features di utils/model_infer.py:
+# y = jumlah terjual per bulan (bulan kosong di antara transaksi pertama/terakhir = 0),
+# promo/holiday = modus per bulan lalu dibandingkan sebagai string.
+
+PROMO_KEYS = ["A", "B", "C", "D"]
+HOLI_KEYS = [1, 2, 3, 4]
+# Fingerprint store memuat nama produk: dataset yang hanya beda nama produk tidak berbagi store.
+FINGERPRINT_COLS = ["Nama Produk"] + forecast_store.FORECAST_INPUT_COLS
+
+_MAX_STORES = 4
+_STORES: "OrderedDict[str, MonthlyFeatureStore]" = OrderedDict()
+_FP_MEMO: Dict[int, tuple] = {}
+_LOCK = threading.Lock()
+
+
+def _month_ordinal(ts: pd.Series) -> np.ndarray:
+    return (ts.dt.year.to_numpy(dtype=np.int64) * 12 + ts.dt.month.to_numpy(dtype=np.int64) - 1)
+
+
+def _prep_rows(df: pd.DataFrame) -> pd.DataFrame:
+    tanggal = df["Tanggal"]
+    if not pd.api.types.is_datetime64_any_dtype(tanggal):
+        tanggal = pd.to_datetime(tanggal, errors="coerce")
+    d = pd.DataFrame({
+        "prod": df["Nama Produk"].to_numpy(),
+        "Tanggal": tanggal.to_numpy(),
+        "qty": pd.to_numeric(df["Jumlah Terjual"], errors="coerce").fillna(0).to_numpy(dtype=float),
+    })
+    for col in ("Promotion", "Holiday"):
+        if col in df.columns:
+            d[col] = df[col].to_numpy()
+    d = d[d["Tanggal"].notna() & d["prod"].notna()]
+    d["ord"] = _month_ordinal(d["Tanggal"])
+    return d
+
+
+def _mode_counts(d: pd.DataFrame, col: str) -> pd.DataFrame:
+    g = d[["prod", "ord", col]].dropna(subset=[col])
+    return g.groupby(["prod", "ord", col], sort=False).size().rename("n").reset_index()
+
+
+def _pick_modes(counts: pd.DataFrame, col: str) -> pd.DataFrame:
+    # Series.mode mengembalikan nilai terurut; pada seri, nilai terkecil yang dipakai.
+    try:
+        c = counts.sort_values(["prod", "ord", "n", col], ascending=[True, True, False, True], kind="stable")
+    except TypeError:
+        c = counts.assign(_k=counts[col].astype(str)).sort_values(
+            ["prod", "ord", "n", "_k"], ascending=[True, True, False, True], kind="stable")
+    return c.drop_duplicates(["prod", "ord"])[["prod", "ord", col]]
+
+
+class MonthlyFeatureStore:
+    def __init__(self, products, month0: int, y: np.ndarray, first: np.ndarray, last: np.ndarray,
+                 promo_hot: np.ndarray, holi_hot: np.ndarray, promo_counts: Optional[pd.DataFrame],
+                 holi_counts: Optional[pd.DataFrame], fp_parts: Dict[str, tuple]):
+        self.products = list(products)
+        self.index = {p: i for i, p in enumerate(self.products)}
+        self.month0 = int(month0)
+        self.y = y                    # (P, M) float64
+        self.first = first            # (P,) indeks bulan pertama produk
+        self.last = last              # (P,) indeks bulan terakhir produk
+        self.promo_hot = promo_hot    # (P, M, 4) int8
+        self.holi_hot = holi_hot      # (P, M, 4) int8
+        self._promo_counts = promo_counts
+        self._holi_counts = holi_counts
+        self._fp_parts = fp_parts     # produk -> (jumlah hash baris mod 2^64, jumlah baris)
+        self._panels: dict = {}
+
+    # ---------- konstruksi ----------
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "MonthlyFeatureStore":
+        d = _prep_rows(df)
+        empty = np.zeros((0, 0))
+        store = cls([], 0, empty, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                    np.zeros((0, 0, 4), dtype=np.int8), np.zeros((0, 0, 4), dtype=np.int8),
+                    None, None, {})
+        return store._merge(d, _product_hash_parts(df))
+
+    def update(self, new_rows: pd.DataFrame) -> "MonthlyFeatureStore":
+        """Store baru = store ini + baris tambahan; hanya sel produk x bulan yang tersentuh dihitung ulang."""
+        return self._merge(_prep_rows(new_rows), _product_hash_parts(new_rows))
+
+    def _merge(self, d: pd.DataFrame, new_parts: Dict[str, tuple]) -> "MonthlyFeatureStore":
+        products = list(self.products)
+        index = dict(self.index)
+        for p in pd.unique(d["prod"]):
+            if p not in index:
+                index[p] = len(products)
+                products.append(p)
+        P = len(products)
+
+        if len(d):
+            lo = int(d["ord"].min())
+            hi = int(d["ord"].max())
+            if self.y.shape[1]:
+                lo = min(lo, self.month0)
+                hi = max(hi, self.month0 + self.y.shape[1] - 1)
+        elif self.y.shape[1]:
+            lo, hi = self.month0, self.month0 + self.y.shape[1] - 1
+        else:
+            lo, hi = 0, -1
+        M = hi - lo + 1
+        shift = self.month0 - lo if self.y.shape[1] else 0
+
+        y = np.zeros((P, M), dtype=float)
+        promo_hot = np.zeros((P, M, 4), dtype=np.int8)
+        holi_hot = np.zeros((P, M, 4), dtype=np.int8)
+        first = np.full(P, np.iinfo(np.int64).max, dtype=np.int64)
+        last = np.full(P, -1, dtype=np.int64)
+        P0, M0 = self.y.shape
+        if P0 and M0:
+            y[:P0, shift:shift + M0] = self.y
+            promo_hot[:P0, shift:shift + M0] = self.promo_hot
+            holi_hot[:P0, shift:shift + M0] = self.holi_hot
+            first[:P0] = self.first + shift
+            last[:P0] = self.last + shift
+
+        promo_counts, holi_counts = self._promo_counts, self._holi_counts
+        if len(d):
+            pcode = pd.Index(products).get_indexer(d["prod"])
+            mcode = d["ord"].to_numpy() - lo
+            np.add.at(y, (pcode, mcode), d["qty"].to_numpy())
+            np.minimum.at(first, pcode, mcode)
+            np.maximum.at(last, pcode, mcode)
+
+            if "Promotion" in d.columns:
+                promo_counts = self._accumulate(promo_counts, _mode_counts(d, "Promotion"), "Promotion")
+                self._fill_hot(promo_hot, promo_counts, d, "Promotion", index, lo,
+                               [str(k) for k in PROMO_KEYS])
+            if "Holiday" in d.columns:
+                holi_counts = self._accumulate(holi_counts, _mode_counts(d, "Holiday"), "Holiday")
+                self._fill_hot(holi_hot, holi_counts, d, "Holiday", index, lo,
+                               [str(k) for k in HOLI_KEYS])
+
+        parts = dict(self._fp_parts)
+        for prod, (h, n) in new_parts.items():
+            h0, n0 = parts.get(prod, (0, 0))
+            parts[prod] = ((h0 + h) % 2**64, n0 + n)
+        return MonthlyFeatureStore(products, lo, y, first, last, promo_hot, holi_hot,
+                                   promo_counts, holi_counts, parts)
+
+    @staticmethod
+    def _accumulate(old: Optional[pd.DataFrame], new: pd.DataFrame, col: str) -> pd.DataFrame:
+        if old is None or old.empty:
+            return new
+        both = pd.concat([old, new], ignore_index=True)
+        return both.groupby(["prod", "ord", col], sort=False)["n"].sum().reset_index()
+
+    @staticmethod
+    def _fill_hot(hot: np.ndarray, counts: pd.DataFrame, d: pd.DataFrame, col: str,
+                  index: dict, lo: int, keys: list) -> None:
+        touched = d[["prod", "ord"]].drop_duplicates()
+        sub = counts.merge(touched, on=["prod", "ord"], how="inner")
+        modes = _pick_modes(sub, col)
+        if modes.empty:
+            return
+        pcode = pd.Index(list(index)).get_indexer(modes["prod"])
+        mcode = modes["ord"].to_numpy() - lo
+        as_str = modes[col].astype(str).to_numpy()
+        for k, key in enumerate(keys):
+            hot[pcode, mcode, k] = (as_str == key)
+
+    # ---------- akses ----------
+    def __contains__(self, product) -> bool:
+        return product in self.index
+
+    @property
+    def months(self) -> pd.DatetimeIndex:
+        start = pd.Timestamp(year=self.month0 // 12, month=self.month0 % 12 + 1, day=1)
+        return pd.date_range(start, periods=self.y.shape[1], freq="MS")
+
+    def fingerprint(self, product: str) -> str:
+        """Hash konten baris produk; sama untuk store hasil build maupun update()."""
+        h, n = self._fp_parts[product]
+        return forecast_store.make_key(rows=h, n=n)
+
+    def panel(self, n_steps: int, ma: int = 3) -> dict:
+        """Panel fitur kontigu: y, lag (P, M, n_steps), ma, one-hot, month_sin/cos, dan mask valid."""
+        key = (n_steps, ma)
+        if key in self._panels:
+            return self._panels[key]
+        P, M = self.y.shape
+        m_idx = np.arange(M)
+        inside = (m_idx[None, :] >= self.first[:, None]) & (m_idx[None, :] <= self.last[:, None])
+        y_nan = np.where(inside, self.y, np.nan)
+        lags = np.full((P, M, n_steps), np.nan)
+        for i in range(1, n_steps + 1):
+            lags[:, i:, i - 1] = y_nan[:, :-i] if i < M else np.nan
+        win = np.full((P, M), np.nan)
+        if M >= ma:
+            c = np.cumsum(np.where(inside, self.y, 0.0), axis=1)
+            s = c.copy()
+            s[:, ma:] = c[:, ma:] - c[:, :-ma]
+            win[:, ma - 1:] = s[:, ma - 1:] / ma
+        start = self.first + max(n_steps, ma - 1)
+        valid = inside & (m_idx[None, :] >= start[:, None])
+        month_num = (self.month0 + m_idx) % 12 + 1
+        panel = {
+            "y": self.y,
+            "lags": np.ascontiguousarray(lags),
+            "ma": np.where(valid, win, np.nan),
+            "promo": self.promo_hot,
+            "holi": self.holi_hot,
+            "month_sin": np.sin(2*np.pi*month_num/12),
+            "month_cos": np.cos(2*np.pi*month_num/12),
+            "valid": valid,
+        }
+        self._panels[key] = panel
+        return panel
+
+    def feature_row(self, product: str, n_steps: int, ma: int = 3,
+                    at: Optional[int] = None) -> Tuple[dict, np.ndarray, pd.Timestamp]:
+        """Fitur baris terakhir (atau baris `at`), histori y setelah dropna, dan bulan berikutnya."""
+        p = self.index[product]
+        pnl = self.panel(n_steps, ma)
+        m = int(self.last[p]) if at is None else int(at)
+        start = int(self.first[p]) + max(n_steps, ma - 1)
+        if m < start or not pnl["valid"][p, m]:
+            raise ValueError("Fitur kosong setelah konstruksi. Periksa data produk.")
+        row = {"month_sin": pnl["month_sin"][m], "month_cos": pnl["month_cos"][m]}
+        for i in range(1, n_steps + 1):
+            row[f"lag{i}"] = pnl["lags"][p, m, i - 1]
+        row[f"ma{ma}"] = pnl["ma"][p, m]
+        for k, key in enumerate(PROMO_KEYS):
+            row[f"promo{key}"] = int(pnl["promo"][p, m, k])
+        for k, key in enumerate(HOLI_KEYS):
+            row[f"holi{key}"] = int(pnl["holi"][p, m, k])
+        y_hist = self.y[p, start:m + 1]
+        ordm = self.month0 + m + 1
+        next_month = pd.Timestamp(year=ordm // 12, month=ordm % 12 + 1, day=1)
+        return row, y_hist, next_month
+
+
+def _product_hash_parts(df: pd.DataFrame) -> Dict[str, tuple]:
+    # Jumlah hash baris per produk (mod 2^64): urutan baris tidak memengaruhi forecast,
+    # dan baris tambahan cukup dijumlahkan ke hash lama.
+    if df.empty:
+        return {}
+    cols = [c for c in forecast_store.FORECAST_INPUT_COLS if c in df.columns]
+    h = pd.util.hash_pandas_object(df[cols], index=False)
+    agg = h.groupby(df["Nama Produk"].to_numpy(), sort=False).agg(["sum", "size"])
+    return {p: (int(hs), int(n)) for p, hs, n in zip(agg.index, agg["sum"], agg["size"])}
+
+
+def _frame_fingerprint(df: pd.DataFrame) -> str:
+    memo = _FP_MEMO.get(id(df))
+    sig = (len(df), tuple(df.columns))
+    if memo is not None:
+        ref, memo_sig, fp = memo
+        if ref() is df and memo_sig == sig:
+            return fp
+    fp = forecast_store.data_fingerprint(df, FINGERPRINT_COLS)
+    bind_fingerprint(df, fp)
+    return fp
+
+
+def bind_fingerprint(df: pd.DataFrame, fp: str) -> None:
+    """Pasang fingerprint yang sudah diketahui (mis. versi dataset) untuk objek frame ini."""
+    oid = id(df)
+    _FP_MEMO[oid] = (weakref.ref(df, lambda _r, oid=oid: _FP_MEMO.pop(oid, None)),
+                     (len(df), tuple(df.columns)), fp)
+
+
+@timed("feature_store")
+def get_feature_store(df: pd.DataFrame) -> MonthlyFeatureStore:
+    fp = _frame_fingerprint(df)
+    with _LOCK:
+        store = _STORES.get(fp)
+        if store is not None:
+            _STORES.move_to_end(fp)
+            return store
+    store = MonthlyFeatureStore.build(df)
+    register_feature_store(fp, store)
+    return store
+
+
+def extend_feature_store(old_df: pd.DataFrame, new_df: pd.DataFrame,
+                         added: pd.DataFrame) -> Optional[MonthlyFeatureStore]:
+    """Bila store untuk `old_df` sudah ada, turunkan store `new_df` lewat update(added) alih-alih build ulang."""
+    with _LOCK:
+        store = _STORES.get(_frame_fingerprint(old_df))
+    if store is None:
+        return None
+    store = store.update(added)
+    register_feature_store(_frame_fingerprint(new_df), store)
+    return store
+
+
+def register_feature_store(fp: str, store: MonthlyFeatureStore) -> None:
+    with _LOCK:
+        _STORES[fp] = store
+        _STORES.move_to_end(fp)
+        while len(_STORES) > _MAX_STORES:
+            _STORES.popitem(last=False)
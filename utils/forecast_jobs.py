@@ -0,0 +1,84 @@
+from typing import Optional
+
+import pandas as pd
+
+from utils import jobs
+from utils.dataset import Dataset
+from utils.kpi import compute_kpi_from_stats
+
+# Job prediksi yang dijalankan lewat utils/jobs.py. Kunci job memuat versi dataset,
+# jadi semua sesi yang melihat versi yang sama berbagi satu job & hasilnya.
+
+DASHBOARD_BATCH = 8
+
+
+def aggregate_pred_monthly(pred_mat: pd.DataFrame) -> pd.Series:
+    agg = pred_mat.sum(axis=0, min_count=1).dropna().astype(int)
+    return agg.sort_index()
+
+
+def _dashboard_forecast(job: jobs.Job, ds: Dataset, products: list, horizon: int) -> dict:
+    from utils.model_infer import predict_all_products
+
+    parts = []
+    for i in range(0, len(products), DASHBOARD_BATCH):
+        batch = products[i:i + DASHBOARD_BATCH]
+        job.check()
+        part = predict_all_products(ds.frame, batch, horizon)
+        parts.append(part)
+        job.update(done=i + len(batch), message=f"{i + len(batch)}/{len(products)} produk",
+                   partial=part)
+    parts = [p for p in parts if len(p)]
+    pred_mat = pd.concat(parts) if parts else predict_all_products(ds.frame, [], horizon)
+    units, profit = compute_kpi_from_stats(ds.cube.product_stats, pred_mat)
+    return {"pred_mat": pred_mat, "units": units, "profit": profit,
+            "monthly": aggregate_pred_monthly(pred_mat)}
+
+
+def submit_dashboard_forecast(ds: Dataset, model_key: str, products: list, horizon: int = 12,
+                              restart: bool = False) -> jobs.Job:
+    """Prediksi semua produk + KPI tahunan + agregat bulanan prediksi untuk Dashboard."""
+    products = list(products)
+    return jobs.submit("dashboard_forecast", (ds.version, model_key, tuple(products), horizon),
+                       _dashboard_forecast, ds, products, horizon, total=len(products), restart=restart)
+
+
+def _weekly_all(job: jobs.Job, ds: Dataset, products: list, n_future: int, bulan_ke: int,
+                workers: Optional[int]) -> dict:
+    from utils.weekly_infer import forecast_all_weekly
+
+    rows, skipped = [], []
+    results = forecast_all_weekly(ds.cube.product_daily(), products, n_future, bulan_ke, max_workers=workers)
+    try:
+        for done, (p, pred, err) in enumerate(results, start=1):
+            if err is not None:
+                skipped.append({"Nama Produk": p, "Alasan": err})
+                part = None
+            else:
+                part = pred[["Tanggal", "Prediksi"]].copy()
+                part.insert(0, "Nama Produk", p)
+                rows.append(part)
+            job.update(done=done, message=f"{done}/{len(products)} produk selesai", partial=part)
+    finally:
+        results.close()
+    if not rows:
+        # Tidak ada satu produk pun yang berhasil (mis. semua worker mati): job gagal, bukan "done".
+        reason = skipped[0]["Alasan"] if skipped else "tidak ada produk"
+        raise RuntimeError(f"Semua {len(skipped)} produk gagal diprediksi. Contoh: {reason}")
+    combined = pd.concat(rows, ignore_index=True).sort_values(["Nama Produk", "Tanggal"]).reset_index(drop=True)
+    return {"combined": combined, "skipped": skipped}
+
+
+def submit_weekly_all(ds: Dataset, products: list, n_future: int, bulan_ke: int,
+                      workers: Optional[int] = None, restart: bool = False) -> jobs.Job:
+    products = list(products)
+    return jobs.submit("weekly_all", weekly_all_key(ds, products, n_future, bulan_ke),
+                       _weekly_all, ds, products, n_future, bulan_ke, workers, total=len(products),
+                       restart=restart)
+
+
+def weekly_all_key(ds: Dataset, products: list, n_future: int, bulan_ke: int) -> tuple:
+    """Kunci job mingguan; memuat checksum artefak model agar hasil lama tidak dipakai setelah retrain."""
+    from utils.model_registry import artifacts_key
+
+    return (ds.version, artifacts_key(products), tuple(products), n_future, bulan_ke)
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+STORE_DIR = Path(os.environ.get("LOGAN_FORECAST_STORE_DIR", "reports/forecasts"))
+MAX_STORE_BYTES = int(float(os.environ.get("LOGAN_FORECAST_STORE_MB", "64")) * 1024 * 1024)
+
+# Kolom yang benar-benar memengaruhi hasil forecast; perubahan kolom lain (harga, brand)
+# tidak membuat cache basi.
+FORECAST_INPUT_COLS = ["Tanggal", "Jumlah Terjual", "Promotion", "Holiday"]
+
+_LOCK = threading.Lock()
+_CHECKSUMS: dict = {}
+
+
+def data_fingerprint(df: pd.DataFrame, cols: Optional[list] = None) -> str:
+    cols = [c for c in (cols or FORECAST_INPUT_COLS) if c in df.columns]
+    h = hashlib.sha1(",".join(cols).encode("utf-8"))
+    if len(df):
+        row_hash = pd.util.hash_pandas_object(df[cols], index=False).values
+        h.update(row_hash.tobytes())
+    return h.hexdigest()
+
+
+def file_checksum(*paths) -> str:
+    h = hashlib.sha1()
+    for p in paths:
+        p = Path(p)
+        st = p.stat()
+        memo_key = (str(p.resolve()), st.st_mtime_ns, st.st_size)
+        digest = _CHECKSUMS.get(memo_key)
+        if digest is None:
+            digest = hashlib.sha1(p.read_bytes()).hexdigest()
+            _CHECKSUMS[memo_key] = digest
+        h.update(digest.encode("ascii"))
+    return h.hexdigest()
+
+
+def make_key(**parts) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _path(key: str) -> Path:
+    return STORE_DIR / f"{key}.parquet"
+
+
+def load(key: str) -> Optional[pd.DataFrame]:
+    p = _path(key)
+    if not p.exists():
+        return None
+    try:
+        frame = pd.read_parquet(p)
+        os.utime(p)  # tandai baru dipakai untuk eviksi LRU
+        return frame
+    except Exception:
+        return None
+
+
+def save(key: str, frame: pd.DataFrame) -> None:
+    p = _path(key)
+    tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, p)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        return
+    _evict()
+
+
+def _evict(max_bytes: int = MAX_STORE_BYTES) -> None:
+    with _LOCK:
+        entries = []
+        for f in STORE_DIR.glob("*.parquet"):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        total = sum(size for _, size, _ in entries)
+        for _, size, f in sorted(entries, key=lambda e: e[0]):
+            if total <= max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+
+
+def clear() -> None:
+    with _LOCK:
+        for f in STORE_DIR.glob("*.parquet"):
+            f.unlink(missing_ok=True)
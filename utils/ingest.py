@@ -0,0 +1,304 @@
+import codecs
+import csv
+import io
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pandas as pd
+
+from utils import dataset_store, feature_store
+from utils.cleaning import map_aj_columns
+from utils.dataset import Dataset, append_rows, build_dataset, share
+
+# Ingest CSV besar secara streaming: dibaca per chunk (pyarrow bila ada, fallback pandas),
+# semua kolom dibaca sebagai string (dtype eksplisit, tanpa inferensi per chunk), dipetakan
+# A..J + dibersihkan per chunk, lalu ditulis bertahap ke Parquet. Yang dihemat adalah lonjakan
+# memori saat parsing (tidak ada frame mentah/teks utuh); hasil akhirnya tetap dataset bersih
+# lengkap di memori (Dataset + kubus agregat dibangun dari frame itu).
+
+CHUNK_BYTES = 16 * 1024 * 1024
+CHUNK_ROWS = 200_000
+SNIFF_BYTES = 1024 * 1024
+STREAM_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+DROP_DIR = Path(os.environ.get("LOGAN_DROP_DIR", "data/inbox"))
+DROP_WATCH_SECONDS = float(os.environ.get("LOGAN_DROP_WATCH_SECONDS", "0") or 0)
+# File drop baru diproses bila ukuran/mtime-nya tidak berubah sejak poll sebelumnya dan
+# sudah selama ini tidak disentuh (mencegah memproses file yang masih disalin).
+DROP_SETTLE_SECONDS = float(os.environ.get("LOGAN_DROP_SETTLE_SECONDS", "5") or 0)
+UPLOAD_SUFFIXES = (".csv", ".xlsx", ".xls")
+
+# Satu lock untuk seluruh urutan load -> append_rows -> simpan, dipakai folder drop dan
+# append dari halaman (utils/common.append_df) supaya append bersamaan tidak saling menimpa.
+APPEND_LOCK = threading.RLock()
+_DROP_LOCK = threading.Lock()
+_DROP_SEEN: dict = {}
+_WATCH = None
+
+
+@dataclass
+class IngestResult:
+    df: pd.DataFrame
+    rows_read: int = 0
+    rows_dropped: int = 0
+    chunks: int = 0
+    encoding: str = "utf-8"
+    engine: str = "pandas"
+    seconds: float = 0.0
+
+
+def sniff_encoding(f, sample_bytes: int = SNIFF_BYTES) -> str:
+    """Tebak encoding dari sampel awal file; posisi file dikembalikan ke awal."""
+    pos = f.tell()
+    head = f.read(sample_bytes)
+    f.seek(pos)
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False: karakter multibyte yang terpotong di ujung sampel tidak dianggap error.
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _header(f, encoding: str) -> list:
+    pos = f.tell()
+    line = f.readline()
+    f.seek(pos)
+    return next(csv.reader([line.decode(encoding, errors="replace").lstrip("﻿")]), [])
+
+
+def _chunks_pyarrow(f, encoding: str, names: list) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    reader = pacsv.open_csv(
+        f,
+        read_options=pacsv.ReadOptions(block_size=CHUNK_BYTES, encoding=encoding),
+        convert_options=pacsv.ConvertOptions(column_types={n: pa.string() for n in names},
+                                             strings_can_be_null=True),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _chunks_pandas(f, encoding: str, names: list) -> Iterator[pd.DataFrame]:
+    text = io.TextIOWrapper(f, encoding=encoding, newline="")
+    try:
+        yield from pd.read_csv(text, dtype=str, chunksize=CHUNK_ROWS, keep_default_na=True)
+    finally:
+        text.detach()
+
+
+def iter_csv_chunks(f, encoding: Optional[str] = None, engine: Optional[str] = None):
+    """Generator chunk DataFrame (semua kolom string). Return (encoding, engine, iterator)."""
+    encoding = encoding or sniff_encoding(f)
+    names = _header(f, encoding)
+    if engine in (None, "pyarrow"):
+        try:
+            import pyarrow.csv  # noqa: F401
+            return encoding, "pyarrow", _chunks_pyarrow(f, encoding, names)
+        except ImportError:
+            if engine == "pyarrow":
+                raise
+    return encoding, "pandas", _chunks_pandas(f, encoding, names)
+
+
+def _all_numeric(s: pd.Series) -> bool:
+    return bool((pd.to_numeric(s, errors="coerce").notna() | s.isna()).all())
+
+
+def _holiday_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    # Kolom J (Holiday) tetap string selama streaming; setelah semua chunk terbaca baru
+    # dikembalikan ke angka bila seluruh nilainya numerik (sama dengan read_csv biasa).
+    df["Holiday"] = pd.to_numeric(df["Holiday"], errors="coerce")
+    return df
+
+
+def ingest_csv(f, out_path: Optional[Path] = None, encoding: Optional[str] = None,
+               engine: Optional[str] = None, progress=None) -> IngestResult:
+    """Stream CSV A..J dari file biner `f`. Hasil bersih ditulis bertahap ke `out_path` (Parquet)
+    lalu dibaca ulang; tanpa `out_path` chunk bersih disambung di memori.
+
+    `progress(bytes_read, rows_read)` dipanggil per chunk bila diberikan.
+    """
+    t0 = time.perf_counter()
+    start = f.tell()
+    encoding, engine, chunks = iter_csv_chunks(f, encoding, engine)
+    res = IngestResult(df=pd.DataFrame(), encoding=encoding, engine=engine)
+
+    writer, parts = None, []
+    holiday_numeric = True
+    tmp_path = Path(str(out_path) + ".tmp") if out_path is not None else None
+    try:
+        for raw in chunks:
+            res.chunks += 1
+            res.rows_read += len(raw)
+            if holiday_numeric and raw.shape[1] >= 10:
+                holiday_numeric = _all_numeric(raw.iloc[:, 9])
+            clean, dropped = map_aj_columns(raw)
+            res.rows_dropped += dropped
+            del raw
+            if tmp_path is not None:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(clean, preserve_index=False)
+                if writer is None:
+                    tmp_path.parent.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(str(tmp_path), table.schema)
+                writer.write_table(table)
+            else:
+                parts.append(clean)
+            if progress is not None:
+                progress(f.tell() - start, res.rows_read)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            tmp_path.unlink(missing_ok=True)
+        raise
+    if writer is not None:
+        writer.close()
+
+    if tmp_path is not None and tmp_path.exists():
+        if holiday_numeric:
+            res.df = _holiday_numeric(pd.read_parquet(tmp_path))
+            res.df.to_parquet(out_path, index=False)
+            tmp_path.unlink()
+        else:
+            tmp_path.replace(out_path)
+            res.df = pd.read_parquet(out_path)
+    elif parts:
+        res.df = pd.concat(parts, ignore_index=True)
+        if holiday_numeric:
+            res.df = _holiday_numeric(res.df)
+    res.seconds = time.perf_counter() - t0
+    return res
+
+
+# ================== APPEND & FOLDER DROP ==================
+
+def read_upload_file(path: Path):
+    """Baca satu file A..J dari disk. Return (df bersih, baris dibuang)."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with path.open("rb") as f:
+            res = ingest_csv(f)
+        return res.df, res.rows_dropped
+    return map_aj_columns(pd.read_excel(path, engine="openpyxl"))
+
+
+def append_to_dataset(ds: Optional[Dataset], new_clean: pd.DataFrame, persist: bool = True):
+    """Tambahkan baris baru ke `ds` (dedup hash). Feature store diturunkan lewat update()
+    dan forecast produk yang tidak tersentuh tetap cache hit (kunci per produk).
+
+    Return (Dataset, ringkasan dict).
+    """
+    if ds is None:
+        new_ds = build_dataset(new_clean)
+        if persist:
+            dataset_store.save(new_ds)
+        return new_ds, {"added": len(new_ds), "duplicates": 0, "products": len(new_ds.products),
+                        "months": int(new_ds.frame["Tanggal"].dt.to_period("M").nunique())}
+    new_ds, added, duplicates = append_rows(ds, new_clean)
+    summary = {"added": len(added), "duplicates": int(duplicates), "products": 0, "months": 0}
+    if added.empty:
+        return ds, summary
+    summary["products"] = int(added["Nama Produk"].nunique())
+    summary["months"] = int(added["Tanggal"].dt.to_period("M").nunique())
+    new_ds = share(new_ds)
+    feature_store.extend_feature_store(ds.frame, new_ds.frame, added)
+    if persist:
+        dataset_store.save_append(ds, new_ds, added)
+    return new_ds, summary
+
+
+def _move(path: Path, sub: str) -> None:
+    dest = path.parent / sub
+    dest.mkdir(exist_ok=True)
+    target = dest / path.name
+    if target.exists():
+        target = dest / f"{time.strftime('%Y%m%d-%H%M%S')}_{path.name}"
+    shutil.move(str(path), str(target))
+
+
+def pending_drop_files(folder: Path = DROP_DIR, settle: Optional[float] = None) -> list:
+    """File drop yang siap diproses (urut mtime): tidak berubah sejak poll sebelumnya dan
+    tidak disentuh selama `settle` detik (default LOGAN_DROP_SETTLE_SECONDS)."""
+    folder = Path(folder)
+    if not folder.is_dir():
+        return []
+    settle = DROP_SETTLE_SECONDS if settle is None else settle
+    now = time.time()
+    ready, seen = [], {}
+    for p in folder.iterdir():
+        if not (p.is_file() and p.suffix.lower() in UPLOAD_SUFFIXES):
+            continue
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        sig = (st.st_size, st.st_mtime_ns)
+        prev = _DROP_SEEN.get(str(p))
+        seen[str(p)] = sig
+        if (prev is None or prev == sig) and now - st.st_mtime >= settle:
+            ready.append((st.st_mtime, p.name, p))
+    for key in [k for k in _DROP_SEEN if Path(k).parent == folder and k not in seen]:
+        _DROP_SEEN.pop(key, None)
+    _DROP_SEEN.update(seen)
+    return [p for _, _, p in sorted(ready)]
+
+
+def process_drop_folder(folder: Path = DROP_DIR) -> list:
+    """Append semua file di folder drop ke dataset tersimpan (urut mtime); file dipindah ke
+    `done/` atau `failed/`. Return ringkasan per file."""
+    reports = []
+    with APPEND_LOCK:
+        files = pending_drop_files(folder)
+        if not files:
+            return reports
+        ds = dataset_store.load()
+        for path in files:
+            rep = {"file": path.name}
+            try:
+                clean, dropped = read_upload_file(path)
+                ds, summary = append_to_dataset(ds, clean)
+                rep.update(summary, dropped=int(dropped), status="ok")
+                _move(path, "done")
+            except Exception as e:
+                rep.update(status="gagal", error=str(e))
+                try:
+                    _move(path, "failed")
+                except OSError:
+                    pass
+            reports.append(rep)
+    return reports
+
+
+def _watch_loop(folder: Path, interval: float) -> None:
+    while True:
+        try:
+            process_drop_folder(folder)
+        except Exception:
+            pass
+        time.sleep(interval)
+
+
+def start_drop_watch(folder: Path = DROP_DIR, interval: Optional[float] = None) -> Optional[threading.Thread]:
+    """Thread latar belakang yang memantau folder drop (aktif bila LOGAN_DROP_WATCH_SECONDS > 0)."""
+    global _WATCH
+    interval = DROP_WATCH_SECONDS if interval is None else interval
+    if interval <= 0:
+        return None
+    with _DROP_LOCK:
+        if _WATCH is None:
+            _WATCH = threading.Thread(target=_watch_loop, args=(Path(folder), interval),
+                                      name="drop-watch", daemon=True)
+            _WATCH.start()
+        return _WATCH
@@ -0,0 +1,172 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# Penjadwal job latar belakang per proses: pool thread + tabel job. Job dijalankan di luar
+# thread script Streamlit, jadi halaman tetap responsif dan pekerjaan tidak hilang saat
+# browser di-refresh. Job dikenali dari (jenis, kunci) — kunci memuat versi dataset — dan
+# submit ulang dengan kunci sama menempel ke job yang sedang/sudah selesai. Halaman membaca
+# progres & hasil parsial dari objek Job (polling lewat st.fragment(run_every=...)).
+
+JOB_WORKERS = int(os.environ.get("LOGAN_JOB_WORKERS", "2"))
+JOB_HISTORY = int(os.environ.get("LOGAN_JOB_HISTORY", "32"))
+POLL_SECONDS = float(os.environ.get("LOGAN_JOB_POLL_SECONDS", "1"))
+# Job yang selesai dalam waktu ini ditunggu langsung (tanpa tampilan progres).
+INLINE_WAIT = float(os.environ.get("LOGAN_JOB_INLINE_WAIT", "3"))
+
+ACTIVE = ("queued", "running")
+
+_IDS = itertools.count(1)
+_JOBS: "OrderedDict[str, Job]" = OrderedDict()
+_BY_KEY: Dict[tuple, "Job"] = {}
+_LOCK = threading.Lock()
+_POOL: Optional[ThreadPoolExecutor] = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Satu pekerjaan di tabel job. Fungsi job melapor lewat update() dan berhenti di check()."""
+
+    def __init__(self, kind: str, key: tuple, total: Optional[int] = None):
+        self.id = f"{kind}-{next(_IDS)}"
+        self.kind = kind
+        self.key = key
+        self.state = "queued"
+        self.done = 0
+        self.total = total
+        self.message = ""
+        self.result = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+        self._partial: list = []
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, done: Optional[int] = None, total: Optional[int] = None,
+               message: Optional[str] = None, partial=None) -> None:
+        self.check()
+        with self._lock:
+            if done is not None:
+                self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+            if partial is not None:
+                self._partial.append(partial)
+
+    def check(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def fraction(self) -> Optional[float]:
+        return min(1.0, self.done / self.total) if self.total else None
+
+    def partial(self) -> list:
+        with self._lock:
+            return list(self._partial)
+
+    def row(self) -> dict:
+        end = self.ended or time.time()
+        return {"Job": self.id, "Jenis": self.kind, "Status": self.state,
+                "Progres": f"{self.done}/{self.total}" if self.total else str(self.done),
+                "Detik": round(end - (self.started or end), 2), "Error": self.error or ""}
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        _POOL = ThreadPoolExecutor(max_workers=max(1, JOB_WORKERS), thread_name_prefix="logan-job")
+    return _POOL
+
+
+def _run(job: Job, fn: Callable, args: tuple, kwargs: dict) -> None:
+    try:
+        job.check()
+        job.state = "running"
+        job.started = time.time()
+        job.result = fn(job, *args, **kwargs)
+        job.state = "done"
+    except JobCancelled:
+        job.state = "cancelled"
+    except Exception as e:
+        job.state = "failed"
+        job.error = str(e)
+    finally:
+        job.ended = time.time()
+        job._finished.set()
+        with _LOCK:
+            _trim_locked()
+
+
+def _trim_locked() -> None:
+    finished = [j for j in _JOBS.values() if j.state not in ACTIVE]
+    for job in finished[:max(0, len(_JOBS) - JOB_HISTORY)]:
+        del _JOBS[job.id]
+        if _BY_KEY.get((job.kind, job.key)) is job:
+            del _BY_KEY[(job.kind, job.key)]
+
+
+def submit(kind: str, key: tuple, fn: Callable, *args, total: Optional[int] = None,
+           restart: bool = False, **kwargs) -> Job:
+    """Jalankan `fn(job, *args, **kwargs)` di pool. Job (kind, key) yang sudah ada dipakai ulang
+    (termasuk yang gagal/dibatalkan, supaya statusnya terlihat); `restart=True` mengganti job
+    yang gagal/dibatalkan dengan job baru."""
+    with _LOCK:
+        job = _BY_KEY.get((kind, key))
+        if job is not None and not (restart and (job.state in ("failed", "cancelled") or job.cancel_requested)):
+            return job
+        job = Job(kind, key, total)
+        _JOBS[job.id] = job
+        _BY_KEY[(kind, key)] = job
+        _trim_locked()
+    _pool().submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def find(kind: str, key: tuple) -> Optional[Job]:
+    with _LOCK:
+        return _BY_KEY.get((kind, key))
+
+
+def get(job_id: str) -> Optional[Job]:
+    with _LOCK:
+        return _JOBS.get(job_id)
+
+
+def cancel(job_id: str) -> bool:
+    job = get(job_id)
+    if job is None or job.finished:
+        return False
+    job.cancel()
+    return True
+
+
+def job_table() -> List[dict]:
+    with _LOCK:
+        return [j.row() for j in reversed(_JOBS.values())]
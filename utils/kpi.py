@@ -0,0 +1,110 @@
+import re
+import unicodedata
+
+import pandas as pd
+
+from utils.cleaning import coerce_money
+from utils.timing import timed
+
+# Deteksi kolom profit + KPI prediksi tahunan Dashboard (tanpa dependensi Streamlit).
+
+PROFIT_UNIT_NAMES = ["Keuntungan/Unit", "Keuntungan Unit", "Profit/Unit", "Keuntungan per unit",
+                     "Keuntungan_per_unit", "Profit per unit", "Profit_per_unit"]
+PROFIT_TOTAL_NAMES = ["KeuntunganTotal", "Keuntungan total", "Keuntungan_total",
+                      "Total Keuntungan", "Total_Keuntungan", "TotalProfit", "ProfitTotal"]
+QTY_NAMES = ["Jumlah Terjual", "Jumlah", "Qty", "Quantity", "Kuantitas"]
+
+
+def _norm_name(s: str) -> str:
+    s = unicodedata.normalize("NFKD", str(s)).lower()
+    s = re.sub(r"[^\w]+", "", s)
+    s = (s
+         .replace("keuntungan", "untung")
+         .replace("profit", "untung")
+         .replace("laba", "untung")
+         .replace("pendapatan", "revenue"))
+    return s
+
+
+def find_profit_columns(columns):
+    """Return (kolom profit per unit, kolom profit total) berdasarkan nama kolom; None bila tidak ada."""
+    norm_cols = {orig: _norm_name(orig) for orig in columns}
+
+    def _find_col(require_all, forbid_any=None):
+        forbid_any = forbid_any or []
+        for orig, n in norm_cols.items():
+            if all(k in n for k in require_all) and all(k not in n for k in forbid_any):
+                return orig
+        return None
+
+    col_profit_unit = _find_col(["untung", "unit"], forbid_any=["total"])
+    col_profit_total = _find_col(["untung", "total"])
+    if col_profit_unit is None:
+        col_profit_unit = next((c for c in PROFIT_UNIT_NAMES if c in columns), None)
+    if col_profit_total is None:
+        col_profit_total = next((c for c in PROFIT_TOTAL_NAMES if c in columns), None)
+    return col_profit_unit, col_profit_total
+
+
+@timed("profit_columns")
+def add_profit_columns(df: pd.DataFrame):
+    """Isi kolom `_profit_unit` / `_profit_total` di df (in-place). Return nama kolom sumber."""
+    col_profit_unit, col_profit_total = find_profit_columns(df.columns)
+
+    df["_profit_unit"] = pd.NA
+    df["_profit_total"] = pd.NA
+
+    if col_profit_unit:
+        df["_profit_unit"] = coerce_money(df[col_profit_unit])
+
+    if col_profit_total:
+        df["_profit_total"] = coerce_money(df[col_profit_total])
+
+    if (df["_profit_unit"].isna().all() or df["_profit_unit"].fillna(0).eq(0).all()) and col_profit_total:
+        qty_col = next((c for c in QTY_NAMES if c in df.columns), None)
+        if qty_col:
+            qty = pd.to_numeric(df[qty_col], errors="coerce")
+            tot = pd.to_numeric(df["_profit_total"], errors="coerce")
+            df["_profit_unit"] = tot / qty.replace(0, pd.NA)
+
+    if (df["_profit_unit"].isna().all() or df["_profit_unit"].fillna(0).eq(0).all()) and df["_profit_total"].notna().any():
+        tot_profit_hist = pd.to_numeric(df["_profit_total"], errors="coerce").fillna(0).sum()
+        tot_units_hist  = pd.to_numeric(df["Jumlah Terjual"], errors="coerce").fillna(0).sum()
+        df["_profit_unit"] = float(tot_profit_hist / tot_units_hist) if tot_units_hist > 0 else 0.0
+
+    df["_profit_unit"]  = pd.to_numeric(df["_profit_unit"], errors="coerce")
+    df["_profit_total"] = pd.to_numeric(df["_profit_total"], errors="coerce")
+    return col_profit_unit, col_profit_total
+
+
+def product_profit_stats(df_in: pd.DataFrame) -> pd.DataFrame:
+    """Per produk: median `_profit_unit`, total `_profit_total`, total unit (dasar KPI profit)."""
+    g = pd.DataFrame({
+        "Nama Produk": df_in["Nama Produk"],
+        "profit_unit_median": pd.to_numeric(df_in["_profit_unit"], errors="coerce"),
+        "profit_total": pd.to_numeric(df_in["_profit_total"], errors="coerce"),
+        "units": pd.to_numeric(df_in["Jumlah Terjual"], errors="coerce"),
+    }).groupby("Nama Produk", observed=True, sort=True)
+    return g.agg({"profit_unit_median": "median", "profit_total": "sum", "units": "sum"})
+
+
+@timed("compute_kpi")
+def compute_kpi_from_stats(stats: pd.DataFrame, pred_mat: pd.DataFrame):
+    """(total unit prediksi, total profit prediksi) dari matriks prediksi produk × bulan."""
+    total_units_pred = 0
+    total_profit_pred = 0.0
+    for prod, row in stats[stats.index.isin(pred_mat.index)].iterrows():
+        units_pred = int(pred_mat.loc[prod].sum())
+        total_units_pred += units_pred
+        avg_profit = None if pd.isna(row["profit_unit_median"]) else float(row["profit_unit_median"])
+        if (avg_profit is None) or (avg_profit == 0):
+            if row["units"] > 0 and row["profit_total"] > 0:
+                avg_profit = float(row["profit_total"] / row["units"])
+        if avg_profit is None or pd.isna(avg_profit):
+            avg_profit = 0.0
+        total_profit_pred += units_pred * avg_profit
+    return int(total_units_pred), int(round(total_profit_pred))
+
+
+def compute_kpi(df_in: pd.DataFrame, pred_mat: pd.DataFrame):
+    return compute_kpi_from_stats(product_profit_stats(df_in), pred_mat)
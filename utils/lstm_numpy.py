@@ -0,0 +1,178 @@
+import json
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Mesin inferensi NumPy untuk model Sequential (LSTM/Dropout/Dense) hasil Keras .h5.
+# Bobot dibaca langsung dari file sehingga halaman prediksi tidak perlu memuat TensorFlow.
+
+
+def _sigmoid(x):
+    # Bentuk stabil: 1 / (1 + e^-x) tanpa overflow exp untuk x sangat negatif.
+    return np.exp(-np.logaddexp(0.0, -x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    None: lambda x: x,
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "relu": lambda x: np.maximum(x, 0.0),
+}
+
+
+def _activation(name):
+    if isinstance(name, dict):
+        name = name.get("config", {}).get("name") or name.get("class_name")
+    if name not in _ACTIVATIONS:
+        raise NotImplementedError(f"Aktivasi tidak didukung: {name}")
+    return _ACTIVATIONS[name]
+
+
+class LSTMLayer:
+    def __init__(self, kernel, recurrent_kernel, bias, return_sequences=False,
+                 activation="tanh", recurrent_activation="sigmoid"):
+        self.kernel = kernel
+        self.recurrent_kernel = recurrent_kernel
+        self.bias = bias if bias is not None else np.zeros(kernel.shape[1], dtype=kernel.dtype)
+        self.units = recurrent_kernel.shape[0]
+        self.return_sequences = return_sequences
+        self.act = _activation(activation)
+        self.rec_act = _activation(recurrent_activation)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        n, T, _ = x.shape
+        u = self.units
+        # Proyeksi input untuk semua timestep sekaligus: (n, T, 4u)
+        zx = x @ self.kernel + self.bias
+        h = np.zeros((n, u), dtype=x.dtype)
+        c = np.zeros((n, u), dtype=x.dtype)
+        seq = np.empty((n, T, u), dtype=x.dtype) if self.return_sequences else None
+        for t in range(T):
+            z = zx[:, t, :] + h @ self.recurrent_kernel
+            i = self.rec_act(z[:, :u])
+            f = self.rec_act(z[:, u:2 * u])
+            g = self.act(z[:, 2 * u:3 * u])
+            o = self.rec_act(z[:, 3 * u:])
+            c = f * c + i * g
+            h = o * self.act(c)
+            if seq is not None:
+                seq[:, t, :] = h
+        return seq if seq is not None else h
+
+
+class DenseLayer:
+    def __init__(self, kernel, bias, activation="linear"):
+        self.kernel = kernel
+        self.bias = bias
+        self.act = _activation(activation)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        y = x @ self.kernel
+        if self.bias is not None:
+            y = y + self.bias
+        return self.act(y)
+
+
+class NumpyLSTMModel:
+    """Pengganti ringan `keras.Model` untuk inferensi; `predict` menerima batch (n, T, F)."""
+
+    def __init__(self, layers: list, input_shape=None, dtype=np.float32):
+        self.layers = layers
+        self.input_shape = input_shape
+        self.dtype = dtype
+
+    def predict(self, x, verbose=0, batch_size=None) -> np.ndarray:
+        out = np.asarray(x, dtype=self.dtype)
+        if out.ndim == 2:
+            out = out[:, None, :]
+        for layer in self.layers:
+            out = layer(out)
+        return out
+
+    __call__ = predict
+
+
+def _layer_weights(group) -> List[np.ndarray]:
+    names = group.attrs.get("weight_names")
+    if names is None:
+        return []
+    return [np.asarray(group[n.decode() if isinstance(n, bytes) else n]) for n in names]
+
+
+def _weight_by_suffix(names, weights, suffix):
+    for n, w in zip(names, weights):
+        base = (n.decode() if isinstance(n, bytes) else n).split("/")[-1].split(":")[0]
+        if base == suffix:
+            return w
+    raise KeyError(f"Bobot '{suffix}' tidak ditemukan di layer ({', '.join(map(str, names))}).")
+
+
+def build_layers(layer_configs: list, weights_for) -> list:
+    """Susun layer NumPy dari konfigurasi Keras; `weights_for(name)` -> (names, arrays)."""
+    layers = []
+    for spec in layer_configs:
+        cls = spec["class_name"]
+        cfg = spec["config"]
+        if cls in ("InputLayer", "Dropout", "SpatialDropout1D", "GaussianNoise", "ActivityRegularization"):
+            continue
+        names, ws = weights_for(cfg["name"])
+        if cls == "LSTM":
+            if cfg.get("go_backwards") or cfg.get("stateful"):
+                raise NotImplementedError("LSTM go_backwards/stateful tidak didukung.")
+            layers.append(LSTMLayer(
+                _weight_by_suffix(names, ws, "kernel"),
+                _weight_by_suffix(names, ws, "recurrent_kernel"),
+                _weight_by_suffix(names, ws, "bias") if cfg.get("use_bias", True) else None,
+                return_sequences=bool(cfg.get("return_sequences", False)),
+                activation=cfg.get("activation", "tanh"),
+                recurrent_activation=cfg.get("recurrent_activation", "sigmoid"),
+            ))
+        elif cls == "Dense":
+            layers.append(DenseLayer(
+                _weight_by_suffix(names, ws, "kernel"),
+                _weight_by_suffix(names, ws, "bias") if cfg.get("use_bias", True) else None,
+                activation=cfg.get("activation", "linear"),
+            ))
+        else:
+            raise NotImplementedError(f"Layer tidak didukung: {cls}")
+    return layers
+
+
+def read_h5_config(h5) -> dict:
+    raw = h5.attrs["model_config"]
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    config = json.loads(raw)
+    if config.get("class_name") != "Sequential":
+        raise NotImplementedError("Hanya model Sequential yang didukung.")
+    return config
+
+
+def load_h5(path) -> NumpyLSTMModel:
+    import h5py
+
+    with h5py.File(str(Path(path)), "r") as h5:
+        config = read_h5_config(h5)
+        mw = h5["model_weights"] if "model_weights" in h5 else h5
+
+        def weights_for(name):
+            if name not in mw:
+                return [], []
+            g = mw[name]
+            return list(g.attrs.get("weight_names", [])), _layer_weights(g)
+
+        layer_configs = config["config"]["layers"]
+        layers = build_layers(layer_configs, weights_for)
+
+    input_shape = None
+    first = layer_configs[0]["config"] if layer_configs else {}
+    if "batch_shape" in first or "batch_input_shape" in first:
+        input_shape = tuple(first.get("batch_shape") or first.get("batch_input_shape"))[1:]
+    return NumpyLSTMModel(layers, input_shape=input_shape)
@@ -1,16 +1,42 @@
+import os
+import threading
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import List, Optional, Tuple
-from tensorflow.keras.models import load_model
-import joblib
+from utils import forecast_store
+from utils.feature_store import MonthlyFeatureStore, get_feature_store
+from utils.rollout import MonthlyRolloutState
+from utils.timing import timed
 
 _MODEL = None
 _SCALER = None
 _FEATS = None
 _NSTEPS = None
+_Y_LOG = False
+_Y_MU = 0.0
+_Y_SD = 1.0
+_ARTIFACT_LOCK = threading.Lock()
+
+# "numpy" (default) membaca bobot .h5 langsung; "keras" memakai tensorflow.keras.
+INFER_BACKEND = os.environ.get("LOGAN_INFER_BACKEND", "numpy").strip().lower()
+
+MODEL_PATH = "models/best_model_fixed.h5"
+SCALER_PATH = "models/scaler_bundle_LOG.pkl"
+
+def load_forecast_model(path, backend: str | None = None):
+    backend = (backend or INFER_BACKEND)
+    if backend == "numpy":
+        try:
+            from utils.lstm_numpy import load_h5
+            return load_h5(path)
+        except (ImportError, NotImplementedError, KeyError):
+            pass
+    from tensorflow.keras.models import load_model
+    return load_model(str(path), compile=False)
 
 def _smart_load_scaler(path: str):
+    import joblib
     obj = joblib.load(path)
     return obj
 
@@ -26,27 +52,32 @@ def _pick_feature_scaler(obj):
         return sc, feats, nsteps
     raise ValueError("Format scaler tidak dikenali.")
 
-def _load_artifacts(model_path: str = "models/best_model_fixed.h5",
-                    scaler_path: str = "models/scaler_bundle_LOG.pkl"):
+def _load_artifacts(model_path: str = MODEL_PATH,
+                    scaler_path: str = SCALER_PATH):
     global _MODEL, _SCALER, _FEATS, _NSTEPS, _Y_LOG, _Y_MU, _Y_SD
-    if _MODEL is None:
-        mp = Path(model_path)
-        if not mp.exists():
-            raise FileNotFoundError(f"Model tidak ditemukan: {model_path}")
-        _MODEL = load_model(str(mp), compile=False)
-    if _SCALER is None:
-        raw = _smart_load_scaler(scaler_path)
-        sc, feats, nsteps = _pick_feature_scaler(raw)
-        _SCALER, _FEATS, _NSTEPS = sc, feats, nsteps
+    if _MODEL is not None and _SCALER is not None:
+        return
+    # Bisa dipanggil bersamaan dari thread warmup dan thread request.
+    with _ARTIFACT_LOCK:
+        if _MODEL is None:
+            mp = Path(model_path)
+            if not mp.exists():
+                raise FileNotFoundError(f"Model tidak ditemukan: {model_path}")
+            _MODEL = load_forecast_model(mp)
+        if _SCALER is None:
+            raw = _smart_load_scaler(scaler_path)
+            sc, feats, nsteps = _pick_feature_scaler(raw)
 
-        try:
-            from collections.abc import Mapping
-            if isinstance(raw, Mapping):
-                _Y_LOG = bool(raw.get("y_log", False))
-                _Y_MU  = float(raw.get("y_mu", 0.0))
-                _Y_SD  = float(raw.get("y_sd", 1.0))
-        except Exception:
-            _Y_LOG, _Y_MU, _Y_SD = False, 0.0, 1.0
+            try:
+                from collections.abc import Mapping
+                if isinstance(raw, Mapping):
+                    _Y_LOG = bool(raw.get("y_log", False))
+                    _Y_MU  = float(raw.get("y_mu", 0.0))
+                    _Y_SD  = float(raw.get("y_sd", 1.0))
+            except Exception:
+                _Y_LOG, _Y_MU, _Y_SD = False, 0.0, 1.0
+            _FEATS, _NSTEPS = feats, nsteps
+            _SCALER = sc
 
 def _month_sin_cos(idx: pd.DatetimeIndex) -> pd.DataFrame:
     m = idx.month.values
@@ -96,68 +127,187 @@ def _build_features(y_m: pd.Series,
     g = g.dropna()
     return g
 
-def _align_feature_order(df_feats: pd.DataFrame, feature_cols: Optional[list]) -> pd.DataFrame:
-    if feature_cols is None:
-        return df_feats
-    cols = [c for c in feature_cols if c in df_feats.columns]
-    missing = set(feature_cols) - set(cols)
-    for m in missing:
-        df_feats[m] = 0.0
-    return df_feats[feature_cols]
+def _prepare_products(store: MonthlyFeatureStore, products: list):
+    """Baris fitur terakhir (ter-scale) tiap produk dari feature store; produk tanpa fitur dilewati."""
+    cols = _feature_cols()
+    names, rows, y_hists, months = [], [], [], []
+    for prod in products:
+        try:
+            row, y_hist, next_month = store.feature_row(prod, _NSTEPS, ma=3)
+        except ValueError:
+            continue
+        names.append(prod)
+        rows.append([float(row.get(c, 0.0)) for c in cols])
+        y_hists.append(y_hist.tolist())
+        months.append(next_month)
+    if not names:
+        return names, np.zeros((0, len(cols))), y_hists, months
+    X0 = _SCALER.transform(np.asarray(rows, dtype=float))
+    return names, X0, y_hists, months
+
+def _feature_cols() -> list:
+    if _FEATS is not None:
+        return list(_FEATS)
+    # Urutan kolom sama dengan _build_features (tanpa "y").
+    return (["month_sin", "month_cos"] + [f"lag{i}" for i in range(1, _NSTEPS+1)] + ["ma3"]
+            + [f"promo{k}" for k in "ABCD"] + [f"holi{k}" for k in range(1, 5)])
+
+def _rollout(X0: np.ndarray, y_hists: List[List[float]], months: List[pd.Timestamp],
+             horizon: int, promo_codes: list, holi_codes: list,
+             counts: Optional[List[int]] = None) -> np.ndarray:
+    # Semua baris (produk/skenario) dimajukan bersama: satu predict per langkah horizon.
+    # `counts` = panjang histori penuh bila y_hists hanya berisi ekornya (backtest).
+    n = X0.shape[0]
+    out = np.zeros((n, horizon), dtype=int)
+    state = MonthlyRolloutState(
+        _feature_cols(), _NSTEPS, _SCALER,
+        y_tails=[h[-max(_NSTEPS, 3):] for h in y_hists],
+        counts=[len(h) for h in y_hists] if counts is None else counts,
+        months=[(m - pd.offsets.MonthBegin(1)).month for m in months],
+        promo_codes=promo_codes, holi_codes=holi_codes,
+    )
+    X_seq = X0.reshape(n, 1, X0.shape[1])
+    for step in range(horizon):
+        yhat = np.asarray(_MODEL.predict(X_seq, verbose=0), dtype=float).reshape(n)
+        if _Y_LOG:
+            yhat = np.expm1(yhat * _Y_SD + _Y_MU)
+        yint = np.rint(np.maximum(0, yhat)).astype(int)
+        out[:, step] = yint
+        if step == horizon - 1:
+            break
+        state.push(yint)
+        X_seq = state.next_input().reshape(n, 1, state.F)
+    return out
+
+def _forecast_key(store: MonthlyFeatureStore, product: str, horizon: int,
+                  promo_code: str | None, holi_code: int | None) -> str:
+    return forecast_store.make_key(
+        kind="monthly",
+        data=store.fingerprint(product),
+        product=product,
+        horizon=int(horizon),
+        promo_code=promo_code,
+        holi_code=holi_code,
+        model=forecast_store.file_checksum(MODEL_PATH, SCALER_PATH),
+        backend=INFER_BACKEND,
+    )
+
+def _stored_forecast(key: str) -> Optional[pd.Series]:
+    frame = forecast_store.load(key)
+    if frame is None or frame.empty:
+        return None
+    return pd.Series(frame["Prediksi"].astype(int).values,
+                     index=pd.DatetimeIndex(frame["Periode"]))
+
+def _store_forecast(key: str, series: pd.Series) -> None:
+    forecast_store.save(key, pd.DataFrame({"Periode": series.index, "Prediksi": series.values}))
+
+@timed("predict_all_products")
+def predict_all_products(df_all: pd.DataFrame, products, horizon: int,
+                         promo_code: str | None = None,
+                         holi_code: int | None = None) -> pd.DataFrame:
+    """Matriks prediksi produk x bulan (NaN di luar horizon tiap produk).
+
+    Produk tanpa data atau fitur kosong dilewati, sama seperti loop per produk sebelumnya.
+    """
+    store = get_feature_store(df_all)
+    per_prod = {}
+    todo, keys = [], {}
+    for prod in dict.fromkeys(products):
+        if prod not in store:
+            continue
+        key = _forecast_key(store, prod, horizon, promo_code, holi_code)
+        cached = _stored_forecast(key)
+        if cached is not None:
+            per_prod[prod] = cached
+            continue
+        todo.append(prod)
+        keys[prod] = key
+
+    if todo:
+        _load_artifacts()
+        names, X0, y_hists, months = _prepare_products(store, todo)
+        if names:
+            preds = _rollout(X0, y_hists, months, horizon,
+                             [promo_code] * len(names), [holi_code] * len(names))
+            for r, prod in enumerate(names):
+                series = pd.Series(preds[r], index=pd.date_range(months[r], periods=horizon, freq="MS"))
+                _store_forecast(keys[prod], series)
+                per_prod[prod] = series
+
+    if not per_prod:
+        return pd.DataFrame(index=pd.Index([], name="Nama Produk"), columns=pd.DatetimeIndex([]), dtype=float)
 
-def _make_sequence(X_hist: np.ndarray, n_steps: int) -> np.ndarray:
-    x = X_hist[-1:, :]
-    return x.reshape(1, 1, x.shape[1])
+    mat = pd.DataFrame(per_prod).T.sort_index(axis=1)
+    mat.index.name = "Nama Produk"
+    return mat.reindex([p for p in dict.fromkeys(products) if p in per_prod])
 
+@timed("predict_with_lstm_for_product")
 def predict_with_lstm_for_product(df_all: pd.DataFrame, product_name: str, horizon: int,
                                   promo_code: str | None = None,
                                   holi_code: int | None = None) -> List[int]:
-    _load_artifacts()
-    sub = df_all[df_all["Nama Produk"] == product_name].copy()
-    if sub.empty:
+    store = get_feature_store(df_all)
+    if product_name not in store:
         raise ValueError(f"Tidak ada data untuk produk: {product_name}")
-    y_m, promo_m, holi_m = _to_monthly(sub)
-    feats = _build_features(y_m, promo_m, holi_m, lags=_NSTEPS, ma=3)
-    if feats.empty:
+    key = _forecast_key(store, product_name, horizon, promo_code, holi_code)
+    cached = _stored_forecast(key)
+    if cached is not None:
+        return cached.tolist()
+    _load_artifacts()
+    names, X0, y_hists, months = _prepare_products(store, [product_name])
+    if not names:
         raise ValueError("Fitur kosong setelah konstruksi. Periksa data produk.")
-    X_hist_df = feats.drop(columns=["y"])
-    X_hist_df = _align_feature_order(X_hist_df, _FEATS)
-    X_hist = X_hist_df.values.astype(float)
-    X_scaled = _SCALER.transform(X_hist)
-
-    preds: List[int] = []
-    y_hist = feats["y"].astype(float).copy()
-    current_month = feats.index.max() + pd.offsets.MonthBegin(1)
-    X_seq = _make_sequence(X_scaled, _NSTEPS)
-
-    for _ in range(horizon):
-        yhat = float(_MODEL.predict(X_seq, verbose=0).squeeze())
-        if '_Y_LOG' in globals() and _Y_LOG:
-            yhat = np.expm1(yhat * _Y_SD + _Y_MU)
-        yint = int(round(max(0, yhat)))
-        preds.append(yint)
+    preds = _rollout(X0, y_hists, months, horizon, [promo_code], [holi_code])
+    _store_forecast(key, pd.Series(preds[0], index=pd.date_range(months[0], periods=horizon, freq="MS")))
+    return preds[0].tolist()
 
-        next_idx = current_month
-        y_hist.loc[next_idx] = yint
+SCENARIO_PROMOS = [None, "A", "B", "C", "D"]
+SCENARIO_HOLIDAYS = [None, 1, 2, 3, 4]
 
-        row = {"y": yint}
-        for i in range(1, _NSTEPS+1):
-            row[f"lag{i}"] = y_hist.iloc[-i] if len(y_hist) >= i else y_hist.iloc[-1]
-        row["ma3"] = pd.Series(y_hist).rolling(3).mean().iloc[-1] if len(y_hist) >= 3 else float(y_hist.iloc[-1])
-        row["month_sin"] = np.sin(2*np.pi*next_idx.month/12)
-        row["month_cos"] = np.cos(2*np.pi*next_idx.month/12)
+@timed("predict_scenario_grid")
+def predict_scenario_grid(df_all: pd.DataFrame, product_name: str, horizon: int,
+                          promo_codes=None, holi_codes=None) -> pd.DataFrame:
+    """Prediksi semua kombinasi promo x holiday untuk satu produk.
 
-        for k in ["A","B","C","D"]:
-            row[f"promo{k}"] = 1 if (promo_code == k) else 0
-        for k in [1,2,3,4]:
-            row[f"holi{k}"] = 1 if (holi_code == k) else 0
+    Histori dan baris fitur terakhir dibangun sekali; semua skenario di-rollout
+    sebagai satu batch per langkah. Hasil: satu baris per skenario dengan kolom
+    "Promo", "Holiday", lalu satu kolom per bulan prediksi.
+    """
+    promo_codes = list(SCENARIO_PROMOS if promo_codes is None else promo_codes)
+    holi_codes = list(SCENARIO_HOLIDAYS if holi_codes is None else holi_codes)
+    grid = [(p, h) for p in promo_codes for h in holi_codes]
 
-        x_next_df = pd.DataFrame([row]).drop(columns=["y"])
-        x_next_df = _align_feature_order(x_next_df, _FEATS)
-        x_next = x_next_df.values.astype(float)
-        x_next_scaled = _SCALER.transform(x_next)
-        X_seq = x_next_scaled.reshape(1, 1, x_next_scaled.shape[1])
-
-        current_month = current_month + pd.offsets.MonthBegin(1)
+    store = get_feature_store(df_all)
+    if product_name not in store:
+        raise ValueError(f"Tidak ada data untuk produk: {product_name}")
+    key = forecast_store.make_key(
+        kind="scenario_grid",
+        data=store.fingerprint(product_name),
+        product=product_name,
+        horizon=int(horizon),
+        grid=grid,
+        model=forecast_store.file_checksum(MODEL_PATH, SCALER_PATH),
+        backend=INFER_BACKEND,
+    )
+    n = len(grid)
+    cached = forecast_store.load(key)
+    if cached is not None and len(cached) == n * horizon:
+        periods = pd.DatetimeIndex(cached["Periode"].iloc[:horizon])
+        preds = cached["Prediksi"].to_numpy(dtype=int).reshape(n, horizon)
+    else:
+        _load_artifacts()
+        names, X0, y_hists, months = _prepare_products(store, [product_name])
+        if not names:
+            raise ValueError("Fitur kosong setelah konstruksi. Periksa data produk.")
+        preds = _rollout(np.repeat(X0, n, axis=0), [list(y_hists[0]) for _ in range(n)],
+                         months * n, horizon, [p for p, _ in grid], [h for _, h in grid])
+        periods = pd.date_range(months[0], periods=horizon, freq="MS")
+        forecast_store.save(key, pd.DataFrame({
+            "Periode": np.tile(periods.values, n),
+            "Prediksi": preds.reshape(-1),
+        }))
 
-    return preds
\ No newline at end of file
+    out = pd.DataFrame(preds, columns=periods)
+    out.insert(0, "Holiday", pd.Series([h for _, h in grid], dtype=object))
+    out.insert(0, "Promo", pd.Series([p for p, _ in grid], dtype=object))
+    return out
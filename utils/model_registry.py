@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.model_infer import INFER_BACKEND, load_forecast_model
+
+# Registry model mingguan per proses: (model, scaler) disimpan dengan kunci
+# (nama produk bersih, mtime artefak) dan dibuang LRU saat melewati batas jumlah/memori.
+
+MODELS_DIR = Path("weekly_models")
+MAX_MODELS = int(os.environ.get("LOGAN_MODEL_REGISTRY_MAX", "16"))
+MAX_BYTES = int(float(os.environ.get("LOGAN_MODEL_REGISTRY_MB", "128")) * 1024 * 1024)
+PREFETCH_N = int(os.environ.get("LOGAN_MODEL_PREFETCH", "0"))
+REQUESTS_PATH = Path(os.environ.get("LOGAN_MODEL_REQUESTS_PATH", "reports/model_requests.json"))
+
+_LOCK = threading.RLock()
+_ENTRIES: "OrderedDict[str, dict]" = OrderedDict()
+_LOADING: Dict[str, threading.Event] = {}
+_STATS = {"hits": 0, "misses": 0, "evictions": 0, "load_seconds": 0.0}
+_REQUESTS: Dict[str, int] = {}
+_REQUESTS_LOADED = False
+_REQUESTS_SAVED_AT = 0.0
+
+
+def clean_product_name(produk: str) -> str:
+    return produk.replace(" ", "_").replace(".", "").replace("/", "").replace("%", "pct")
+
+
+def artifact_paths(produk: str) -> Tuple[Path, Path]:
+    clean_name = clean_product_name(produk)
+    return MODELS_DIR / f"model_{clean_name}.h5", MODELS_DIR / f"scaler_{clean_name}.pkl"
+
+
+def _mtime_key(model_path: Path, scaler_path: Path) -> Tuple[int, int]:
+    return model_path.stat().st_mtime_ns, scaler_path.stat().st_mtime_ns
+
+
+def artifacts_key(products) -> str:
+    """Checksum ringan (mtime_ns, ukuran) artefak model/scaler `products` dan katalog memmap;
+    berubah bila model dilatih ulang atau katalog diekspor ulang."""
+    from utils.weekly_catalog import CATALOG_BIN, CATALOG_DIR, CATALOG_INDEX
+
+    paths = [p for produk in products for p in artifact_paths(produk)]
+    h = hashlib.sha1()
+    for p in paths + [CATALOG_DIR / CATALOG_BIN, CATALOG_DIR / CATALOG_INDEX]:
+        try:
+            st = p.stat()
+            h.update(f"{p}:{st.st_mtime_ns}:{st.st_size};".encode("utf-8"))
+        except OSError:
+            h.update(f"{p}:-;".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _nbytes(obj, _depth: int = 0) -> int:
+    """Perkiraan ukuran bobot: jumlah nbytes array NumPy di atribut objek."""
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if _depth > 3:
+        return 0
+    if hasattr(obj, "count_params"):  # keras.Model
+        return int(obj.count_params()) * 4
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(v, _depth + 1) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return sum(_nbytes(v, _depth + 1) for v in vars(obj).values())
+    return 0
+
+
+def _load_requests() -> None:
+    global _REQUESTS_LOADED
+    if _REQUESTS_LOADED:
+        return
+    _REQUESTS_LOADED = True
+    try:
+        data = json.loads(REQUESTS_PATH.read_text(encoding="utf-8"))
+        for k, v in data.items():
+            _REQUESTS[k] = _REQUESTS.get(k, 0) + int(v)
+    except (OSError, ValueError):
+        pass
+
+
+def _save_requests(force: bool = False) -> None:
+    global _REQUESTS_SAVED_AT
+    now = time.monotonic()
+    if not force and now - _REQUESTS_SAVED_AT < 5.0:
+        return
+    _REQUESTS_SAVED_AT = now
+    try:
+        REQUESTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = REQUESTS_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(_REQUESTS, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, REQUESTS_PATH)
+    except OSError:
+        pass
+
+
+def _evict_locked(keep: str) -> None:
+    total = sum(e["bytes"] for e in _ENTRIES.values())
+    while _ENTRIES and (len(_ENTRIES) > MAX_MODELS or total > MAX_BYTES):
+        name = next(iter(_ENTRIES))
+        if name == keep:
+            if len(_ENTRIES) == 1:
+                break
+            _ENTRIES.move_to_end(name)
+            continue
+        total -= _ENTRIES.pop(name)["bytes"]
+        _STATS["evictions"] += 1
+
+
+def get_weekly_model(produk: str, count_request: bool = True):
+    """Ambil (model, scaler) produk dari registry; load dari weekly_models/ bila belum ada."""
+    clean_name = clean_product_name(produk)
+    model_path, scaler_path = artifact_paths(produk)
+    if not model_path.exists() or not scaler_path.exists():
+        raise FileNotFoundError(f"Model untuk produk {produk} tidak ditemukan. "
+                                f"Pastikan ada file: {model_path.name} dan {scaler_path.name} di folder weekly_models.")
+    mtimes = _mtime_key(model_path, scaler_path)
+
+    while True:
+        with _LOCK:
+            if count_request:
+                _load_requests()
+                _REQUESTS[clean_name] = _REQUESTS.get(clean_name, 0) + 1
+                _save_requests()
+                count_request = False
+            entry = _ENTRIES.get(clean_name)
+            if entry is not None and entry["mtimes"] == mtimes and entry["backend"] == INFER_BACKEND:
+                _ENTRIES.move_to_end(clean_name)
+                _STATS["hits"] += 1
+                return entry["model"], entry["scaler"]
+            pending = _LOADING.get(clean_name)
+            if pending is None:
+                _STATS["misses"] += 1
+                pending = _LOADING[clean_name] = threading.Event()
+                break
+        # Produk yang sama sedang di-load thread lain: tunggu lalu cek ulang.
+        pending.wait()
+
+    try:
+        import joblib
+
+        t0 = time.perf_counter()
+        loaded = None
+        if INFER_BACKEND == "numpy":
+            # Katalog memmap (scripts/export_weekly_catalog.py) bila ada & belum basi.
+            from utils.weekly_catalog import load_from_catalog
+            loaded = load_from_catalog(clean_name, model_path, scaler_path)
+        if loaded is not None:
+            model, scaler = loaded
+        else:
+            model = load_forecast_model(model_path)
+            scaler = joblib.load(str(scaler_path))
+        elapsed = time.perf_counter() - t0
+        with _LOCK:
+            _STATS["load_seconds"] += elapsed
+            _ENTRIES.pop(clean_name, None)
+            _ENTRIES[clean_name] = {
+                "model": model,
+                "scaler": scaler,
+                "mtimes": mtimes,
+                "backend": INFER_BACKEND,
+                "bytes": _nbytes(model) + _nbytes(scaler),
+                "source": "catalog" if loaded is not None else "h5",
+            }
+            _evict_locked(keep=clean_name)
+        return model, scaler
+    finally:
+        with _LOCK:
+            _LOADING.pop(clean_name, None)
+        pending.set()
+
+
+def most_requested(n: int) -> List[str]:
+    with _LOCK:
+        _load_requests()
+        ranked = sorted(_REQUESTS.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [name for name, _ in ranked[:n]]
+
+
+def prefetch(n: Optional[int] = None) -> List[str]:
+    """Load n produk yang paling sering diminta (maks. kapasitas registry). Kembalikan nama yang termuat."""
+    n = min(PREFETCH_N if n is None else n, MAX_MODELS)
+    loaded = []
+    if n <= 0:
+        return loaded
+    by_clean = {p.name[len("model_"):-len(".h5")]: p for p in MODELS_DIR.glob("model_*.h5")}
+    for clean_name in most_requested(n):
+        if clean_name not in by_clean:
+            continue
+        # artifact_paths() membersihkan nama lagi; nama bersih tidak berubah.
+        try:
+            get_weekly_model(clean_name, count_request=False)
+            loaded.append(clean_name)
+        except (FileNotFoundError, OSError, ValueError):
+            continue
+    return loaded
+
+
+def start_prefetch(n: Optional[int] = None) -> Optional[threading.Thread]:
+    n = PREFETCH_N if n is None else n
+    if n <= 0:
+        return None
+    t = threading.Thread(target=prefetch, args=(n,), name="model-prefetch", daemon=True)
+    t.start()
+    return t
+
+
+def registry_stats() -> dict:
+    with _LOCK:
+        lookups = _STATS["hits"] + _STATS["misses"]
+        return {
+            **_STATS,
+            "hit_rate": (_STATS["hits"] / lookups) if lookups else None,
+            "models": len(_ENTRIES),
+            "bytes": sum(e["bytes"] for e in _ENTRIES.values()),
+            "max_models": MAX_MODELS,
+            "max_bytes": MAX_BYTES,
+            "cached": list(_ENTRIES),
+        }
+
+
+def clear() -> None:
+    with _LOCK:
+        _ENTRIES.clear()
+        _save_requests(force=True)
@@ -0,0 +1,134 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+# State rollout rekursif dengan buffer NumPy yang dialokasikan sekali di awal.
+# Biaya per langkah tidak bergantung pada panjang histori maupun konstruksi pandas.
+
+
+class ScalerParams:
+    """Parameter scaler sklearn yang diterapkan in-place (urutan operasi sama dengan sklearn)."""
+
+    def __init__(self, scaler, cols: Optional[np.ndarray] = None):
+        self.scaler = scaler
+        self.mode = None
+        sel = (lambda v: v) if cols is None else (lambda v: np.asarray(v, dtype=float)[cols])
+        if hasattr(scaler, "data_range_") and hasattr(scaler, "min_"):
+            self.mode = "minmax"
+            self.mul, self.add = sel(scaler.scale_), sel(scaler.min_)
+        elif hasattr(scaler, "with_mean") and hasattr(scaler, "scale_"):
+            self.mode = "standard"
+            self.sub = sel(scaler.mean_) if getattr(scaler, "mean_", None) is not None and scaler.with_mean else None
+            self.div = sel(scaler.scale_) if getattr(scaler, "scale_", None) is not None and scaler.with_std else None
+
+    def apply_(self, x: np.ndarray) -> np.ndarray:
+        if self.mode == "minmax":
+            x *= self.mul
+            x += self.add
+        elif self.mode == "standard":
+            if self.sub is not None:
+                x -= self.sub
+            if self.div is not None:
+                x /= self.div
+        else:
+            x[...] = self.scaler.transform(x)
+        return x
+
+
+class MonthlyRolloutState:
+    """State rollout bulanan untuk n baris (produk/skenario) yang dimajukan bersama.
+
+    Menyimpan ring buffer y untuk lag, jumlah berjalan untuk ma3, indeks kolom fitur,
+    dan blok fitur statis (promo/holiday) yang sudah di-scale sekali di awal.
+    """
+
+    def __init__(self, feature_cols: Sequence[str], n_steps: int, scaler,
+                 y_tails: Sequence[Sequence[float]], counts: Sequence[int],
+                 months: Sequence[int], promo_codes: Sequence, holi_codes: Sequence,
+                 ma: int = 3):
+        n = len(y_tails)
+        self.n = n
+        self.n_steps = n_steps
+        self.ma = ma
+        self.cols = list(feature_cols)
+        self.F = len(self.cols)
+        pos = {c: j for j, c in enumerate(self.cols)}
+
+        self.lag_idx = [(i, pos[f"lag{i}"]) for i in range(1, n_steps + 1) if f"lag{i}" in pos]
+        self.ma_idx = pos.get(f"ma{ma}")
+        self.sin_idx = pos.get("month_sin")
+        self.cos_idx = pos.get("month_cos")
+        dyn = [j for _, j in self.lag_idx] + [j for j in (self.ma_idx, self.sin_idx, self.cos_idx) if j is not None]
+        self.dyn_cols = np.array(sorted(dyn), dtype=int)
+        self.scaler = scaler
+        self._dyn_scaler = ScalerParams(scaler, self.dyn_cols)
+
+        # Blok statis: nilai one-hot promo/holiday tetap sepanjang horizon per baris.
+        self.static_raw = np.zeros((n, self.F), dtype=float)
+        for r in range(n):
+            for k in ["A", "B", "C", "D"]:
+                if f"promo{k}" in pos:
+                    self.static_raw[r, pos[f"promo{k}"]] = 1.0 if promo_codes[r] == k else 0.0
+            for k in [1, 2, 3, 4]:
+                if f"holi{k}" in pos:
+                    self.static_raw[r, pos[f"holi{k}"]] = 1.0 if holi_codes[r] == k else 0.0
+        self.static_scaled = ScalerParams(scaler).apply_(self.static_raw.copy())
+
+        self.L = max(n_steps, ma, 1)
+        self.ring = np.zeros((n, self.L), dtype=float)
+        self.count = np.asarray(counts, dtype=np.int64).copy()
+        self.ma_sum = np.zeros(n, dtype=float)
+        self.head = self.L - 1
+        for r, tail in enumerate(y_tails):
+            tail = list(tail)[-self.L:]
+            self.ring[r, self.L - len(tail):] = tail
+            self.ma_sum[r] = float(np.sum(tail[-ma:]))
+        # Bulan (1..12) dari nilai y terakhir di ring buffer.
+        self.month = np.asarray(months, dtype=np.int64).copy()
+
+        self.X = np.empty((n, self.F), dtype=float)
+        self._dyn = np.empty((n, len(self.dyn_cols)), dtype=float)
+        self._dyn_pos = {j: k for k, j in enumerate(self.dyn_cols)}
+        self._angle = np.empty(n, dtype=float)
+
+    def push(self, y: np.ndarray) -> None:
+        L, ma = self.L, self.ma
+        old_ma = self.ring[:, (self.head - ma + 1) % L]
+        had_full = self.count >= ma
+        self.ma_sum += y
+        self.ma_sum -= np.where(had_full, old_ma, 0.0)
+        self.head = (self.head + 1) % L
+        self.ring[:, self.head] = y
+        self.count += 1
+        self.month %= 12
+        self.month += 1
+
+    def next_input(self) -> np.ndarray:
+        """Isi buffer X (n, F) dengan fitur langkah berikutnya yang sudah di-scale."""
+        last = self.ring[:, self.head]
+        dyn, dp = self._dyn, self._dyn_pos
+        for i, j in self.lag_idx:
+            col = dyn[:, dp[j]]
+            col[:] = self.ring[:, (self.head - i + 1) % self.L]
+            np.copyto(col, last, where=self.count < i)
+        if self.ma_idx is not None:
+            col = dyn[:, dp[self.ma_idx]]
+            np.divide(self.ma_sum, self.ma, out=col)
+            np.copyto(col, last, where=self.count < self.ma)
+        if self.sin_idx is not None or self.cos_idx is not None:
+            np.multiply(self.month, 2 * np.pi, out=self._angle)
+            self._angle /= 12
+            if self.sin_idx is not None:
+                np.sin(self._angle, out=dyn[:, dp[self.sin_idx]])
+            if self.cos_idx is not None:
+                np.cos(self._angle, out=dyn[:, dp[self.cos_idx]])
+
+        if self._dyn_scaler.mode is not None:
+            np.copyto(self.X, self.static_scaled)
+            self.X[:, self.dyn_cols] = self._dyn_scaler.apply_(dyn)
+        else:
+            # Scaler tak dikenal: fallback ke transform() penuh.
+            raw = self.static_raw.copy()
+            raw[:, self.dyn_cols] = dyn
+            self.X[...] = self.scaler.transform(raw)
+        return self.X
@@ -0,0 +1,189 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Timing per tahap untuk setiap rerun halaman: wall time, jumlah panggilan, baris diproses.
+# Tanpa dependensi Streamlit; run aktif disimpan per thread (satu thread script per rerun).
+# Hasil run ditambahkan ke log JSONL dan textfile Prometheus (histogram latensi).
+
+ENABLED = os.environ.get("LOGAN_TIMING", "1").strip() not in ("0", "false", "no")
+LOG_PATH = Path(os.environ.get("LOGAN_TIMING_LOG", "reports/timings.jsonl"))
+PROM_PATH = Path(os.environ.get("LOGAN_PROM_TEXTFILE", "reports/logan_metrics.prom"))
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_LOCAL = threading.local()
+_PROM_LOCK = threading.Lock()
+# (metric, labels) -> {"buckets": [..], "sum": float, "count": int}
+_HISTOGRAMS: Dict[tuple, dict] = {}
+_ROWS_TOTAL: Dict[tuple, int] = {}
+
+
+class PageRun:
+    """Catatan satu rerun halaman."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.last = self._t0
+        self.stages: Dict[str, dict] = {}
+        self.finished = False
+        self.total = None
+
+    def add(self, name: str, seconds: float, rows: Optional[int] = None) -> None:
+        s = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "rows": 0})
+        s["seconds"] += seconds
+        s["calls"] += 1
+        if rows is not None:
+            s["rows"] += int(rows)
+        self.last = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def rows(self) -> List[dict]:
+        return [{"Tahap": k, "Detik": round(v["seconds"], 4), "Panggilan": v["calls"], "Baris": v["rows"]}
+                for k, v in sorted(self.stages.items(), key=lambda kv: -kv[1]["seconds"])]
+
+
+def current() -> Optional[PageRun]:
+    return getattr(_LOCAL, "run", None)
+
+
+def start_run(page: str) -> Optional[PageRun]:
+    if not ENABLED:
+        _LOCAL.run = None
+        return None
+    run = PageRun(page)
+    _LOCAL.run = run
+    return run
+
+
+def finish_run(run: Optional[PageRun] = None, at_last_stage: bool = False) -> Optional[dict]:
+    """Tutup run, tulis ke log & textfile. `at_last_stage`: run terputus (mis. st.stop), pakai akhir tahap terakhir."""
+    run = run or current()
+    if run is None or run.finished:
+        return None
+    run.finished = True
+    run.total = (run.last - run._t0) if at_last_stage else run.elapsed()
+    if current() is run:
+        _LOCAL.run = None
+    rec = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(run.started)),
+        "page": run.page,
+        "total_s": round(run.total, 6),
+        "complete": not at_last_stage,
+        "stages": {k: {"s": round(v["seconds"], 6), "calls": v["calls"], "rows": v["rows"]}
+                   for k, v in run.stages.items()},
+    }
+    try:
+        LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with LOG_PATH.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+    except OSError:
+        pass
+    _observe(run, page_total=not at_last_stage)
+    return rec
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None):
+    """Catat durasi blok ke run aktif; no-op bila tidak ada run."""
+    run = current()
+    if run is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add(name, time.perf_counter() - t0, rows)
+
+
+def timed(name: Optional[str] = None):
+    """Dekorator: catat fungsi sebagai tahap; baris = len() argumen pertama bila berupa DataFrame."""
+    def deco(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = current()
+            if run is None:
+                return fn(*args, **kwargs)
+            rows = len(args[0]) if args and hasattr(args[0], "columns") else None
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                run.add(label, time.perf_counter() - t0, rows)
+        return wrapper
+    return deco
+
+
+# ================== PROMETHEUS ==================
+
+def _hist(metric: str, labels: tuple, value: float) -> None:
+    h = _HISTOGRAMS.setdefault((metric, labels), {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+    for i, b in enumerate(BUCKETS):
+        if value <= b:
+            h["buckets"][i] += 1
+    h["sum"] += value
+    h["count"] += 1
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}"
+
+
+def _observe(run: PageRun, page_total: bool = True) -> None:
+    with _PROM_LOCK:
+        # Rerun terputus tidak punya waktu akhir yang pasti; hanya tahapnya yang dicatat.
+        if page_total:
+            _hist("logan_page_duration_seconds", (("page", run.page),), run.total)
+        for name, s in run.stages.items():
+            labels = (("page", run.page), ("stage", name))
+            _hist("logan_stage_duration_seconds", labels, s["seconds"])
+            _ROWS_TOTAL[labels] = _ROWS_TOTAL.get(labels, 0) + s["rows"]
+        try:
+            _write_textfile()
+        except OSError:
+            pass
+
+
+def _write_textfile() -> None:
+    lines = []
+    helps = {
+        "logan_page_duration_seconds": "Durasi rerun halaman Streamlit.",
+        "logan_stage_duration_seconds": "Durasi per tahap dalam satu rerun halaman.",
+    }
+    for metric, help_text in helps.items():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for (m, labels), h in sorted(_HISTOGRAMS.items()):
+            if m != metric:
+                continue
+            les = [f'le="{b}"' for b in BUCKETS] + ['le="+Inf"']
+            for le, c in zip(les, h["buckets"] + [h["count"]]):
+                lines.append(f"{metric}_bucket{_fmt_labels(labels, le)} {c}")
+            lines.append(f"{metric}_sum{_fmt_labels(labels)} {h['sum']:.6f}")
+            lines.append(f"{metric}_count{_fmt_labels(labels)} {h['count']}")
+    lines += ["# HELP logan_stage_rows_total Baris yang diproses per tahap.",
+              "# TYPE logan_stage_rows_total counter"]
+    for labels, v in sorted(_ROWS_TOTAL.items()):
+        lines.append(f"logan_stage_rows_total{_fmt_labels(labels)} {v}")
+
+    PROM_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = PROM_PATH.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp, PROM_PATH)
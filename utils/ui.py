@@ -1,7 +1,8 @@
 import streamlit as st
 from pathlib import Path
-import matplotlib.pyplot as plt
-from io import BytesIO     
+from io import BytesIO
+from utils import timing
+from utils.chart_export import figure_png
 
 PRIMARY_BG = "#ffffff"
 CARD_BG = "#CED2DC"
@@ -88,8 +89,68 @@ def insight_box(title, lines, tone="info"):
     </div>
     """, unsafe_allow_html=True)
 
-def export_chart_as_png(fig):
-    buf = BytesIO()
-    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
-    buf.seek(0)
-    return buf
\ No newline at end of file
+def export_chart_as_png(fig, dpi: int = 200):
+    # Figure ditutup setelah dirasterisasi; untuk tombol download pakai utils.chart_export.lazy_png.
+    return BytesIO(figure_png(fig, dpi))
+
+def begin_page_timing(page: str):
+    # Run sebelumnya yang terputus (st.stop) ditutup dulu dengan waktu tahap terakhirnya.
+    prev = st.session_state.get("_timing_run")
+    if prev is not None and not prev.finished:
+        timing.finish_run(prev, at_last_stage=True)
+    run = timing.start_run(page)
+    st.session_state["_timing_run"] = run
+    return run
+
+def end_page_timing():
+    return timing.finish_run(st.session_state.get("_timing_run"))
+
+def render_timing_panel():
+    from utils.common import is_admin
+    run = st.session_state.get("_timing_run")
+    if run is None or not is_admin():
+        return
+    with st.expander("⏱️ Timing per Tahap (admin)"):
+        st.write(f"Total sejauh ini: {run.elapsed():.3f} s")
+        rows = run.rows()
+        if rows:
+            st.dataframe(rows, use_container_width=True)
+        else:
+            st.write("Belum ada tahap tercatat pada rerun ini.")
+        st.caption(f"Log: `{timing.LOG_PATH}` · Prometheus: `{timing.PROM_PATH}`")
+
+def render_job_progress(job, label: str, render_partial=None):
+    """Progres job latar belakang (utils/jobs.py), dipoll tiap LOGAN_JOB_POLL_SECONDS.
+
+    Saat job selesai halaman dirender ulang penuh untuk menampilkan hasil akhir.
+    `render_partial(job)` (opsional) menampilkan hasil parsial.
+    """
+    from utils import jobs
+
+    @st.fragment(run_every=jobs.POLL_SECONDS)
+    def _poll():
+        if job.finished:
+            st.rerun()
+        frac = job.fraction
+        text = f"{label} — {job.message or job.state}"
+        if frac is None:
+            st.info(text)
+        else:
+            st.progress(frac, text=text)
+        if render_partial is not None:
+            render_partial(job)
+        if st.button("⏹️ Batalkan", key=f"cancel_{job.id}", disabled=job.cancel_requested):
+            job.cancel()
+            st.rerun()
+
+    _poll()
+
+def render_job_status(job, retry_label: str = "🔁 Jalankan ulang") -> bool:
+    """Pesan untuk job gagal/dibatalkan; True bila tombol jalankan ulang diklik."""
+    if job.state == "failed":
+        st.error(f"Job {job.id} gagal: {job.error}")
+    elif job.state == "cancelled":
+        st.info(f"Job {job.id} dibatalkan.")
+    else:
+        return False
+    return st.button(retry_label, key=f"retry_{job.id}")
@@ -0,0 +1,44 @@
+import threading
+import time
+
+import numpy as np
+
+# Warmup model dijalankan sekali per proses server, di thread latar belakang,
+# supaya load artefak + predict pertama tidak terjadi di dalam request Dashboard.
+
+_THREAD = None
+_LOCK = threading.Lock()
+_STATUS = {"state": "idle", "seconds": None, "error": None}
+
+
+def _run():
+    from utils import model_infer
+
+    t0 = time.perf_counter()
+    _STATUS["state"] = "running"
+    try:
+        model_infer._load_artifacts()
+        n_feat = len(model_infer._FEATS) if model_infer._FEATS else int(model_infer._SCALER.n_features_in_)
+        model_infer._MODEL.predict(np.zeros((1, 1, n_feat), dtype=np.float32), verbose=0)
+        # Opsional (LOGAN_MODEL_PREFETCH=N): muat N model mingguan yang paling sering diminta.
+        from utils.model_registry import prefetch
+        prefetch()
+        _STATUS["state"] = "done"
+    except Exception as e:
+        _STATUS["state"] = "failed"
+        _STATUS["error"] = str(e)
+    finally:
+        _STATUS["seconds"] = round(time.perf_counter() - t0, 3)
+
+
+def start_warmup() -> threading.Thread:
+    global _THREAD
+    with _LOCK:
+        if _THREAD is None:
+            _THREAD = threading.Thread(target=_run, name="model-warmup", daemon=True)
+            _THREAD.start()
+        return _THREAD
+
+
+def warmup_status() -> dict:
+    return dict(_STATUS)
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from utils.lstm_numpy import NumpyLSTMModel, build_layers
+
+# Katalog bobot model mingguan: satu file flat (catalog.bin) berisi semua array bobot
+# + scaler seluruh produk, dengan indeks JSON (catalog.json). File dibuka via np.memmap
+# sehingga semua sesi/proses berbagi page cache yang sama, tanpa parse h5py/pickle.
+# Dibuat dengan: python scripts/export_weekly_catalog.py
+
+CATALOG_DIR = Path(os.environ.get("LOGAN_WEEKLY_CATALOG_DIR", "weekly_models"))
+CATALOG_BIN = "catalog.bin"
+CATALOG_INDEX = "catalog.json"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+_LOCK = threading.Lock()
+_OPEN = {"key": None, "index": None, "mm": None}
+
+
+class CatalogScaler:
+    """Scaler minimal (MinMax/Standard) yang dibangun dari array di katalog."""
+
+    def __init__(self, kind: str, arrays: dict):
+        self.kind = kind
+        for name, arr in arrays.items():
+            setattr(self, name, arr)
+        self.n_features_in_ = len(self.scale_)
+        if kind == "standard":
+            self.with_mean = getattr(self, "mean_", None) is not None
+            self.with_std = True
+
+    def transform(self, X):
+        X = np.array(X, dtype=float)
+        if self.kind == "minmax":
+            X *= self.scale_
+            X += self.min_
+        else:
+            if self.with_mean:
+                X -= self.mean_
+            X /= self.scale_
+        return X
+
+    def inverse_transform(self, X):
+        X = np.array(X, dtype=float)
+        if self.kind == "minmax":
+            X -= self.min_
+            X /= self.scale_
+        else:
+            X *= self.scale_
+            if self.with_mean:
+                X += self.mean_
+        return X
+
+
+def scaler_arrays(scaler) -> Tuple[str, dict]:
+    """Ambil array scaler sklearn yang dibutuhkan untuk transform; ValueError bila tak didukung."""
+    if hasattr(scaler, "data_range_") and hasattr(scaler, "min_"):
+        names = ["min_", "scale_", "data_min_", "data_max_", "data_range_"]
+        return "minmax", {n: np.asarray(getattr(scaler, n), dtype=np.float64) for n in names}
+    if hasattr(scaler, "with_mean") and getattr(scaler, "scale_", None) is not None and scaler.with_std:
+        arrays = {"scale_": np.asarray(scaler.scale_, dtype=np.float64)}
+        if scaler.with_mean and getattr(scaler, "mean_", None) is not None:
+            arrays["mean_"] = np.asarray(scaler.mean_, dtype=np.float64)
+        return "standard", arrays
+    raise ValueError(f"Scaler {type(scaler).__name__} tidak didukung katalog.")
+
+
+class CatalogWriter:
+    """Menulis array ke file flat dengan offset ter-align; indeks dikembalikan oleh `add`."""
+
+    def __init__(self, f, weight_dtype=np.float32):
+        self.f = f
+        self.weight_dtype = np.dtype(weight_dtype)
+        self.offset = 0
+
+    def add(self, arr: np.ndarray, dtype=None) -> dict:
+        arr = np.ascontiguousarray(arr, dtype=dtype or self.weight_dtype)
+        pad = (-self.offset) % ALIGN
+        if pad:
+            self.f.write(b"\0" * pad)
+            self.offset += pad
+        spec = {"offset": self.offset, "shape": list(arr.shape), "dtype": arr.dtype.str}
+        self.f.write(arr.tobytes())
+        self.offset += arr.nbytes
+        return spec
+
+
+def source_stat(*paths) -> list:
+    """[(mtime_ns, ukuran)] artefak sumber; dicatat di catalog.json untuk cek basi tanpa hash isi file."""
+    stats = [Path(p).stat() for p in paths]
+    return [[st.st_mtime_ns, st.st_size] for st in stats]
+
+
+def _open_catalog():
+    bin_path, idx_path = CATALOG_DIR / CATALOG_BIN, CATALOG_DIR / CATALOG_INDEX
+    try:
+        st_bin, st_idx = bin_path.stat(), idx_path.stat()
+    except OSError:
+        return None, None
+    key = (st_bin.st_mtime_ns, st_bin.st_size, st_idx.st_mtime_ns)
+    if _OPEN["key"] == key:
+        return _OPEN["index"], _OPEN["mm"]
+    with _LOCK:
+        if _OPEN["key"] != key:
+            index = json.loads(idx_path.read_text(encoding="utf-8"))
+            if index.get("format") != FORMAT_VERSION:
+                return None, None
+            mm = np.memmap(bin_path, dtype=np.uint8, mode="r") if st_bin.st_size else None
+            _OPEN.update(key=key, index=index, mm=mm)
+    return _OPEN["index"], _OPEN["mm"]
+
+
+def _view(mm, spec: dict) -> np.ndarray:
+    dtype = np.dtype(spec["dtype"])
+    count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+    raw = np.asarray(mm[spec["offset"]:spec["offset"] + count * dtype.itemsize])
+    arr = raw.view(dtype).reshape(spec["shape"])
+    # float16 di-upcast (salinan privat); float32/float64 tetap view ke memmap.
+    return arr.astype(np.float32) if dtype == np.float16 else arr
+
+
+def load_from_catalog(clean_name: str, model_path: Path, scaler_path: Path
+                      ) -> Optional[Tuple[NumpyLSTMModel, CatalogScaler]]:
+    """(model, scaler) dari katalog bila entri ada dan (mtime, ukuran) artefak sumber masih cocok."""
+    index, mm = _open_catalog()
+    if index is None or mm is None:
+        return None
+    entry = index.get("products", {}).get(clean_name)
+    if entry is None:
+        return None
+    try:
+        if entry.get("source_stat") != source_stat(model_path, scaler_path):
+            return None
+    except OSError:
+        return None
+
+    weights = entry["weights"]
+
+    def weights_for(name):
+        specs = weights.get(name, [])
+        return [s["name"] for s in specs], [_view(mm, s) for s in specs]
+
+    layers = build_layers(entry["layers"], weights_for)
+    model = NumpyLSTMModel(layers, input_shape=tuple(entry["input_shape"]) if entry.get("input_shape") else None)
+    sc = entry["scaler"]
+    scaler = CatalogScaler(sc["kind"], {n: _view(mm, s) for n, s in sc["arrays"].items()})
+    return model, scaler
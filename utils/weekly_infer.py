@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.model_registry import artifact_paths, clean_product_name
+from utils.timing import timed
+
+# Pipeline prediksi mingguan per produk (dipakai halaman 4, juga di worker process).
+
+SEQ = 12
+
+
+@timed("build_weekly")
+def build_weekly(df_item: pd.DataFrame) -> pd.DataFrame:
+    df_item = df_item.copy()
+    df_item["Jumlah Terjual"] = pd.to_numeric(df_item["Jumlah Terjual"], errors="coerce").fillna(0)
+
+    # Set index tanggal, pakai hanya kolom jumlah terjual
+    df_item = df_item.set_index("Tanggal").sort_index()
+    numeric_df = df_item[["Jumlah Terjual"]].copy()
+
+    # Resample harian → hari tanpa transaksi = 0, lalu mingguan (Senin)
+    daily = numeric_df.resample("D").sum().fillna(0)
+    weekly = daily.resample("W-MON").sum().reset_index()
+
+    # Tambah fitur waktu
+    weekly["Year"] = weekly["Tanggal"].dt.year
+    weekly["Week"] = weekly["Tanggal"].dt.isocalendar().week.astype(int)
+    weekly["Week_sin"] = np.sin(2 * np.pi * weekly["Week"] / 52)
+    weekly["Week_cos"] = np.cos(2 * np.pi * weekly["Week"] / 52)
+    weekly["y"] = weekly["Jumlah Terjual"]
+
+    # LAG & MOVING AVERAGE
+    weekly["lag_1"] = weekly["y"].shift(1)
+    weekly["lag_2"] = weekly["y"].shift(2)
+    weekly["lag_3"] = weekly["y"].shift(3)
+    weekly["lag_4"] = weekly["y"].shift(4)
+    weekly["lag_8"] = weekly["y"].shift(8)
+
+    weekly["ma_3"] = weekly["y"].rolling(3).mean()
+    weekly["ma_4"] = weekly["y"].rolling(4).mean()
+
+    weekly = weekly.dropna().reset_index(drop=True)
+    if len(weekly) < SEQ:
+        raise ValueError("Data mingguan kurang dari 12 minggu, tidak bisa membuat window 12 minggu.")
+    return weekly
+
+
+def target_month_start(weekly: pd.DataFrame, bulan_ke: int) -> Tuple[int, pd.Timestamp]:
+    last_data_year = int(weekly["Tanggal"].max().year)
+    last_data_month = int(weekly["Tanggal"].max().month)
+
+    # Jika bulan target sudah lewat di data terakhir → pakai tahun berikutnya
+    if bulan_ke <= last_data_month:
+        tahun_prediksi = last_data_year + 1
+    else:
+        tahun_prediksi = last_data_year
+
+    # Cari tanggal 1 di bulan target, lalu geser sampai ketemu Senin pertama
+    first_day = pd.Timestamp(tahun_prediksi, bulan_ke, 1)
+    while first_day.weekday() != 0:  # 0 = Monday
+        first_day += pd.Timedelta(days=1)
+    return tahun_prediksi, first_day
+
+
+def generate_zigzag_forecast(last_values, n_future=4):
+    last = last_values[-1]
+    avg  = np.mean(last_values)
+    std  = np.std(last_values) + 1e-6
+
+    max_hist = np.max(last_values)
+    min_hist = np.min(last_values)
+
+    future = []
+
+    for i in range(n_future):
+
+        # 🎯 Noise moderat (tidak liar)
+        noise = np.random.uniform(-0.8, 0.8) * std
+
+        if np.random.rand() < 0.10:
+            shock = np.random.uniform(-0.5, 0.5) * (std * 1.5)
+        else:
+            shock = 0
+
+        pull_to_mean = (avg - last) * 0.10
+        pred = last + noise + shock + pull_to_mean
+
+        upper_bound = max_hist * 1.25
+        lower_bound = max(min_hist * 0.7, 0)
+        pred = np.clip(pred, lower_bound, upper_bound)
+
+        future.append(pred)
+        last = pred
+
+    return np.array(future)
+
+
+@timed("forecast_weekly")
+def forecast_weekly(weekly: pd.DataFrame, produk: str, n_future: int, bulan_ke: int) -> pd.DataFrame:
+    model_path, scaler_path = artifact_paths(produk)
+    if not model_path.exists() or not scaler_path.exists():
+        raise FileNotFoundError(f"Model untuk produk {produk} tidak ditemukan. "
+                                f"Pastikan ada file: {model_path.name} dan {scaler_path.name} di folder weekly_models.")
+    _, first_day = target_month_start(weekly, bulan_ke)
+
+    window_df = weekly.tail(SEQ).reset_index(drop=True)
+
+    # ==== ZIGZAG ====
+    # Angka yang ditampilkan adalah zigzag dari 12 minggu terakhir (seperti sejak awal). Rollout
+    # LSTM mingguan hasilnya tidak pernah dipakai, jadi model tidak dimuat/dijalankan lagi;
+    # artefak model tetap wajib ada per produk (cek di atas). Hasilnya acak per pemanggilan,
+    # jadi sengaja tidak disimpan di forecast store.
+    pred_y = generate_zigzag_forecast(window_df["y"].values, n_future)
+
+    future_dates = pd.date_range(start=first_day, periods=n_future, freq="W-MON")
+    pred_df = pd.DataFrame({
+        "Tanggal": future_dates,
+        "Prediksi": pred_y
+    })
+    return pred_df
+
+
+# ================== SEMUA PRODUK (PARALEL) ==================
+
+def _worker_init():
+    # Seed ulang RNG per worker (worker tidak boleh berbagi state RNG yang sama).
+    np.random.seed()
+
+
+def _mp_context():
+    # Job dijalankan dari proses Streamlit yang multithread; fork di situ bisa deadlock
+    # (lock milik thread lain ikut tersalin), jadi worker dibuat lewat forkserver/spawn.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _weekly_job(produk: str, df_item: pd.DataFrame, n_future: int, bulan_ke: int) -> pd.DataFrame:
+    weekly = build_weekly(df_item)
+    return forecast_weekly(weekly, produk, n_future, bulan_ke)
+
+
+def default_workers() -> int:
+    env = os.environ.get("LOGAN_WEEKLY_WORKERS")
+    if env:
+        return max(1, int(env))
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def forecast_all_weekly(df: pd.DataFrame, products, n_future: int, bulan_ke: int,
+                        max_workers: Optional[int] = None
+                        ) -> Iterator[Tuple[str, Optional[pd.DataFrame], Optional[str]]]:
+    """Jalankan pipeline mingguan tiap produk di process pool; hasil di-yield saat worker selesai.
+
+    Yield (produk, pred_df, None) bila sukses atau (produk, None, pesan_error) bila gagal.
+    """
+    cols = ["Nama Produk", "Tanggal", "Jumlah Terjual"]
+    wanted = set(products)
+    groups = {p: g[cols[1:]] for p, g in df[cols].groupby("Nama Produk", sort=False) if p in wanted}
+    todo = [p for p in products if p in groups]
+    for p in products:
+        if p not in groups:
+            yield p, None, "Tidak ada data untuk produk ini."
+    if not todo:
+        return
+
+    workers = min(max_workers or default_workers(), len(todo))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context(),
+                             initializer=_worker_init) as pool:
+        futures = {pool.submit(_weekly_job, p, groups[p], n_future, bulan_ke): p for p in todo}
+        try:
+            for fut in as_completed(futures):
+                p = futures[fut]
+                try:
+                    yield p, fut.result(), None
+                except Exception as e:
+                    yield p, None, str(e)
+        finally:
+            # Generator ditutup lebih awal (job dibatalkan): produk yang belum mulai tidak dijalankan.
+            for fut in futures:
+                fut.cancel()